@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+
+from config import DB_CONFIG, POOL_CONFIG, QUERY_CONFIG
+from db_manager import DatabaseManager, SHARED_QUERY_METHODS, _INTERNAL_METHODS, _make_page
+from query_stats import QueryStats, caller_tag
+
+try:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # psycopg 3 isteğe bağlı bağımlılıktır
+    psycopg = None
+    AsyncConnectionPool = None
+
+_ASYNC_INTERNAL_METHODS = _INTERNAL_METHODS | frozenset(['_run', '_page'])
+
+
+class AsyncTransaction:
+    """Tek bağlantı üzerinde çalışan async iş birimi"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+
+    async def execute(self, query, params=None):
+        await self.cursor.execute(query, params)
+        if self.cursor.description is not None:
+            return await self.cursor.fetchall()
+        return None
+
+    async def close(self):
+        await self.cursor.close()
+
+
+class AsyncDatabaseManager:
+    """DatabaseManager'ın asyncio sürümü.
+
+    psycopg 3 ve psycopg_pool.AsyncConnectionPool kullanır. Sorgu metotları
+    (SHARED_QUERY_METHODS) DatabaseManager'dan devralınır, bu yüzden aynı
+    isim ve parametrelerle çağrılıp await edilir:
+
+        async with AsyncDatabaseManager() as db:
+            counts = await asyncio.gather(*(
+                db.get_daily_measurements(patient_id) for patient_id in patient_ids
+            ))
+
+    Eşzamanlı sorgu sayısı havuz boyutuyla (DIYABET_DB_POOL_MAX) sınırlıdır;
+    fazlası havuzda sırasını bekler. psycopg 3 sık çalışan sorguları kendisi
+    hazırladığı için ayrıca PREPARE katmanına gerek yoktur.
+    """
+
+    _cursor_ids = itertools.count(1)
+
+    def __init__(self, minconn=None, maxconn=None, timeout=None):
+        if AsyncConnectionPool is None:
+            raise Exception("AsyncDatabaseManager için psycopg 3 gerekli: pip install 'psycopg[binary,pool]'")
+
+        self._pool = AsyncConnectionPool(
+            conninfo=psycopg.conninfo.make_conninfo(**DB_CONFIG),
+            min_size=minconn if minconn is not None else POOL_CONFIG['minconn'],
+            max_size=maxconn if maxconn is not None else POOL_CONFIG['maxconn'],
+            timeout=timeout if timeout is not None else POOL_CONFIG['timeout'],
+            check=AsyncConnectionPool.check_connection,
+            open=False
+        )
+        self.query_stats = QueryStats(
+            slow_query_ms=QUERY_CONFIG['slow_query_ms'],
+            slow_query_log=QUERY_CONFIG['slow_query_log']
+        )
+
+    async def open(self):
+        await self._pool.open(wait=True)
+        logging.info("Async veritabanı bağlantı havuzu oluşturuldu")
+        return self
+
+    async def close(self):
+        await self._pool.close()
+        logging.info("Async veritabanı bağlantıları kapatıldı")
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def get_pool_stats(self):
+        """Bağlantı havuzu istatistiklerini getir"""
+        return self._pool.get_stats()
+
+    def get_query_stats(self):
+        return self.query_stats.snapshot()
+
+    async def execute_query(self, query, params=None, tx=None):
+        tag = caller_tag(_ASYNC_INTERNAL_METHODS)
+        return await self._run(tag, query, params, tx)
+
+    async def _run(self, tag, query, params, tx, mode='all', default=None):
+        if tx is not None:
+            try:
+                with self.query_stats.measure(tag, query) as timer:
+                    result = await tx.execute(query, params)
+                    timer.rows = len(result) if result else 0
+                return self._shape(result, mode, default)
+            except Exception as e:
+                logging.error("İşlem içinde sorgu çalıştırılırken hata (%s): %s", tag, e)
+                raise
+
+        try:
+            # connection() bloğu hatasız biterse işlemi onaylar, hata olursa geri alır
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    with self.query_stats.measure(tag, query) as timer:
+                        await cur.execute(query, params)
+                        if cur.description is not None:
+                            result = await cur.fetchall()
+                            timer.rows = len(result)
+                        else:
+                            result = None
+            return self._shape(result, mode, default)
+        except Exception as e:
+            logging.error("Sorgu çalıştırılırken hata (%s): %s", tag, e)
+            raise
+
+    @staticmethod
+    def _shape(result, mode, default):
+        if mode == 'one':
+            return result[0] if result else None
+        if mode == 'value':
+            return result[0][0] if result else default
+        if mode == 'none':
+            return None
+        return result
+
+    # Paylaşılan sorgu metotlarının kullandığı yardımcılar; DatabaseManager'daki
+    # karşılıklarıyla aynı imzaya sahiptir ama coroutine döndürür. Etiket,
+    # çağıran sorgu metodu hala yığında iken burada belirlenir.
+
+    def _fetch_all(self, query, params=None, tx=None, name=None):
+        return self._run(caller_tag(_ASYNC_INTERNAL_METHODS), query, params, tx)
+
+    def _fetch_one(self, query, params=None, tx=None, name=None):
+        return self._run(caller_tag(_ASYNC_INTERNAL_METHODS), query, params, tx, mode='one')
+
+    def _fetch_value(self, query, params=None, default=None, tx=None, name=None):
+        return self._run(caller_tag(_ASYNC_INTERNAL_METHODS), query, params, tx,
+                         mode='value', default=default)
+
+    def _execute(self, query, params=None, tx=None, name=None):
+        return self._run(caller_tag(_ASYNC_INTERNAL_METHODS), query, params, tx, mode='none')
+
+    def _fetch_page(self, query, params, page_size, kind, time_index, id_index):
+        rows = self._run(caller_tag(_ASYNC_INTERNAL_METHODS), query, params, None)
+        return self._page(rows, page_size, kind, time_index, id_index)
+
+    async def _page(self, rows, page_size, kind, time_index, id_index):
+        return _make_page(await rows, page_size, kind, time_index, id_index)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Birden fazla komutu tek bağlantı ve tek işlemde çalıştır"""
+        async with self._pool.connection() as conn:
+            tx = AsyncTransaction(conn)
+            try:
+                yield tx
+            finally:
+                await tx.close()
+
+    def iter_query(self, query, params=None, chunk_size=None, itersize=None):
+        """Sorgu sonucunu sunucu taraflı imleçle parça parça getiren async üreteç"""
+        if itersize is None:
+            itersize = chunk_size or QUERY_CONFIG['itersize']
+        tag = caller_tag(_ASYNC_INTERNAL_METHODS)
+        return self._iter_query(tag, query, params, chunk_size, itersize)
+
+    async def _iter_query(self, tag, query, params, chunk_size, itersize):
+        async with self._pool.connection() as conn:
+            async with conn.cursor(name="iter_%d" % next(self._cursor_ids)) as cur:
+                cur.itersize = itersize
+                with self.query_stats.measure(tag, query) as timer:
+                    await cur.execute(query, params)
+                    if chunk_size:
+                        while True:
+                            rows = await cur.fetchmany(chunk_size)
+                            if not rows:
+                                break
+                            timer.rows += len(rows)
+                            yield rows
+                    else:
+                        async for row in cur:
+                            timer.rows += 1
+                            yield row
+
+    def iter_patient_measurements(self, patient_id, start_date=None, end_date=None, chunk_size=1000):
+        """Hastanın kan şekeri ölçümlerini parça parça getir"""
+        query, params = self._patient_measurements_query(patient_id, start_date, end_date)
+        return self.iter_query(query, params, chunk_size=chunk_size)
+
+    def invalidate_user(self, user_id=None, tc=None):
+        """Async sürümde kullanıcı önbelleği yok; paylaşılan metotlar için boş işlem"""
+
+    def get_diet_types(self):
+        """Diyet türlerini getir"""
+        return self._load_reference_table('diet_types')
+
+    def get_exercise_types(self):
+        """Egzersiz türlerini getir"""
+        return self._load_reference_table('exercise_types')
+
+    async def get_profile_image(self, user_id):
+        """Kullanıcının profil resmini getir"""
+        row = await self._fetch_one("""
+            SELECT profile_image, profile_image_type
+            FROM users
+            WHERE user_id = %s
+        """, (user_id,))
+        if row and row[0] is not None:
+            return row[0], row[1]
+        return None, None
+
+    async def get_doctor_dashboard_snapshot(self, doctor_id, recent_limit=10):
+        """Doktor panosunun tüm verilerini tek sorguyla getir"""
+        row = await self._fetch_one(self._doctor_dashboard_query(), (doctor_id, recent_limit, recent_limit))
+        return DatabaseManager._doctor_dashboard_from_row(row)
+
+    async def get_patient_summary(self, patient_id):
+        """Hastanın özet bilgilerini getir"""
+        return (await self.get_patient_summaries([patient_id]))[patient_id]
+
+    async def get_patient_summaries(self, patient_ids):
+        """Birden fazla hastanın özetini tek sorguda getir"""
+        patient_ids = list(dict.fromkeys(patient_ids))
+        if not patient_ids:
+            return {}
+        rows = await self._fetch_all(self._patient_summaries_query(), (patient_ids,))
+        return DatabaseManager._patient_summaries_from_rows(rows)
+
+    async def gather_limited(self, coros, limit=None):
+        """Coroutine'leri en fazla `limit` tanesi aynı anda çalışacak şekilde bekle"""
+        semaphore = asyncio.Semaphore(limit or self._pool.max_size)
+
+        async def run(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+# Sorgu metotları DatabaseManager'dan olduğu gibi alınır; _fetch_* yardımcıları
+# burada coroutine döndürdüğü için metotlar da await edilebilir hale gelir.
+for _name in SHARED_QUERY_METHODS:
+    setattr(AsyncDatabaseManager, _name, getattr(DatabaseManager, _name))
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""glycemic_analytics için vektörel ve düz Python hesaplamaların karşılaştırması.
+
+--days gün boyunca 5 dakikada bir ölçüm içeren yapay bir CGM serisi üretir,
+her metriği glycemic_analytics ile ve aşağıdaki düz Python referans
+uygulamalarıyla hesaplar. Sonuçların aynı olduğu doğrulanır, süreler ve
+hızlanma oranı yazdırılır. Veritabanı gerekmez.
+
+Kullanım:
+    python benchmarks/bench_analytics.py --days 1825 --repeat 5
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glycemic_analytics as ga  # noqa: E402
+
+
+def synthetic_cgm(days, seed=42):
+    """Günlük döngü, öğün sonrası yükselmeler ve gürültü içeren 5 dakikalık seri"""
+    rng = np.random.default_rng(seed)
+    count = days * 288
+    times = np.arange(count, dtype=np.int64) * 300 + 1_600_000_000
+    hour = (times // 3600 % 24) + (times % 3600) / 3600.0
+    meals = sum(60 * np.exp(-((hour - meal) % 24) / 1.5) * (((hour - meal) % 24) < 4)
+                for meal in (8, 13, 19))
+    drift = np.cumsum(rng.normal(0, 2, count))
+    drift -= np.convolve(drift, np.ones(288) / 288, mode='same')
+    levels = 120 + 25 * np.sin(2 * np.pi * hour / 24) + meals + drift + rng.normal(0, 6, count)
+    return times, np.round(np.clip(levels, 40, 400), 1)
+
+
+# Düz Python referans uygulamaları
+
+def naive_range_fractions(levels):
+    total = len(levels)
+    very_low = low = in_range = high = very_high = 0
+    for level in levels:
+        if level < ga.VERY_LOW:
+            very_low += 1
+        elif level < ga.LOW:
+            low += 1
+        elif level <= ga.HIGH:
+            in_range += 1
+        elif level <= ga.VERY_HIGH:
+            high += 1
+        else:
+            very_high += 1
+    return [very_low / total, low / total, in_range / total, high / total, very_high / total]
+
+
+def naive_mage(levels, sd):
+    series = [levels[0]]
+    for level in levels[1:]:
+        if level != series[-1]:
+            series.append(level)
+    extremes = [series[0]]
+    for i in range(1, len(series) - 1):
+        if (series[i] - series[i - 1]) * (series[i + 1] - series[i]) < 0:
+            extremes.append(series[i])
+    extremes.append(series[-1])
+    amplitudes = [b - a for a, b in zip(extremes, extremes[1:]) if abs(b - a) > sd]
+    if not amplitudes:
+        return 0.0
+    rising = amplitudes[0] > 0
+    selected = [abs(a) for a in amplitudes if (a > 0) == rising]
+    return sum(selected) / len(selected)
+
+
+def naive_risk(levels):
+    lbgi = hbgi = 0.0
+    for level in levels:
+        f = 1.509 * (math.log(max(level, 1.0)) ** 1.084 - 5.381)
+        risk = 10 * f * f
+        if f < 0:
+            lbgi += risk
+        elif f > 0:
+            hbgi += risk
+    return lbgi / len(levels), hbgi / len(levels)
+
+
+def naive_hourly(times, levels):
+    groups = [[] for _ in range(24)]
+    for t, level in zip(times, levels):
+        groups[t // 3600 % 24].append(level)
+    means = [sum(g) / len(g) if g else float('nan') for g in groups]
+    medians = [statistics.median(g) if g else float('nan') for g in groups]
+    return means, medians
+
+
+def naive_summary(times, levels):
+    mean = sum(levels) / len(levels)
+    sd = statistics.stdev(levels)
+    return {
+        'mean': mean,
+        'cv': sd / mean * 100,
+        'gmi': 3.31 + 0.02392 * mean,
+        'ranges': naive_range_fractions(levels),
+        'mage': naive_mage(levels, sd),
+        'risk': naive_risk(levels),
+        'hourly': naive_hourly(times, levels),
+    }
+
+
+def vectorized_summary(times, levels):
+    summary = ga.summarize(levels)
+    profile = ga.hourly_profile(times, levels, quantiles=(50,))
+    return summary, profile
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    times, levels = synthetic_cgm(args.days)
+    times_list, levels_list = times.tolist(), levels.tolist()
+    print("%d gün, %d ölçüm" % (args.days, levels.size))
+
+    naive_ms, naive = best_of(lambda: naive_summary(times_list, levels_list), max(1, args.repeat // 2))
+    fast_ms, (summary, profile) = best_of(lambda: vectorized_summary(times, levels), args.repeat)
+
+    checks = [
+        ('ortalama', naive['mean'], summary.mean),
+        ('CV', naive['cv'], summary.cv),
+        ('GMI', naive['gmi'], summary.gmi),
+        ('TIR', naive['ranges'][2], summary.tir),
+        ('TBR', naive['ranges'][0] + naive['ranges'][1], summary.tbr),
+        ('TAR', naive['ranges'][3] + naive['ranges'][4], summary.tar),
+        ('MAGE', naive['mage'], summary.mage),
+        ('LBGI', naive['risk'][0], summary.lbgi),
+        ('HBGI', naive['risk'][1], summary.hbgi),
+    ]
+    for name, expected, actual in checks:
+        assert math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9), (name, expected, actual)
+        print("%-10s %12.4f" % (name, actual))
+    assert np.allclose(naive['hourly'][0], profile.mean, equal_nan=True)
+    assert np.allclose(naive['hourly'][1], profile.percentiles[0], equal_nan=True)
+
+    print("düz Python: %10.2f ms" % naive_ms)
+    print("NumPy:      %10.2f ms" % fast_ms)
+    print("hızlanma:   %10.1fx" % (naive_ms / fast_ms))
+
+
+if __name__ == '__main__':
+    main()
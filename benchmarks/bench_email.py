@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""EmailManager'ın yerel bir SMTP sunucusuna karşı uçtan uca ölçümü.
+
+Aynı süreçte EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP ve QUIT komutlarını
+anlayan basit bir SMTP sunucusu başlatılır; her yanıt --latency ms
+geciktirilerek ağ gidiş-dönüşü taklit edilir. Önce her ileti için ayrı
+bağlantı açan (bağlan, kimlik doğrula, gönder, çık) eski yaklaşım
+--naive-sample ileti üzerinde ölçülüp oranlanır, ardından --messages ileti
+EmailManager ile gönderilir. Sunucunun aldığı ileti sayısı, reddedilen
+alıcının başarısız sayılması ve aynı alıcıya giden iletilerin
+birleştirilmesi de doğrulanır.
+
+Kullanım:
+    python benchmarks/bench_email.py --messages 5000 --latency 2
+"""
+
+import argparse
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_manager import EmailManager, OutgoingEmail  # noqa: E402
+
+REJECTED = 'reddedilen@example.com'
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Tek bir SMTP oturumunu yürütür; iletiler yalnızca sayılır"""
+
+    def reply(self, text):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(text.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.count('sessions')
+        self.reply('220 diyabet-sink ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-diyabet-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 diyabet-sink')
+            elif verb == 'AUTH':
+                self.server.count('logins')
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'RCPT':
+                if REJECTED in command.lower():
+                    self.reply('550 5.1.1 User unknown')
+                else:
+                    self.reply('250 OK')
+            elif verb in ('MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b'.\r\n':
+                        break
+                self.server.count('messages')
+                self.reply('250 OK queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Yerel deneme SMTP sunucusu; oturum, giriş ve ileti sayılarını tutar"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency_ms=0.0):
+        super().__init__(('127.0.0.1', 0), _SinkHandler)
+        self.latency = latency_ms / 1000.0
+        self.counts = {'sessions': 0, 'logins': 0, 'messages': 0}
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.counts, 0)
+
+
+def naive_send(port, emails):
+    """Her ileti için yeni bağlantı açarak gönder (karşılaştırma için eski yaklaşım)"""
+    for email in emails:
+        smtp = smtplib.SMTP('127.0.0.1', port)
+        smtp.login('bench', 'bench')
+        message = EmailMessage()
+        message['From'] = 'bench@localhost'
+        message['To'] = email.to
+        message['Subject'] = email.subject
+        message.set_content(email.body)
+        smtp.send_message(message)
+        smtp.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--naive-sample', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=2.0, help="yanıt başına gecikme (ms)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.latency)
+    port = sink.server_address[1]
+    emails = [
+        OutgoingEmail(f"hasta{i}@example.com", "Kan Şekeri Ölçüm Hatırlatması", f"Ölçüm hatırlatması {i}")
+        for i in range(args.messages)
+    ]
+
+    start = time.perf_counter()
+    naive_send(port, emails[:args.naive_sample])
+    naive_seconds = time.perf_counter() - start
+    naive_sessions = sink.counts['sessions']
+    scale = len(emails) / max(1, args.naive_sample)
+
+    sink.reset()
+    mailer = EmailManager({
+        'host': '127.0.0.1', 'port': port, 'username': 'bench', 'password': 'bench',
+        'starttls': False, 'ssl': False, 'sender': 'bench@localhost',
+        'workers': args.workers, 'pool_size': args.pool_size, 'batch_size': args.batch_size,
+    })
+    try:
+        start = time.perf_counter()
+        sent, failed = mailer.send_many(emails)
+        pooled_seconds = time.perf_counter() - start
+        stats = mailer.stats()
+        received = sink.counts['messages']
+
+        # Uçtan uca doğrulama: reddedilen alıcı ve aynı alıcıya giden iletiler
+        sink.reset()
+        rejected = mailer.send(REJECTED, "Deneme", "Reddedilmeli")
+        digest = [mailer.send('ayni@example.com', "Bildirim", f"İleti {i}") for i in range(3)]
+        assert rejected.exception() is not None, "reddedilen alıcı başarısız sayılmadı"
+        assert all(f.exception() is None for f in digest), "birleştirilen iletiler gönderilemedi"
+    finally:
+        mailer.close()
+        sink.shutdown()
+
+    print("%-26s %12s %14s %12s" % ('yöntem', 'süre (sn)', 'ileti/sn', 'bağlantı'))
+    print("%-26s %12.2f %14.1f %12d" % (
+        'ileti başına bağlantı', naive_seconds * scale, args.naive_sample / naive_seconds,
+        int(naive_sessions * scale)))
+    print("%-26s %12.2f %14.1f %12d" % (
+        'havuz + kuyruk', pooled_seconds, sent / pooled_seconds, stats['connections_opened']))
+    print("hızlanma: %.1fx" % (naive_seconds * scale / pooled_seconds))
+    print("gönderilen %d, başarısız %d, sunucunun aldığı %d, parti %d" % (
+        sent, failed, received, stats['batches']))
+    print("gecikme (kuyruk dahil) p50 %.1f ms, p95 %.1f ms, p99 %.1f ms" % (
+        stats['latency_p50_ms'], stats['latency_p95_ms'], stats['latency_p99_ms']))
+    if received != sent or failed:
+        sys.exit("HATA: sunucunun aldığı ileti sayısı gönderilenle eşleşmiyor")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Hazır (PREPARE) sorgu katmanı için mikro ölçüm.
+
+Test veritabanına bir doktor, bir hasta ve --measurements kadar ölçüm ekler,
+sık çalışan sorguları hazırlamadan ve hazırlayarak --repeat kez çalıştırır.
+Her sorgu için çağrı başına ortalama süre ile EXPLAIN ANALYZE'ın bildirdiği
+planlama süresi karşılaştırılır. Eklenen veriler sonunda silinir.
+
+Kullanım:
+    python benchmarks/bench_prepared_statements.py --measurements 20000 --repeat 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import DatabaseManager, _to_positional  # noqa: E402
+
+
+def seed(db, measurement_count):
+    """Ölçüm için bir doktor-hasta çifti ve ölçümler oluştur"""
+    suffix = str(random.randint(10 ** 8, 10 ** 9 - 1))
+    doctor_id = db.execute_query("""
+        INSERT INTO users (tc, password, name, surname, user_type)
+        VALUES (%s, 'bench', 'Bench', 'Doktor', 'doctor') RETURNING user_id
+    """, ('91' + suffix,))[0][0]
+    patient_id = db.execute_query("""
+        INSERT INTO users (tc, password, name, surname, user_type)
+        VALUES (%s, 'bench', 'Bench', 'Hasta', 'patient') RETURNING user_id
+    """, ('92' + suffix,))[0][0]
+    db.execute_query("""
+        INSERT INTO doctor_patient (doctor_id, patient_id, status)
+        VALUES (%s, %s, 'aktif')
+    """, (doctor_id, patient_id))
+
+    now = datetime.now()
+    db.save_sugar_measurements_bulk(
+        (patient_id, random.randint(50, 300), now - timedelta(minutes=5 * i))
+        for i in range(measurement_count)
+    )
+    return doctor_id, patient_id, '92' + suffix
+
+
+def cleanup(db, doctor_id, patient_id):
+    db.execute_query("DELETE FROM sugar_measurements WHERE patient_id = %s", (patient_id,))
+    db.execute_query("DELETE FROM doctor_patient WHERE doctor_id = %s", (doctor_id,))
+    db.execute_query("DELETE FROM users WHERE user_id IN (%s, %s)", (doctor_id, patient_id))
+
+
+def time_calls(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def planning_time(db, query, params, prepared):
+    """EXPLAIN ANALYZE çıktısından planlama süresini (ms) oku"""
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        if prepared:
+            cur.execute("PREPARE bench_stmt AS %s" % _to_positional(query))
+            # İlk beş çalıştırmadan sonra PostgreSQL genel (generic) plana geçebilir
+            for _ in range(6):
+                cur.execute("EXPLAIN (ANALYZE, SUMMARY) EXECUTE bench_stmt (%s)"
+                            % ", ".join(["%s"] * len(params)), params)
+        else:
+            cur.execute("EXPLAIN (ANALYZE, SUMMARY) " + query, params)
+        plan = [row[0] for row in cur.fetchall()]
+        if prepared:
+            cur.execute("DEALLOCATE bench_stmt")
+        conn.rollback()
+        cur.close()
+    finally:
+        db.return_connection(conn)
+    for line in plan:
+        if line.startswith('Planning Time:'):
+            return float(line.split(':')[1].split()[0])
+    return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--measurements', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    db = DatabaseManager.get_instance()
+    doctor_id, patient_id, patient_tc = seed(db, args.measurements)
+    today = datetime.now().date()
+
+    cases = [
+        ('get_user_by_tc', lambda: db.get_user_by_tc(patient_tc),
+         "SELECT * FROM users WHERE tc = %s", (patient_tc,)),
+        ('get_daily_measurements', lambda: db.get_daily_measurements(patient_id, today),
+         None, None),
+        ('get_doctor_patients_count', lambda: db.get_doctor_patients_count(doctor_id),
+         None, None),
+        ('get_daily_measurements_count', lambda: db.get_daily_measurements_count(doctor_id),
+         None, None),
+        ('get_critical_patients_count', lambda: db.get_critical_patients_count(doctor_id),
+         """
+            SELECT COUNT(DISTINCT dp.patient_id)
+            FROM doctor_patient dp
+            JOIN sugar_measurements sm ON dp.patient_id = sm.patient_id
+            WHERE dp.doctor_id = %s
+            AND dp.status = 'aktif'
+            AND sm.measurement_time >= CURRENT_DATE
+            AND (sm.sugar_level < 70 OR sm.sugar_level > 180)
+         """, (doctor_id,)),
+        ('get_doctor_recent_measurements', lambda: db.get_doctor_recent_measurements(doctor_id),
+         None, None),
+    ]
+
+    try:
+        print("%-32s %12s %12s %10s %14s %14s" % (
+            'sorgu', 'düz (ms)', 'hazır (ms)', 'kazanç', 'plan düz (ms)', 'plan hazır (ms)'))
+        for name, call, query, params in cases:
+            db.prepare_statements = False
+            call()
+            plain = time_calls(call, args.repeat)
+
+            db.prepare_statements = True
+            call()
+            prepared = time_calls(call, args.repeat)
+
+            plan_plain = plan_prepared = float('nan')
+            if query is not None:
+                plan_plain = planning_time(db, query, params, prepared=False)
+                plan_prepared = planning_time(db, query, params, prepared=True)
+
+            print("%-32s %12.3f %12.3f %9.1f%% %14.3f %14.3f" % (
+                name, plain, prepared, (plain - prepared) / plain * 100,
+                plan_plain, plan_prepared))
+    finally:
+        db.prepare_statements = False
+        cleanup(db, doctor_id, patient_id)
+        db.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Ölçüm hatırlatmalarının küme tabanlı ve hasta başına döngüyle oluşturulmasının karşılaştırması.
+
+Test veritabanına bir doktor ve ona bağlı --patients kadar yapay hasta ekler;
+hastaların --measured-ratio kadarına pencere içinde bir ölçüm girilir.
+Hasta başına döngü (ölçüm var mı, hatırlatılmış mı, uyarı ekle) --naive-sample
+hasta üzerinde ölçülüp tüm hastalara oranlanır; ardından
+DatabaseManager.send_measurement_reminders tek seferde çalıştırılır. Süreler
+ve veritabanına gidiş-dönüş (sorgu) sayıları yazdırılır. Eklenen veriler
+sonunda silinir.
+
+Hatırlatma sorgusu veritabanındaki tüm aktif hastalar için çalıştığından
+yalnızca test veritabanında kullanın.
+
+Kullanım:
+    python benchmarks/bench_reminders.py --patients 100000 --naive-sample 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import DatabaseManager, MEASUREMENT_REMINDER_MESSAGE  # noqa: E402
+
+
+def seed(db, patient_count, measured_ratio, since):
+    """Bir doktor, ona bağlı hastalar ve hastaların bir kısmı için pencere içi ölçümler oluştur"""
+    prefix = str(random.randint(100, 999))
+    with db.transaction() as tx:
+        doctor_id = tx.execute("""
+            INSERT INTO users (tc, password, name, surname, user_type)
+            VALUES (%s, 'bench', 'Bench', 'Doktor', 'doctor') RETURNING user_id
+        """, ('8' + prefix + '0000000',))[0][0]
+        tx.execute("""
+            INSERT INTO users (tc, password, name, surname, user_type, email)
+            SELECT '9' || %s || lpad(i::text, 7, '0'), 'bench', 'Bench', 'Hasta ' || i, 'patient',
+                   'hasta' || i || '@example.com'
+            FROM generate_series(1, %s) AS i
+        """, (prefix, patient_count))
+        tx.execute("""
+            INSERT INTO doctor_patient (doctor_id, patient_id, status)
+            SELECT %s, user_id, 'aktif'
+            FROM users
+            WHERE tc LIKE %s
+        """, (doctor_id, '9' + prefix + '%'))
+        tx.execute("""
+            INSERT INTO sugar_measurements (patient_id, sugar_level, measurement_time)
+            SELECT user_id, 80 + random() * 120, %s + random() * (NOW() - %s)
+            FROM users
+            WHERE tc LIKE %s
+            AND random() < %s
+        """, (since, since, '9' + prefix + '%', measured_ratio))
+        tx.execute("ANALYZE users")
+        tx.execute("ANALYZE doctor_patient")
+    return doctor_id, prefix
+
+
+def cleanup(db, doctor_id, prefix):
+    # Hastaların ölçüm, uyarı ve doktor bağlantıları ON DELETE CASCADE ile silinir
+    db.execute_query("DELETE FROM users WHERE tc LIKE %s OR user_id = %s", ('9' + prefix + '%', doctor_id))
+
+
+def naive_reminders(db, patient_ids, since):
+    """Hasta başına üç sorguyla hatırlatma oluştur (karşılaştırma için eski yaklaşım)"""
+    created = 0
+    with db.transaction() as tx:
+        for patient_id in patient_ids:
+            measured = tx.execute("""
+                SELECT 1 FROM sugar_measurements
+                WHERE patient_id = %s AND measurement_time >= %s
+                LIMIT 1
+            """, (patient_id, since))
+            if measured:
+                continue
+            reminded = tx.execute("""
+                SELECT 1 FROM alerts
+                WHERE patient_id = %s AND alert_time >= %s AND alert_type = 'şeker_ölçümü'
+                LIMIT 1
+            """, (patient_id, since))
+            if reminded:
+                continue
+            tx.execute("""
+                INSERT INTO alerts (patient_id, alert_type, message, priority)
+                VALUES (%s, 'şeker_ölçümü', %s, 'normal')
+            """, (patient_id, MEASUREMENT_REMINDER_MESSAGE))
+            created += 1
+        # Karşılaştırılan küme tabanlı çalıştırma aynı hastaları bulabilsin diye geri alınır
+        tx.conn.rollback()
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--measured-ratio', type=float, default=0.6)
+    parser.add_argument('--naive-sample', type=int, default=2000)
+    args = parser.parse_args()
+
+    db = DatabaseManager.get_instance()
+    since = datetime.now() - timedelta(hours=5)
+
+    start = time.perf_counter()
+    doctor_id, prefix = seed(db, args.patients, args.measured_ratio, since)
+    print("%d hasta hazırlandı (%.1f sn)" % (args.patients, time.perf_counter() - start))
+
+    try:
+        patient_ids = [row[0] for row in db.execute_query(
+            "SELECT patient_id FROM doctor_patient WHERE doctor_id = %s", (doctor_id,))]
+        sample = patient_ids[:args.naive_sample]
+
+        start = time.perf_counter()
+        naive_created = naive_reminders(db, sample, since)
+        naive_seconds = time.perf_counter() - start
+        scale = len(patient_ids) / max(1, len(sample))
+        naive_round_trips = len(sample) * 2 + naive_created
+
+        db.reset_query_stats()
+        start = time.perf_counter()
+        created = db.send_measurement_reminders(since=since)
+        set_seconds = time.perf_counter() - start
+        # Kilit ve onay komutları sorgu istatistiğine girmez
+        set_round_trips = sum(s['count'] for s in db.get_query_stats().values()) + 2
+
+        print("%-24s %14s %16s %14s" % ('yöntem', 'süre (sn)', 'gidiş-dönüş', 'hatırlatma'))
+        print("%-24s %14.2f %16d %14d" % (
+            'hasta başına (tahmini)', naive_seconds * scale, int(naive_round_trips * scale),
+            int(naive_created * scale)))
+        print("%-24s %14.2f %16d %14d" % ('küme tabanlı', set_seconds, set_round_trips, created))
+        print("hızlanma: %.1fx" % (naive_seconds * scale / set_seconds))
+    finally:
+        cleanup(db, doctor_id, prefix)
+        db.close_all()
+
+
+if __name__ == '__main__':
+    main()
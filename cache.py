@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LookupTable:
+    """Bir referans tablosunun (id, name, description) satırları ve indeksleri"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self._id_by_name = {row[1]: row[0] for row in self.rows}
+        self._name_by_id = {row[0]: row[1] for row in self.rows}
+
+    def id_for(self, name):
+        return self._id_by_name.get(name)
+
+    def name_for(self, type_id):
+        return self._name_by_id.get(type_id)
+
+
+class ReferenceDataCache:
+    """diet_types ve exercise_types gibi nadiren değişen tabloların önbelleği.
+
+    Tablolar ilk istendiğinde bir kez yüklenir. En fazla `check_interval`
+    saniyede bir `version_loader` ile tabloların sürüm özeti okunur; özet
+    değiştiyse tablolar yeniden yüklenir. invalidate() ile hemen
+    boşaltılabilir.
+    """
+
+    def __init__(self, loader, version_loader, check_interval=300.0):
+        self._loader = loader
+        self._version_loader = version_loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, table, force_check=False):
+        """Tablonun güncel LookupTable nesnesini döndür"""
+        self._check_version(force_check)
+        with self._lock:
+            lookup = self._tables.get(table)
+        if lookup is None:
+            lookup = LookupTable(self._loader(table))
+            with self._lock:
+                self._tables[table] = lookup
+        return lookup
+
+    def _check_version(self, force):
+        now = time.monotonic()
+        with self._lock:
+            due = force or now - self._checked_at >= self.check_interval
+            if not due:
+                return
+            self._checked_at = now
+
+        version = self._version_loader()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._tables = {}
+
+    def invalidate(self, table=None):
+        """Önbelleği (ya da yalnızca bir tabloyu) boşalt"""
+        with self._lock:
+            if table is None:
+                self._tables = {}
+                self._version = None
+                self._checked_at = 0.0
+            else:
+                self._tables.pop(table, None)
+
+
+class TTLCache:
+    """Süre sınırlı (TTL) ve boyut sınırlı (LRU) thread-safe önbellek"""
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # anahtar -> (değer, son geçerlilik zamanı)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[0] if item is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
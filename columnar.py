@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""PostgreSQL ikili (binary) COPY çıktısını NumPy dizilerine çeviren yardımcılar.
+
+COPY (SELECT ...) TO STDOUT WITH (FORMAT binary) çıktısında sabit uzunluklu
+ve NULL içermeyen sütunlarda her satır aynı bayt uzunluğundadır:
+
+    int16 sütun sayısı, her sütun için int32 uzunluk + büyük endian değer
+
+Bu düzen bir NumPy yapılı tipiyle (structured dtype) tarif edilip tampon
+doğrudan dizi olarak okunur; satır başına Python nesnesi oluşmaz.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_TRAILER = b'\xff\xff'
+
+# PostgreSQL tipi -> ikili COPY'deki büyük endian NumPy tipi
+COLUMN_TYPES = {
+    'int2': '>i2',
+    'int4': '>i4',
+    'int8': '>i8',
+    'float4': '>f4',
+    'float8': '>f8',
+}
+
+MeasurementArrays = namedtuple('MeasurementArrays', 'times levels')
+DoctorMeasurementArrays = namedtuple('DoctorMeasurementArrays', 'patient_ids times levels')
+DailyRollupArrays = namedtuple('DailyRollupArrays', [
+    'patient_ids', 'days', 'counts', 'means', 'mins', 'maxs', 'low_counts', 'high_counts'
+])
+
+
+def row_dtype(columns):
+    """[(ad, pg_tipi), ...] sütunları için ikili COPY satırının yapılı tipi"""
+    fields = [('_fields', '>i2')]
+    for name, pg_type in columns:
+        if pg_type not in COLUMN_TYPES:
+            raise ValueError(f"Desteklenmeyen sütun tipi: {pg_type}")
+        fields.append(('_len_' + name, '>i4'))
+        fields.append((name, COLUMN_TYPES[pg_type]))
+    return np.dtype(fields)
+
+
+def parse_binary_copy(data, columns):
+    """İkili COPY verisini {sütun adı: yerel bayt sıralı dizi} sözlüğüne çevir"""
+    data = memoryview(data)
+    if bytes(data[:len(COPY_SIGNATURE)]) != COPY_SIGNATURE:
+        raise ValueError("Geçersiz ikili COPY verisi")
+    if bytes(data[-2:]) != _TRAILER:
+        raise ValueError("İkili COPY verisi eksik")
+
+    # İmza, 4 baytlık bayraklar ve 4 baytlık başlık uzantısı uzunluğu
+    extension_length = int.from_bytes(data[15:19], 'big')
+    offset = 19 + extension_length
+    body_length = len(data) - offset - len(_TRAILER)
+
+    dtype = row_dtype(columns)
+    if body_length % dtype.itemsize:
+        raise ValueError("COPY satırları sabit uzunlukta değil (NULL ya da beklenmeyen tipte sütun)")
+    rows = np.frombuffer(data, dtype=dtype, count=body_length // dtype.itemsize, offset=offset)
+
+    if rows.size and not (rows['_fields'] == len(columns)).all():
+        raise ValueError("COPY satırlarındaki sütun sayısı beklenenden farklı")
+    arrays = {}
+    for name, pg_type in columns:
+        width = np.dtype(COLUMN_TYPES[pg_type]).itemsize
+        if rows.size and not (rows['_len_' + name] == width).all():
+            raise ValueError(f"{name} sütununda NULL ya da beklenmeyen uzunlukta değer var")
+        arrays[name] = rows[name].astype(COLUMN_TYPES[pg_type].replace('>', '='))
+    return arrays
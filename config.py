@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+
+def _flag(value):
+    return value.strip().lower() in ('1', 'true', 'yes', 'on', 'evet')
+
+
+def _env(name, default, cast=str):
+    """Ortam değişkenini oku, yoksa varsayılan değeri döndür"""
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+
+# Veritabanı bağlantı ayarları
+DB_CONFIG = {
+    'dbname': _env('DIYABET_DB_NAME', 'diyabet'),
+    'user': _env('DIYABET_DB_USER', 'postgres'),
+    'password': _env('DIYABET_DB_PASSWORD', 'sumeyye'),
+    'host': _env('DIYABET_DB_HOST', '127.0.0.1'),
+    'port': _env('DIYABET_DB_PORT', '5432'),
+    'client_encoding': 'UTF8'
+}
+
+# Bağlantı havuzu ayarları
+POOL_CONFIG = {
+    'minconn': _env('DIYABET_DB_POOL_MIN', 1, int),
+    'maxconn': _env('DIYABET_DB_POOL_MAX', 10, int),
+    # Boşta bağlantı yoksa en fazla kaç saniye beklenecek (0: hiç bekleme)
+    'timeout': _env('DIYABET_DB_POOL_TIMEOUT', 30.0, float),
+    # Bu süreden uzun boşta kalan bağlantılar verilmeden önce test edilir
+    'validate_after': _env('DIYABET_DB_POOL_VALIDATE_AFTER', 30.0, float),
+}
+
+# Sorgu ayarları
+QUERY_CONFIG = {
+    # Sunucu taraflı imleçlerde her seferde çekilecek satır sayısı
+    'itersize': _env('DIYABET_DB_ITERSIZE', 2000, int),
+    # Toplu eklemelerde tek INSERT komutuna konacak satır sayısı
+    'bulk_page_size': _env('DIYABET_DB_BULK_PAGE_SIZE', 1000, int),
+    # Sık çalışan sorguları bağlantı başına bir kez PREPARE et
+    'prepare_statements': _env('DIYABET_DB_PREPARE', False, _flag),
+    # Bu süreyi (ms) aşan sorgular yavaş sorgu günlüğüne yazılır
+    'slow_query_ms': _env('DIYABET_DB_SLOW_QUERY_MS', 200.0, float),
+    'slow_query_log': _env('DIYABET_DB_SLOW_QUERY_LOG', 'slow_queries.log'),
+    # Diyet/egzersiz türü önbelleğinin sürüm kontrolü aralığı (saniye)
+    'reference_check_interval': _env('DIYABET_DB_REFERENCE_CHECK_INTERVAL', 300.0, float),
+    # Kullanıcı kaydı önbelleği: en fazla kaç kayıt ve kaç saniye tutulacak
+    'user_cache_size': _env('DIYABET_DB_USER_CACHE_SIZE', 1024, int),
+    'user_cache_ttl': _env('DIYABET_DB_USER_CACHE_TTL', 60.0, float),
+}
+
+# Rapor ayarları
+REPORT_CONFIG = {
+    # Hasta metriklerini hesaplayan süreç sayısı (0: işlemci sayısı kadar)
+    'workers': _env('DIYABET_REPORT_WORKERS', 0, int),
+    # Bir sürece tek seferde gönderilecek hasta sayısı
+    'chunk_size': _env('DIYABET_REPORT_CHUNK_SIZE', 25, int),
+    # Bundan az hastalı raporlar süreç havuzu açılmadan hesaplanır
+    'parallel_threshold': _env('DIYABET_REPORT_PARALLEL_THRESHOLD', 50, int),
+    # Haftalık raporların teslime tek seferde aktarılacağı rapor sayısı
+    'delivery_chunk_size': _env('DIYABET_REPORT_DELIVERY_CHUNK_SIZE', 100, int),
+    # Sahiplenilen parça bu süre içinde teslim edilemezse yeniden denenir (saniye)
+    'delivery_lease_seconds': _env('DIYABET_REPORT_DELIVERY_LEASE', 900, int),
+    # Bundan eski haftaların teslim edilmemiş raporları artık gönderilmez (gün)
+    'delivery_max_age_days': _env('DIYABET_REPORT_DELIVERY_MAX_AGE', 28, int),
+    # Bu kadar denemede gönderilemeyen rapor 'başarısız' durumuna alınır
+    'delivery_max_attempts': _env('DIYABET_REPORT_DELIVERY_MAX_ATTEMPTS', 5, int),
+    # Yeniden denemeler arası bekleme: backoff_base * 2^(deneme-1), en fazla backoff_max (saniye)
+    'delivery_backoff_base': _env('DIYABET_REPORT_DELIVERY_BACKOFF_BASE', 300.0, float),
+    'delivery_backoff_max': _env('DIYABET_REPORT_DELIVERY_BACKOFF_MAX', 21600.0, float),
+}
+
+# Bölümleme (partition) ayarları
+PARTITION_CONFIG = {
+    # Şimdiden oluşturulacak gelecek ay bölümü sayısı
+    'months_ahead': _env('DIYABET_PARTITION_MONTHS_AHEAD', 3, int),
+    # Bundan eski uyarı bölümleri saklama politikasıyla kaldırılır (0: kapalı)
+    'alert_retention_months': _env('DIYABET_ALERT_RETENTION_MONTHS', 24, int),
+    # 'detach': bölüm arşiv tablosu olarak kalır, 'drop': bölüm silinir
+    'alert_retention_mode': _env('DIYABET_ALERT_RETENTION_MODE', 'detach'),
+}
+
+# Ölçüm hatırlatma ayarları
+REMINDER_CONFIG = {
+    # Hatırlatmaların gönderildiği saatler; her pencere bir önceki saatten başlar
+    'times': [t.strip() for t in _env('DIYABET_REMINDER_TIMES', '07:00,12:00,18:00').split(',') if t.strip()],
+    # Hatırlatmaların bildirime tek seferde aktarılacağı hasta sayısı
+    'batch_size': _env('DIYABET_REMINDER_BATCH_SIZE', 500, int),
+}
+
+# E-posta (SMTP) ayarları
+EMAIL_CONFIG = {
+    'host': _env('DIYABET_SMTP_HOST', 'localhost'),
+    'port': _env('DIYABET_SMTP_PORT', 25, int),
+    'username': _env('DIYABET_SMTP_USER', ''),
+    'password': _env('DIYABET_SMTP_PASSWORD', ''),
+    # STARTTLS ile şifrelemeye geç ya da baştan SSL ile bağlan (SMTPS)
+    'starttls': _env('DIYABET_SMTP_STARTTLS', False, _flag),
+    'ssl': _env('DIYABET_SMTP_SSL', False, _flag),
+    'timeout': _env('DIYABET_SMTP_TIMEOUT', 30.0, float),
+    'sender': _env('DIYABET_MAIL_FROM', 'diyabet-takip@localhost'),
+    # Açık tutulacak en fazla SMTP bağlantısı ve gönderimi yapan iş parçacığı sayısı
+    'pool_size': _env('DIYABET_SMTP_POOL_SIZE', 4, int),
+    'workers': _env('DIYABET_MAIL_WORKERS', 4, int),
+    # Gönderim kuyruğunun kapasitesi; dolunca yeni iletiler yer açılana kadar bekler
+    'queue_size': _env('DIYABET_MAIL_QUEUE_SIZE', 10000, int),
+    # Bir iş parçacığının tek bağlantı kullanımında gönderdiği en fazla ileti
+    'batch_size': _env('DIYABET_MAIL_BATCH_SIZE', 50, int),
+    # Bu kadar iletiden sonra bağlantı yenilenir (sunucu sınırları için; 0: sınırsız)
+    'max_messages_per_connection': _env('DIYABET_SMTP_MAX_MESSAGES', 1000, int),
+    # Bu süreden uzun boşta kalan bağlantı kullanılmadan önce NOOP ile denenir
+    'idle_check': _env('DIYABET_SMTP_IDLE_CHECK', 30.0, float),
+}
+
+# Bildirim giden kutusu (notification_outbox) teslim ayarları
+OUTBOX_CONFIG = {
+    # Teslim iş parçacığı sayısı; işçiler birbirini beklemeden farklı bildirimleri alır
+    'workers': _env('DIYABET_OUTBOX_WORKERS', 2, int),
+    # Bir işçinin tek seferde sahiplendiği bildirim sayısı
+    'batch_size': _env('DIYABET_OUTBOX_BATCH_SIZE', 100, int),
+    # Sahiplenilen bildirimin sonucu bu süre içinde yazılmazsa yeniden teslim edilir (saniye)
+    'lease_seconds': _env('DIYABET_OUTBOX_LEASE', 300, int),
+    # Bu kadar denemeden sonra bildirim kalıcı olarak başarısız sayılır
+    'max_attempts': _env('DIYABET_OUTBOX_MAX_ATTEMPTS', 8, int),
+    # Yeniden denemeler arası bekleme: backoff_base * 2^(deneme-1), en fazla backoff_max (saniye)
+    'backoff_base': _env('DIYABET_OUTBOX_BACKOFF_BASE', 30.0, float),
+    'backoff_max': _env('DIYABET_OUTBOX_BACKOFF_MAX', 3600.0, float),
+    # Kuyruk boşken yeni bildirim kontrol aralığı (saniye)
+    'poll_interval': _env('DIYABET_OUTBOX_POLL_INTERVAL', 5.0, float),
+    # Gönderilmiş bildirimlerin saklanma süresi (gün)
+    'retention_days': _env('DIYABET_OUTBOX_RETENTION_DAYS', 30, int),
+}
+
+# Bildirim zamanlayıcısı ayarları
+SCHEDULER_CONFIG = {
+    # İşleri çalıştıran iş parçacığı sayısı; uzun bir iş diğerlerini bekletmez
+    'workers': _env('DIYABET_SCHEDULER_WORKERS', 4, int),
+    # Son çalıştırma zamanları; kapalıyken kaçırılan işler açılışta bu dosyaya göre çalıştırılır
+    'state_file': _env('DIYABET_SCHEDULER_STATE', 'scheduler_state.json'),
+    # İş metriklerinin günlüğe yazılma aralığı (saniye)
+    'metrics_interval': _env('DIYABET_SCHEDULER_METRICS_INTERVAL', 3600, int),
+}
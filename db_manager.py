@@ -1,499 +1,2081 @@
-import psycopg2
-from psycopg2 import pool
-import logging
-from datetime import datetime
-
-class DatabaseManager:
-    _instance = None
-    _pool = None
-
-    @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = DatabaseManager()
-        return cls._instance
-
-    def __init__(self):
-        if DatabaseManager._instance is not None:
-            raise Exception("Bu sınıf bir Singleton'dır!")
-        else:
-            DatabaseManager._instance = self
-            self._setup_logging()
-            self._create_pool()
-
-    def _setup_logging(self):
-        logging.basicConfig(
-            filename='database.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-
-    def _create_pool(self):
-        try:
-            self._pool = psycopg2.pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
-                dbname="diyabet",
-                user="postgres",
-                password="sumeyye",
-                host="127.0.0.1",
-                port="5432",
-                client_encoding='UTF8'
-            )
-            logging.info("Veritabanı bağlantı havuzu oluşturuldu")
-        except Exception as e:
-            logging.error(f"Veritabanı bağlantı havuzu oluşturulurken hata: {str(e)}")
-            raise
-
-    def get_connection(self):
-        if self._pool:
-            return self._pool.getconn()
-        else:
-            raise Exception("Veritabanı bağlantı havuzu bulunamadı!")
-
-    def return_connection(self, conn):
-        if self._pool:
-            self._pool.putconn(conn)
-
-    def execute_query(self, query, params=None):
-        conn = None
-        cur = None
-        try:
-            conn = self.get_connection()
-            cur = conn.cursor()
-            
-            if params:
-                cur.execute(query, params)
-            else:
-                cur.execute(query)
-            
-            if query.strip().upper().startswith(('SELECT', 'RETURNING')):
-                result = cur.fetchall()
-            else:
-                result = None
-                
-            conn.commit()
-            return result
-            
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            logging.error(f"Sorgu çalıştırılırken hata: {str(e)}\nSorgu: {query}\nParametreler: {params}")
-            raise
-        finally:
-            if cur:
-                cur.close()
-            if conn:
-                self.return_connection(conn)
-
-    def close_all(self):
-        if self._pool:
-            self._pool.closeall()
-            logging.info("Tüm veritabanı bağlantıları kapatıldı")
-
-    def get_user_by_tc(self, tc):
-        query = "SELECT * FROM users WHERE tc = %s"
-        result = self.execute_query(query, (tc,))
-        return result[0] if result else None
-
-    def get_user_by_id(self, user_id):
-        """Kullanıcıyı ID ile getir"""
-        query = "SELECT * FROM users WHERE user_id = %s"
-        result = self.execute_query(query, (user_id,))
-        return result[0] if result else None
-
-    def get_doctor_patients(self, doctor_id):
-        """Doktorun hasta listesini getir"""
-        query = """
-            SELECT 
-                u.tc,
-                u.name,
-                u.surname,
-                u.birth_date,
-                u.gender,
-                u.email,
-                u.phone
-            FROM users u
-            JOIN doctor_patient dp ON u.user_id = dp.patient_id
-            WHERE dp.doctor_id = %s 
-            AND dp.status = 'aktif'
-            ORDER BY u.surname, u.name
-        """
-        return self.execute_query(query, (doctor_id,))
-
-    def get_patient_measurements(self, patient_id, start_date=None, end_date=None):
-        """Hastanın kan şekeri ölçümlerini getir"""
-        query = """
-            SELECT 
-                id,
-                sugar_level,
-                measurement_time,
-                notes
-            FROM sugar_measurements 
-            WHERE patient_id = %s
-        """
-        params = [patient_id]
-        
-        if start_date:
-            query += " AND measurement_time >= %s"
-            params.append(start_date)
-        if end_date:
-            query += " AND measurement_time <= %s"
-            params.append(end_date)
-            
-        query += " ORDER BY measurement_time DESC"
-        return self.execute_query(query, tuple(params))
-
-    def save_sugar_measurement(self, patient_id, sugar_level, measurement_time=None, notes=None):
-        """Kan şekeri ölçümünü kaydet"""
-        if measurement_time is None:
-            measurement_time = datetime.now()
-            
-        query = """
-            INSERT INTO sugar_measurements 
-            (patient_id, sugar_level, measurement_time, notes)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-        """
-        result = self.execute_query(query, (patient_id, sugar_level, measurement_time, notes))
-        return result[0][0] if result else None
-
-    def save_diet_tracking(self, patient_id, diet_type_id, date=None, status='beklemede', notes=None):
-        """Diyet takip kaydını ekle"""
-        if date is None:
-            date = datetime.now().date()
-            
-        query = """
-            INSERT INTO diet_tracking 
-            (patient_id, diet_type_id, date, status, notes)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """
-        result = self.execute_query(query, (patient_id, diet_type_id, date, status, notes))
-        return result[0][0] if result else None
-
-    def save_exercise_tracking(self, patient_id, exercise_type_id, duration, date=None, status='beklemede', notes=None):
-        """Egzersiz takip kaydını ekle"""
-        if date is None:
-            date = datetime.now().date()
-            
-        query = """
-            INSERT INTO exercise_tracking 
-            (patient_id, exercise_type_id, duration, date, status, notes)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """
-        result = self.execute_query(query, (patient_id, exercise_type_id, duration, date, status, notes))
-        return result[0][0] if result else None
-
-    def update_diet_tracking(self, tracking_id, status, notes=None):
-        """Diyet takip kaydını güncelle"""
-        query = """
-            UPDATE diet_tracking
-            SET status = %s, notes = %s
-            WHERE id = %s
-        """
-        self.execute_query(query, (status, notes, tracking_id))
-
-    def update_exercise_tracking(self, tracking_id, status, notes=None):
-        """Egzersiz takip kaydını güncelle"""
-        query = """
-            UPDATE exercise_tracking
-            SET status = %s, notes = %s
-            WHERE id = %s
-        """
-        self.execute_query(query, (status, notes, tracking_id))
-
-    def get_diet_types(self):
-        """Diyet türlerini getir"""
-        query = "SELECT id, name, description FROM diet_types ORDER BY name"
-        return self.execute_query(query)
-
-    def get_exercise_types(self):
-        """Egzersiz türlerini getir"""
-        query = "SELECT id, name, description FROM exercise_types ORDER BY name"
-        return self.execute_query(query)
-
-    def get_daily_diet_tracking(self, patient_id, date=None):
-        """Belirli bir güne ait diyet takip kayıtlarını getir"""
-        if date is None:
-            date = datetime.now().date()
-            
-        query = """
-            SELECT dt.id, dty.name, dt.status, dt.notes
-            FROM diet_tracking dt
-            JOIN diet_types dty ON dt.diet_type_id = dty.id
-            WHERE dt.patient_id = %s AND dt.date = %s
-            ORDER BY dt.id DESC
-        """
-        return self.execute_query(query, (patient_id, date))
-
-    def get_daily_exercise_tracking(self, patient_id, date=None):
-        """Belirli bir güne ait egzersiz takip kayıtlarını getir"""
-        if date is None:
-            date = datetime.now().date()
-            
-        query = """
-            SELECT et.id, ety.name, et.duration, et.status, et.notes
-            FROM exercise_tracking et
-            JOIN exercise_types ety ON et.exercise_type_id = ety.id
-            WHERE et.patient_id = %s AND et.date = %s
-            ORDER BY et.id DESC
-        """
-        return self.execute_query(query, (patient_id, date))
-
-    def get_daily_measurements(self, patient_id, date=None):
-        """Belirli bir güne ait kan şekeri ölçümlerini getir"""
-        if date is None:
-            date = datetime.now().date()
-            
-        query = """
-            SELECT id, sugar_level, measurement_time, notes
-            FROM sugar_measurements
-            WHERE patient_id = %s 
-            AND DATE(measurement_time) = %s
-            ORDER BY measurement_time DESC
-        """
-        return self.execute_query(query, (patient_id, date))
-
-    def get_measurement_statistics(self, patient_id, start_date=None, end_date=None):
-        """Belirli bir tarih aralığı için ölçüm istatistiklerini getir"""
-        query = """
-            SELECT 
-                COUNT(*) as total_measurements,
-                ROUND(AVG(sugar_level)::numeric, 2) as average_level,
-                MIN(sugar_level) as min_level,
-                MAX(sugar_level) as max_level,
-                COUNT(CASE WHEN sugar_level < 70 THEN 1 END) as low_count,
-                COUNT(CASE WHEN sugar_level > 200 THEN 1 END) as high_count
-            FROM sugar_measurements
-            WHERE patient_id = %s
-        """
-        params = [patient_id]
-        
-        if start_date:
-            query += " AND measurement_time >= %s"
-            params.append(start_date)
-        if end_date:
-            query += " AND measurement_time <= %s"
-            params.append(end_date)
-            
-        result = self.execute_query(query, tuple(params))
-        return result[0] if result else None
-
-    def get_patient_alerts(self, patient_id, unread_only=False):
-        """Hastanın uyarılarını getir"""
-        query = """
-            SELECT id, alert_type, message, alert_time, priority
-            FROM alerts
-            WHERE patient_id = %s
-        """
-        if unread_only:
-            query += " AND is_read = FALSE"
-            
-        query += " ORDER BY alert_time DESC"
-        return self.execute_query(query, (patient_id,))
-
-    def mark_alert_as_read(self, alert_id):
-        """Uyarıyı okundu olarak işaretle"""
-        query = """
-            UPDATE alerts
-            SET is_read = TRUE
-            WHERE id = %s
-        """
-        self.execute_query(query, (alert_id,))
-
-    def save_alert(self, patient_id, alert_type, message, priority='normal'):
-        """Yeni uyarı ekle"""
-        valid_types = ['şeker_ölçümü', 'diyet_hatırlatma', 'egzersiz_hatırlatma', 
-                      'yüksek_şeker', 'düşük_şeker', 'genel']
-        if alert_type not in valid_types:
-            raise ValueError(f"Geçersiz uyarı tipi. Geçerli tipler: {', '.join(valid_types)}")
-            
-        query = """
-            INSERT INTO alerts (patient_id, alert_type, message, priority)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-        """
-        result = self.execute_query(query, (patient_id, alert_type, message, priority))
-        return result[0][0] if result else None
-
-    def get_profile_image(self, user_id):
-        """Kullanıcının profil resmini getir"""
-        query = """
-            SELECT profile_image, profile_image_type
-            FROM users
-            WHERE user_id = %s
-        """
-        result = self.execute_query(query, (user_id,))
-        if result and result[0][0] is not None:
-            return result[0][0], result[0][1]  # image_data, image_type
-        return None, None
-
-    def save_profile_image(self, user_id, image_data, image_type):
-        """Kullanıcının profil resmini kaydet"""
-        query = """
-            UPDATE users
-            SET profile_image = %s, profile_image_type = %s
-            WHERE user_id = %s
-        """
-        self.execute_query(query, (image_data, image_type, user_id))
-
-    def delete_profile_image(self, user_id):
-        """Kullanıcının profil resmini sil"""
-        query = """
-            UPDATE users
-            SET profile_image = NULL, profile_image_type = NULL
-            WHERE user_id = %s
-        """
-        self.execute_query(query, (user_id,))
-
-    def get_patient_summary(self, patient_id):
-        """Hastanın özet bilgilerini getir"""
-        # Son 7 günlük ölçüm istatistikleri
-        stats_query = """
-            SELECT 
-                COUNT(*) as total_measurements,
-                ROUND(AVG(sugar_level)::numeric, 2) as avg_sugar_level,
-                COUNT(CASE WHEN sugar_level < 70 THEN 1 END) as low_count,
-                COUNT(CASE WHEN sugar_level > 200 THEN 1 END) as high_count
-            FROM sugar_measurements
-            WHERE patient_id = %s
-            AND measurement_time >= CURRENT_DATE - INTERVAL '7 days'
-        """
-        
-        # Son diyet ve egzersiz durumu
-        diet_query = """
-            SELECT 
-                dt.date,
-                dty.name as diet_type,
-                dt.status
-            FROM diet_tracking dt
-            JOIN diet_types dty ON dt.diet_type_id = dty.id
-            WHERE dt.patient_id = %s
-            ORDER BY dt.date DESC, dt.id DESC
-            LIMIT 1
-        """
-        
-        exercise_query = """
-            SELECT 
-                et.date,
-                ety.name as exercise_type,
-                et.duration,
-                et.status
-            FROM exercise_tracking et
-            JOIN exercise_types ety ON et.exercise_type_id = ety.id
-            WHERE et.patient_id = %s
-            ORDER BY et.date DESC, et.id DESC
-            LIMIT 1
-        """
-        
-        stats = self.execute_query(stats_query, (patient_id,))
-        diet = self.execute_query(diet_query, (patient_id,))
-        exercise = self.execute_query(exercise_query, (patient_id,))
-        
-        return {
-            'stats': stats[0] if stats else None,
-            'last_diet': diet[0] if diet else None,
-            'last_exercise': exercise[0] if exercise else None
-        }
-
-    def get_doctor_patients_count(self, doctor_id):
-        """Doktorun toplam hasta sayısını getir"""
-        query = """
-            SELECT COUNT(*)
-            FROM doctor_patient
-            WHERE doctor_id = %s AND status = 'aktif'
-        """
-        result = self.execute_query(query, (doctor_id,))
-        return result[0][0] if result else 0
-
-    def get_daily_measurements_count(self, doctor_id):
-        """Doktorun hastalarının günlük toplam ölçüm sayısını getir"""
-        query = """
-            SELECT COUNT(*)
-            FROM sugar_measurements sm
-            JOIN doctor_patient dp ON sm.patient_id = dp.patient_id
-            WHERE dp.doctor_id = %s 
-            AND dp.status = 'aktif'
-            AND DATE(sm.measurement_time) = CURRENT_DATE
-        """
-        result = self.execute_query(query, (doctor_id,))
-        return result[0][0] if result else 0
-
-    def get_critical_patients_count(self, doctor_id):
-        """Kritik değerlerde ölçümü olan hasta sayısını getir"""
-        query = """
-            SELECT COUNT(DISTINCT dp.patient_id)
-            FROM doctor_patient dp
-            JOIN sugar_measurements sm ON dp.patient_id = sm.patient_id
-            WHERE dp.doctor_id = %s 
-            AND dp.status = 'aktif'
-            AND sm.measurement_time >= CURRENT_DATE
-            AND (sm.sugar_level < 70 OR sm.sugar_level > 180)
-        """
-        result = self.execute_query(query, (doctor_id,))
-        return result[0][0] if result else 0
-
-    def get_doctor_patients_weekly_averages(self, doctor_id):
-        """Doktorun hastalarının haftalık ortalama şeker değerlerini getir"""
-        query = """
-            WITH daily_averages AS (
-                SELECT 
-                    DATE(sm.measurement_time) as measure_date,
-                    AVG(sm.sugar_level) as avg_sugar
-                FROM sugar_measurements sm
-                JOIN doctor_patient dp ON sm.patient_id = dp.patient_id
-                WHERE dp.doctor_id = %s 
-                AND dp.status = 'aktif'
-                AND sm.measurement_time >= CURRENT_DATE - INTERVAL '7 days'
-                GROUP BY DATE(sm.measurement_time)
-                ORDER BY DATE(sm.measurement_time)
-            )
-            SELECT measure_date, ROUND(avg_sugar::numeric, 2)
-            FROM daily_averages
-        """
-        return self.execute_query(query, (doctor_id,))
-
-    def get_doctor_recent_measurements(self, doctor_id, limit=10):
-        """Doktorun hastalarının son ölçümlerini getir"""
-        query = """
-            SELECT 
-                u.tc,
-                CONCAT(u.name, ' ', u.surname) as full_name,
-                sm.measurement_time,
-                sm.sugar_level,
-                CASE 
-                    WHEN sm.sugar_level < 70 THEN 'Düşük'
-                    WHEN sm.sugar_level > 180 THEN 'Yüksek'
-                    ELSE 'Normal'
-                END as status
-            FROM sugar_measurements sm
-            JOIN doctor_patient dp ON sm.patient_id = dp.patient_id
-            JOIN users u ON dp.patient_id = u.user_id
-            WHERE dp.doctor_id = %s 
-            AND dp.status = 'aktif'
-            ORDER BY sm.measurement_time DESC
-            LIMIT %s
-        """
-        return self.execute_query(query, (doctor_id, limit))
-
-    def get_doctor_patients_list(self, doctor_id):
-        """Doktorun hasta listesini detaylı bilgilerle getir"""
-        query = """
-            SELECT 
-                u.tc,
-                u.name,
-                u.surname,
-                u.birth_date,
-                u.gender,
-                u.email,
-                u.phone,
-                dp.created_at as start_date
-            FROM users u
-            JOIN doctor_patient dp ON u.user_id = dp.patient_id
-            WHERE dp.doctor_id = %s 
-            AND dp.status = 'aktif'
-            ORDER BY u.surname, u.name
-        """
-        return self.execute_query(query, (doctor_id,))
\ No newline at end of file
+import psycopg2
+import psycopg2.errors
+from psycopg2 import pool
+from psycopg2.extras import execute_values
+import base64
+import io
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from cache import ReferenceDataCache, TTLCache
+from columnar import DailyRollupArrays, DoctorMeasurementArrays, MeasurementArrays, parse_binary_copy
+from config import DB_CONFIG, POOL_CONFIG, QUERY_CONFIG, REMINDER_CONFIG
+from query_stats import QueryStats, caller_tag
+
+
+class PoolTimeoutError(pool.PoolError):
+    """Bağlantı havuzundan zaman aşımı içinde bağlantı alınamadı"""
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Oturumda hazırlanmış (PREPARE) sorgu adlarını da tutan bağlantı"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+
+_PLACEHOLDER = re.compile(r'%(%|s)')
+
+# Önbellekte tutulan hafif kullanıcı kaydı (profil resmi ve şifre hariç)
+UserRecord = namedtuple('UserRecord', [
+    'user_id', 'tc', 'name', 'surname', 'birth_date', 'gender', 'email', 'phone', 'user_type'
+])
+
+# Doktor panosunun tek sorguda getirilen özeti
+DoctorDashboard = namedtuple('DoctorDashboard', [
+    'patient_count', 'daily_measurement_count', 'critical_patient_count',
+    'weekly_averages', 'recent_measurements'
+])
+
+# Anahtar kümesi (keyset) sayfalamasında bir sayfa; next_cursor son sayfada None
+Page = namedtuple('Page', 'rows next_cursor')
+
+# Bellekte tutulan referans (sabit liste) tabloları
+REFERENCE_TABLES = ('diet_types', 'exercise_types')
+
+# pg_advisory_xact_lock anahtarı; aynı anda çalışan iki hatırlatma işi aynı
+# hastaya iki kez hatırlatma yazmasın
+REMINDER_LOCK_ID = 7310002
+
+MEASUREMENT_REMINDER_MESSAGE = "Kan şekeri ölçümünüzü yapmayı unutmayın."
+
+Reminder = namedtuple('Reminder', 'alert_id patient_id email full_name')
+
+# Sorgu etiketlenirken atlanacak iç katman metotları
+_INTERNAL_METHODS = frozenset([
+    'execute_query', 'execute_named', '_execute_prepared', 'iter_query',
+    '_iter_query', '_bulk_insert', 'transaction', 'execute',
+    '_fetch_all', '_fetch_one', '_fetch_value', '_execute', 'fetch_columns',
+    '_fetch_page', 'copy_to',
+])
+
+
+def _day_range(day):
+    """Günü [gün başı, ertesi gün başı) aralığına çevir.
+
+    DATE(sütun) = gün yerine sütun >= başlangıç AND sütun < bitiş yazılır;
+    böylece sorgu sütun üzerindeki indeksi kullanabilir ve bölümlenmiş
+    tablolarda yalnızca ilgili aylık bölüm taranır.
+    """
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d')
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def _encode_cursor(kind, timestamp, row_id):
+    """Sayfanın son satırının (zaman, id) anahtarını opak bir imlece çevir"""
+    payload = json.dumps([kind, timestamp.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor, kind):
+    """İmleci (zaman, id) anahtarına çevir; başka bir sorgunun ya da bozuk imleçte ValueError"""
+    try:
+        cursor_kind, timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if cursor_kind != kind or not isinstance(row_id, int):
+            raise ValueError(cursor_kind)
+        return datetime.fromisoformat(timestamp), row_id
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Geçersiz sayfa imleci")
+
+
+def _make_page(rows, page_size, kind, time_index, id_index):
+    """page_size + 1 satır istenmiş sonuçtan sayfayı ve sonraki sayfanın imlecini oluştur"""
+    rows = rows or []
+    if len(rows) <= page_size:
+        return Page(rows, None)
+    rows = rows[:page_size]
+    last = rows[-1]
+    return Page(rows, _encode_cursor(kind, last[time_index], last[id_index]))
+
+
+def _to_positional(query):
+    """psycopg2 yer tutucularını (%s) PREPARE için $1, $2... biçimine çevir"""
+    counter = itertools.count(1)
+    return _PLACEHOLDER.sub(
+        lambda m: '%' if m.group(1) == '%' else '$%d' % next(counter),
+        query
+    )
+
+
+class BlockingConnectionPool:
+    """Thread-safe, sınırlı bağlantı havuzu.
+
+    Tüm bağlantılar kullanımdayken hata vermek yerine bir bağlantı geri
+    verilene kadar (en fazla `timeout` saniye) bekler.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=None, validate_after=30.0, **kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Geçersiz havuz boyutu: minconn=%s, maxconn=%s" % (minconn, maxconn))
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._kwargs = kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []         # (bağlantı, boşa çıkma zamanı) - LIFO
+        self._in_use = {}       # id(bağlantı) -> bağlantı
+        self._size = 0          # açık + açılmakta olan bağlantı sayısı
+        self._closed = False
+        self._stats = {
+            'acquired': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'timeouts': 0,
+            'exhausted_events': 0,
+            'validation_failures': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+        }
+
+        for _ in range(minconn):
+            conn = self._connect()
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(connection_factory=PooledConnection, **self._kwargs)
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _is_usable(self, conn, idle_since):
+        """Boştaki bağlantının hala kullanılabilir olduğunu doğrula"""
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.validate_after:
+            return True
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+            finally:
+                cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._cond.notify()
+
+    def getconn(self, timeout=None):
+        """Havuzdan bağlantı al; gerekirse zaman aşımına kadar bekle"""
+        if timeout is None:
+            timeout = self.timeout
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        waited = False
+
+        while True:
+            conn = None
+            idle_since = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise pool.PoolError("Bağlantı havuzu kapatılmış")
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        # Yeni bağlantı için yer ayır, bağlantıyı kilit dışında aç
+                        self._size += 1
+                        break
+                    if not waited:
+                        waited = True
+                        self._stats['waits'] += 1
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            "%.1f saniye içinde boş veritabanı bağlantısı bulunamadı" % timeout
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(conn, idle_since):
+                with self._cond:
+                    self._stats['validation_failures'] += 1
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use[id(conn)] = conn
+                self._stats['acquired'] += 1
+                if waited:
+                    wait_time = time.monotonic() - start
+                    self._stats['wait_time'] += wait_time
+                    self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+                if len(self._in_use) == self.maxconn:
+                    self._stats['exhausted_events'] += 1
+            return conn
+
+    def putconn(self, conn, close=False):
+        """Bağlantıyı havuza geri ver"""
+        with self._cond:
+            if self._closed:
+                conn.close()
+                return
+            if self._in_use.pop(id(conn), None) is None:
+                raise pool.PoolError("Bu bağlantı havuza ait değil")
+
+        if not close and not conn.closed:
+            try:
+                # Yarım kalmış işlemleri temizle
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+
+        if close or conn.closed or self._closed:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """Tüm bağlantıları kapat"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            busy = list(self._in_use.values())
+            self._idle = []
+            self._in_use = {}
+            self._size = 0
+            self._cond.notify_all()
+        for conn in idle + busy:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Havuz sayaçlarını döndür"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+            })
+        stats['avg_wait_time'] = stats['wait_time'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+
+class Transaction:
+    """Tek bağlantı ve tek imleç üzerinde çalışan iş birimi.
+
+    DatabaseManager.transaction() tarafından oluşturulur; blok içindeki tüm
+    komutlar aynı işlemde çalışır ve blok sonunda tek seferde onaylanır.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+
+    def execute(self, query, params=None):
+        self.cursor.execute(query, params)
+        if self.cursor.description is not None:
+            return self.cursor.fetchall()
+        return None
+
+    def close(self):
+        self.cursor.close()
+
+
+class DatabaseManager:
+    _instance = None
+    _instance_lock = threading.Lock()
+    _pool = None
+    _cursor_ids = itertools.count(1)
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    DatabaseManager()
+        return cls._instance
+
+    def __init__(self):
+        if DatabaseManager._instance is not None:
+            raise Exception("Bu sınıf bir Singleton'dır!")
+        else:
+            DatabaseManager._instance = self
+            self.prepare_statements = QUERY_CONFIG['prepare_statements']
+            self.query_stats = QueryStats(
+                slow_query_ms=QUERY_CONFIG['slow_query_ms'],
+                slow_query_log=QUERY_CONFIG['slow_query_log']
+            )
+            self.reference_cache = ReferenceDataCache(
+                self._load_reference_table,
+                self._reference_data_version,
+                check_interval=QUERY_CONFIG['reference_check_interval']
+            )
+            self.user_cache = TTLCache(
+                maxsize=QUERY_CONFIG['user_cache_size'],
+                ttl=QUERY_CONFIG['user_cache_ttl']
+            )
+            self._setup_logging()
+            self._create_pool()
+
+    def _setup_logging(self):
+        logging.basicConfig(
+            filename='database.log',
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+    def _create_pool(self):
+        try:
+            self._pool = BlockingConnectionPool(**POOL_CONFIG, **DB_CONFIG)
+            logging.info("Veritabanı bağlantı havuzu oluşturuldu")
+        except Exception as e:
+            logging.error(f"Veritabanı bağlantı havuzu oluşturulurken hata: {str(e)}")
+            raise
+
+    def get_connection(self, timeout=None):
+        if self._pool:
+            return self._pool.getconn(timeout)
+        else:
+            raise Exception("Veritabanı bağlantı havuzu bulunamadı!")
+
+    def return_connection(self, conn, close=False):
+        if self._pool:
+            self._pool.putconn(conn, close=close)
+
+    def get_pool_stats(self):
+        """Bağlantı havuzu istatistiklerini getir"""
+        if self._pool:
+            return self._pool.stats()
+        return {}
+
+    def get_query_stats(self):
+        """Sorgu başına gecikme istatistiklerini (p50/p95/p99) getir"""
+        return self.query_stats.snapshot()
+
+    def export_query_stats(self, path='query_stats.json'):
+        """Sorgu ve havuz istatistiklerini JSON dosyasına yaz"""
+        data = self.query_stats.export(path, extra={'pool': self.get_pool_stats()})
+        logging.info("Sorgu ve havuz istatistikleri %s dosyasına yazıldı", path)
+        return data
+
+    def reset_query_stats(self):
+        self.query_stats.reset()
+
+    def execute_query(self, query, params=None, tx=None):
+        tag = caller_tag(_INTERNAL_METHODS)
+        if tx is not None:
+            try:
+                with self.query_stats.measure(tag, query) as timer:
+                    result = tx.execute(query, params)
+                    timer.rows = len(result) if result else 0
+                return result
+            except Exception as e:
+                logging.error("İşlem içinde sorgu çalıştırılırken hata (%s): %s", tag, e)
+                raise
+
+        conn = None
+        cur = None
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor()
+            
+            with self.query_stats.measure(tag, query) as timer:
+                if params:
+                    cur.execute(query, params)
+                else:
+                    cur.execute(query)
+
+                # SELECT ve RETURNING içeren komutlar satır döndürür
+                if cur.description is not None:
+                    result = cur.fetchall()
+                    timer.rows = len(result)
+                else:
+                    result = None
+
+                conn.commit()
+            return result
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("Sorgu çalıştırılırken hata (%s): %s", tag, e)
+            raise
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                self.return_connection(conn)
+
+    def execute_named(self, name, query, params=None, tx=None):
+        """Sık çalışan, adlandırılmış bir sorguyu çalıştır.
+
+        prepare_statements açıksa sorgu her havuz bağlantısında bir kez
+        PREPARE edilir ve sonraki çağrılarda adıyla EXECUTE edilir; böylece
+        PostgreSQL aynı metni her seferinde yeniden ayrıştırıp planlamaz.
+        Kapalıysa execute_query ile aynı şekilde çalışır.
+        """
+        if not self.prepare_statements:
+            return self.execute_query(query, params, tx=tx)
+
+        tag = caller_tag(_INTERNAL_METHODS)
+        if tx is not None:
+            try:
+                with self.query_stats.measure(tag, query) as timer:
+                    result = self._execute_prepared(tx.conn, tx.cursor, name, query, params)
+                    timer.rows = len(result) if result else 0
+                return result
+            except psycopg2.errors.InvalidSqlStatementName as e:
+                # Bozulan işlem içinde yeniden hazırlanamaz; sonraki çağrı yeniden hazırlasın
+                # diye ad unutulur ve hata işlemi geri alacak çağırana bırakılır
+                prepared = getattr(tx.conn, 'prepared_statements', None)
+                if prepared is not None:
+                    prepared.discard("dm_" + name)
+                logging.error("İşlem içinde hazır sorgu bulunamadı (%s): %s", tag, e)
+                raise
+            except Exception as e:
+                logging.error("İşlem içinde hazır sorgu çalıştırılırken hata (%s): %s", tag, e)
+                raise
+
+        conn = None
+        cur = None
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor()
+            with self.query_stats.measure(tag, query) as timer:
+                try:
+                    result = self._execute_prepared(conn, cur, name, query, params)
+                except psycopg2.errors.InvalidSqlStatementName:
+                    # Sunucu tarafında hazır sorgu kaybolmuş (ör. DISCARD ALL), yeniden hazırla
+                    conn.rollback()
+                    conn.prepared_statements.discard("dm_" + name)
+                    result = self._execute_prepared(conn, cur, name, query, params)
+                timer.rows = len(result) if result else 0
+                conn.commit()
+            return result
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("Hazır sorgu çalıştırılırken hata (%s): %s", tag, e)
+            raise
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                self.return_connection(conn)
+
+    def _execute_prepared(self, conn, cur, name, query, params):
+        prepared = getattr(conn, 'prepared_statements', None)
+        if prepared is None:
+            # Havuz dışı bağlantı, hazırlamadan çalıştır
+            cur.execute(query, params)
+        else:
+            statement = "dm_" + name
+            if statement not in prepared:
+                cur.execute("PREPARE %s AS %s" % (statement, _to_positional(query)))
+                prepared.add(statement)
+            if params:
+                cur.execute(
+                    "EXECUTE %s (%s)" % (statement, ", ".join(["%s"] * len(params))),
+                    params
+                )
+            else:
+                cur.execute("EXECUTE %s" % statement)
+
+        if cur.description is not None:
+            return cur.fetchall()
+        return None
+
+    @contextmanager
+    def transaction(self):
+        """Birden fazla komutu tek bağlantı ve tek işlemde çalıştır.
+
+        Kullanım:
+            with db.transaction() as tx:
+                measurement_id = db.save_sugar_measurement(..., tx=tx)
+                db.save_alert(..., tx=tx)
+
+        Blok hatasız biterse işlem onaylanır, hata olursa tamamen geri alınır.
+        """
+        conn = self.get_connection()
+        tx = Transaction(conn)
+        try:
+            yield tx
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            tx.close()
+            self.return_connection(conn)
+
+    def iter_query(self, query, params=None, chunk_size=None, itersize=None):
+        """Sorgu sonucunu sunucu taraflı (named) imleçle parça parça getir.
+
+        Satırlar sunucudan `itersize` satırlık paketler halinde çekilir, böylece
+        bellek kullanımı sonuç boyutundan bağımsız kalır. `chunk_size` verilirse
+        satırlar tek tek değil liste halinde döndürülür. Bağlantı, üreteç sonuna
+        kadar tüketilene ya da kapatılana kadar havuza geri verilmez.
+        """
+        if itersize is None:
+            itersize = chunk_size or QUERY_CONFIG['itersize']
+        # Üreteç gövdesi ilk satır istendiğinde çalışır; etiket şimdi belirlenir
+        tag = caller_tag(_INTERNAL_METHODS)
+        return self._iter_query(tag, query, params, chunk_size, itersize)
+
+    def _iter_query(self, tag, query, params, chunk_size, itersize):
+        conn = None
+        cur = None
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor(name="iter_%d" % next(self._cursor_ids))
+            cur.itersize = itersize
+            # Süre, tüketicinin satırları işlemesi dahil akışın tamamını kapsar
+            with self.query_stats.measure(tag, query) as timer:
+                cur.execute(query, params)
+
+                if chunk_size:
+                    while True:
+                        rows = cur.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        timer.rows += len(rows)
+                        yield rows
+                else:
+                    for row in cur:
+                        timer.rows += 1
+                        yield row
+
+                conn.commit()
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("Akış sorgusu çalıştırılırken hata (%s): %s", tag, e)
+            raise
+        finally:
+            if cur:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+            if conn:
+                self.return_connection(conn)
+
+    def fetch_columns(self, query, params, columns):
+        """Sorgu sonucunu ikili COPY ile sütun başına bir NumPy dizisi olarak getir.
+
+        `columns` [(ad, pg_tipi), ...] listesidir ve sorgunun SELECT listesiyle
+        aynı sırada olmalıdır; sütunlar int2/int4/int8/float4/float8'e
+        dönüştürülmüş ve NULL içermemelidir. {ad: dizi} sözlüğü döner.
+        """
+        tag = caller_tag(_INTERNAL_METHODS)
+        conn = None
+        cur = None
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor()
+            # COPY parametre almaz; değerler önce istemci tarafında güvenle yerleştirilir
+            copy_sql = "COPY (%s) TO STDOUT WITH (FORMAT binary)" % cur.mogrify(query, params).decode('utf-8')
+            buffer = io.BytesIO()
+            with self.query_stats.measure(tag, query) as timer:
+                cur.copy_expert(copy_sql, buffer)
+                arrays = parse_binary_copy(buffer.getbuffer(), columns)
+                timer.rows = len(arrays[columns[0][0]])
+                conn.commit()
+            return arrays
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("Sütunsal sorgu çalıştırılırken hata (%s): %s", tag, e)
+            raise
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                self.return_connection(conn)
+
+    def copy_to(self, query, params, file, options='FORMAT csv, HEADER', tx=None):
+        """Sorgu sonucunu COPY ... TO STDOUT ile doğrudan dosya nesnesine yaz.
+
+        Satırlar sunucudan geldikçe file.write ile yazılır, sonuç bellekte
+        toplanmaz. Yazılan satır sayısını döndürür. tx verilirse komut o
+        işlemde çalışır (ör. birden fazla tablonun tutarlı dökümü için).
+        """
+        tag = caller_tag(_INTERNAL_METHODS)
+        if tx is not None:
+            copy_sql = "COPY (%s) TO STDOUT WITH (%s)" % (tx.cursor.mogrify(query, params).decode('utf-8'), options)
+            with self.query_stats.measure(tag, query) as timer:
+                tx.cursor.copy_expert(copy_sql, file)
+                timer.rows = tx.cursor.rowcount
+            return tx.cursor.rowcount
+
+        conn = None
+        cur = None
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor()
+            copy_sql = "COPY (%s) TO STDOUT WITH (%s)" % (cur.mogrify(query, params).decode('utf-8'), options)
+            with self.query_stats.measure(tag, query) as timer:
+                cur.copy_expert(copy_sql, file)
+                timer.rows = cur.rowcount
+                conn.commit()
+            return cur.rowcount
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("COPY dökümü sırasında hata (%s): %s", tag, e)
+            raise
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                self.return_connection(conn)
+
+    def close_all(self):
+        if self._pool:
+            self._pool.closeall()
+            logging.info("Tüm veritabanı bağlantıları kapatıldı")
+
+    # Aşağıdaki sorgu metotlarının çoğu AsyncDatabaseManager ile paylaşılır
+    # (bkz. SHARED_QUERY_METHODS). Paylaşılan metotlar sonucu _fetch_* /
+    # _execute çağrısından olduğu gibi döndürmeli, sonrasında işlem yapmamalıdır;
+    # async sürümde bu çağrılar await edilecek bir coroutine döndürür.
+
+    def _fetch_all(self, query, params=None, tx=None, name=None):
+        """Tüm satırları getir; name verilirse sorgu hazır sorgu olarak çalışır"""
+        if name:
+            return self.execute_named(name, query, params, tx=tx)
+        return self.execute_query(query, params, tx=tx)
+
+    def _fetch_one(self, query, params=None, tx=None, name=None):
+        """İlk satırı getir, sonuç yoksa None döndür"""
+        result = self._fetch_all(query, params, tx=tx, name=name)
+        return result[0] if result else None
+
+    def _fetch_value(self, query, params=None, default=None, tx=None, name=None):
+        """İlk satırın ilk sütununu getir, sonuç yoksa default döndür"""
+        result = self._fetch_all(query, params, tx=tx, name=name)
+        return result[0][0] if result else default
+
+    def _execute(self, query, params=None, tx=None, name=None):
+        """Satır döndürmeyen komutu çalıştır"""
+        self._fetch_all(query, params, tx=tx, name=name)
+
+    def _fetch_page(self, query, params, page_size, kind, time_index, id_index):
+        """page_size + 1 satır isteyen sorgudan Page oluştur"""
+        rows = self._fetch_all(query, params)
+        return _make_page(rows, page_size, kind, time_index, id_index)
+
+    def get_user_by_tc(self, tc, tx=None):
+        query = "SELECT * FROM users WHERE tc = %s"
+        return self._fetch_one(query, (tc,), tx=tx, name='get_user_by_tc')
+
+    def get_user_by_id(self, user_id, tx=None):
+        """Kullanıcıyı ID ile getir"""
+        query = "SELECT * FROM users WHERE user_id = %s"
+        return self._fetch_one(query, (user_id,), tx=tx, name='get_user_by_id')
+
+    def get_user_record(self, tc=None, user_id=None):
+        """Kullanıcının özet kaydını (UserRecord) önbellekten ya da veritabanından getir.
+
+        Profil resmi ve şifre sütunlarını içermez; panellerin her işlemde
+        kullanıcı satırının tamamını çekmesini önler.
+        """
+        key = ('tc', tc) if tc is not None else ('id', user_id)
+        record = self.user_cache.get(key)
+        if record is not None:
+            return record
+
+        query = """
+            SELECT user_id, tc, name, surname, birth_date, gender, email, phone, user_type
+            FROM users
+        """
+        if tc is not None:
+            row = self._fetch_one(query + " WHERE tc = %s", (tc,), name='get_user_record_by_tc')
+        else:
+            row = self._fetch_one(query + " WHERE user_id = %s", (user_id,), name='get_user_record_by_id')
+        if row is None:
+            return None
+
+        record = UserRecord(*row)
+        self.user_cache.set(('tc', record.tc), record)
+        self.user_cache.set(('id', record.user_id), record)
+        return record
+
+    def invalidate_user(self, user_id=None, tc=None):
+        """Kullanıcının önbellekteki kaydını sil"""
+        record = self.user_cache.pop(('id', user_id)) if user_id is not None else None
+        if record is not None and tc is None:
+            tc = record.tc
+        if tc is not None:
+            record = self.user_cache.pop(('tc', tc))
+            if record is not None:
+                self.user_cache.pop(('id', record.user_id))
+
+    def get_doctor_patients(self, doctor_id):
+        """Doktorun hasta listesini getir"""
+        return self._fetch_all(self._doctor_patients_query(), (doctor_id,))
+
+    def iter_doctor_patients(self, doctor_id, chunk_size=500):
+        """Doktorun hasta listesini parça parça getir"""
+        return self.iter_query(self._doctor_patients_query(), (doctor_id,), chunk_size=chunk_size)
+
+    def _doctor_patients_query(self):
+        return """
+            SELECT 
+                u.tc,
+                u.name,
+                u.surname,
+                u.birth_date,
+                u.gender,
+                u.email,
+                u.phone
+            FROM users u
+            JOIN doctor_patient dp ON u.user_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            ORDER BY u.surname, u.name
+        """
+
+    def get_patient_measurements(self, patient_id, start_date=None, end_date=None):
+        """Hastanın kan şekeri ölçümlerini getir"""
+        query, params = self._patient_measurements_query(patient_id, start_date, end_date)
+        return self._fetch_all(query, params)
+
+    def iter_patient_measurements(self, patient_id, start_date=None, end_date=None, chunk_size=1000):
+        """Hastanın kan şekeri ölçümlerini sunucu taraflı imleçle parça parça getir"""
+        query, params = self._patient_measurements_query(patient_id, start_date, end_date)
+        return self.iter_query(query, params, chunk_size=chunk_size)
+
+    def _patient_measurements_query(self, patient_id, start_date=None, end_date=None):
+        query = """
+            SELECT 
+                id,
+                sugar_level,
+                measurement_time,
+                notes
+            FROM sugar_measurements 
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+        
+        if start_date:
+            query += " AND measurement_time >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND measurement_time <= %s"
+            params.append(end_date)
+            
+        query += " ORDER BY measurement_time DESC"
+        return query, tuple(params)
+
+    def get_patient_measurement_arrays(self, patient_id, start_date=None, end_date=None):
+        """Hastanın ölçümlerini artan zaman sırasıyla NumPy dizileri olarak getir.
+
+        times yerel saatle epoch saniyesi (int64), levels mg/dL (float32)
+        olarak döner; glycemic_analytics fonksiyonlarına doğrudan verilebilir.
+        """
+        query = """
+            SELECT 
+                EXTRACT(EPOCH FROM measurement_time)::int8,
+                sugar_level::float4
+            FROM sugar_measurements
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+
+        if start_date:
+            query += " AND measurement_time >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND measurement_time <= %s"
+            params.append(end_date)
+
+        query += " ORDER BY measurement_time"
+        arrays = self.fetch_columns(query, tuple(params), [('times', 'int8'), ('levels', 'float4')])
+        return MeasurementArrays(arrays['times'], arrays['levels'])
+
+    def get_patient_measurements_page(self, patient_id, page_size=50, cursor=None,
+                                      start_date=None, end_date=None):
+        """Hastanın ölçümlerini yeniden eskiye sayfa sayfa getir.
+
+        Sayfalar (measurement_time, id) anahtarıyla ilerler (keyset): her sayfa
+        derinlikten bağımsız olarak indeksten okunur ve araya eklenen yeni
+        ölçümler sonraki sayfaları kaydırmaz. Dönen Page.next_cursor bir
+        sonraki çağrıya `cursor` olarak verilir; son sayfada None'dır.
+        """
+        query = """
+            SELECT id, sugar_level, measurement_time, notes
+            FROM sugar_measurements
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+
+        if start_date:
+            query += " AND measurement_time >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND measurement_time <= %s"
+            params.append(end_date)
+        if cursor:
+            query += " AND (measurement_time, id) < (%s, %s)"
+            params.extend(_decode_cursor(cursor, 'measurements'))
+
+        query += " ORDER BY measurement_time DESC, id DESC LIMIT %s"
+        params.append(page_size + 1)
+        return self._fetch_page(query, tuple(params), page_size, 'measurements', 2, 0)
+
+    def get_patient_measurements_downsampled(self, patient_id, start_date, end_date=None, max_points=1200):
+        """Hastanın ölçümlerini veritabanında seyreltip NumPy dizileri olarak getir.
+
+        Aralık max_points / 2 eşit süreli kovaya bölünür ve her kovanın en
+        düşük ve en yüksek ölçümü döner (downsampling.minmax_downsample'ın
+        sunucu tarafı karşılığı); hipo/hiper uçları kaybolmaz, aktarılan satır
+        sayısı bütçeyi geçmez.
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        span = max((end_date - start_date).total_seconds(), 1.0)
+        bucket_seconds = max(1, int(span // max(1, max_points // 2)) + 1)
+
+        query = """
+            SELECT t, v
+            FROM (
+                SELECT 
+                    t, v,
+                    row_number() OVER (PARTITION BY bucket ORDER BY v, t) as low_rank,
+                    row_number() OVER (PARTITION BY bucket ORDER BY v DESC, t) as high_rank
+                FROM (
+                    SELECT 
+                        EXTRACT(EPOCH FROM measurement_time)::int8 as t,
+                        sugar_level::float4 as v,
+                        floor(EXTRACT(EPOCH FROM measurement_time) / %s) as bucket
+                    FROM sugar_measurements
+                    WHERE patient_id = %s
+                    AND measurement_time >= %s
+                    AND measurement_time <= %s
+                ) points
+            ) ranked
+            WHERE low_rank = 1 OR high_rank = 1
+            ORDER BY t
+        """
+        arrays = self.fetch_columns(query, (bucket_seconds, patient_id, start_date, end_date),
+                                    [('times', 'int8'), ('levels', 'float4')])
+        return MeasurementArrays(arrays['times'], arrays['levels'])
+
+    def save_sugar_measurement(self, patient_id, sugar_level, measurement_time=None, notes=None, tx=None):
+        """Kan şekeri ölçümünü kaydet"""
+        if measurement_time is None:
+            measurement_time = datetime.now()
+            
+        query = """
+            INSERT INTO sugar_measurements 
+            (patient_id, sugar_level, measurement_time, notes)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id
+        """
+        return self._fetch_value(query, (patient_id, sugar_level, measurement_time, notes), tx=tx)
+
+    def save_diet_tracking(self, patient_id, diet_type_id, date=None, status='beklemede', notes=None, tx=None):
+        """Diyet takip kaydını ekle"""
+        if date is None:
+            date = datetime.now().date()
+            
+        query = """
+            INSERT INTO diet_tracking 
+            (patient_id, diet_type_id, date, status, notes)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING id
+        """
+        return self._fetch_value(query, (patient_id, diet_type_id, date, status, notes), tx=tx)
+
+    def save_exercise_tracking(self, patient_id, exercise_type_id, duration, date=None, status='beklemede', notes=None, tx=None):
+        """Egzersiz takip kaydını ekle"""
+        if date is None:
+            date = datetime.now().date()
+            
+        query = """
+            INSERT INTO exercise_tracking 
+            (patient_id, exercise_type_id, duration, date, status, notes)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """
+        return self._fetch_value(query, (patient_id, exercise_type_id, duration, date, status, notes), tx=tx)
+
+    def save_sugar_measurements_bulk(self, records, page_size=None):
+        """Çok sayıda kan şekeri ölçümünü tek işlemde kaydet.
+
+        Her kayıt (patient_id, sugar_level[, measurement_time[, notes]]) demeti
+        ya da aynı anahtarlara sahip bir sözlüktür. Üretilen id'ler giriş
+        sırasıyla döner.
+        """
+        now = datetime.now()
+        rows = (
+            self._bulk_record(record, ('patient_id', 'sugar_level', 'measurement_time', 'notes'),
+                              {'measurement_time': now, 'notes': None})
+            for record in records
+        )
+        return self._bulk_insert(
+            'sugar_measurements',
+            ('patient_id', 'sugar_level', 'measurement_time', 'notes'),
+            rows, page_size
+        )
+
+    def save_diet_tracking_bulk(self, records, page_size=None):
+        """Çok sayıda diyet takip kaydını tek işlemde ekle.
+
+        Her kayıt (patient_id, diet_type_id[, date[, status[, notes]]]) demeti
+        ya da aynı anahtarlara sahip bir sözlüktür.
+        """
+        today = datetime.now().date()
+        rows = (
+            self._bulk_record(record, ('patient_id', 'diet_type_id', 'date', 'status', 'notes'),
+                              {'date': today, 'status': 'beklemede', 'notes': None})
+            for record in records
+        )
+        return self._bulk_insert(
+            'diet_tracking',
+            ('patient_id', 'diet_type_id', 'date', 'status', 'notes'),
+            rows, page_size
+        )
+
+    def save_exercise_tracking_bulk(self, records, page_size=None):
+        """Çok sayıda egzersiz takip kaydını tek işlemde ekle.
+
+        Her kayıt (patient_id, exercise_type_id, duration[, date[, status[, notes]]])
+        demeti ya da aynı anahtarlara sahip bir sözlüktür.
+        """
+        today = datetime.now().date()
+        rows = (
+            self._bulk_record(record, ('patient_id', 'exercise_type_id', 'duration', 'date', 'status', 'notes'),
+                              {'date': today, 'status': 'beklemede', 'notes': None})
+            for record in records
+        )
+        return self._bulk_insert(
+            'exercise_tracking',
+            ('patient_id', 'exercise_type_id', 'duration', 'date', 'status', 'notes'),
+            rows, page_size
+        )
+
+    def _bulk_record(self, record, fields, defaults):
+        """Demet ya da sözlük kaydını sütun sırasına göre demete çevir"""
+        if isinstance(record, dict):
+            values = [record.get(field, defaults.get(field)) for field in fields]
+        else:
+            values = list(record) + [defaults.get(field) for field in fields[len(record):]]
+        for i, field in enumerate(fields):
+            if values[i] is None and defaults.get(field) is not None:
+                values[i] = defaults[field]
+        return tuple(values)
+
+    def _bulk_insert(self, table, columns, rows, page_size=None):
+        """Satırları çok satırlı VALUES sayfalarıyla tek işlemde ekle.
+
+        execute_values her sayfayı tek bir INSERT ... VALUES (...), (...)
+        RETURNING id komutuyla gönderir; id'ler sayfa ve satır sırasıyla,
+        yani giriş sırasıyla döner. Hata olursa hiçbir satır eklenmez.
+        """
+        if page_size is None:
+            page_size = QUERY_CONFIG['bulk_page_size']
+        rows = list(rows)
+        if not rows:
+            return []
+
+        query = "INSERT INTO %s (%s) VALUES %%s RETURNING id" % (table, ", ".join(columns))
+        tag = caller_tag(_INTERNAL_METHODS)
+        conn = None
+        cur = None
+        start = time.perf_counter()
+        try:
+            conn = self.get_connection()
+            cur = conn.cursor()
+            with self.query_stats.measure(tag, query) as timer:
+                result = execute_values(cur, query, rows, page_size=page_size, fetch=True)
+                timer.rows = len(result)
+                conn.commit()
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.error("%s tablosuna toplu kayıt eklenirken hata: %s", table, e)
+            raise
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                self.return_connection(conn)
+
+        elapsed = time.perf_counter() - start
+        logging.info(
+            "%s tablosuna %d kayıt %.3f saniyede eklendi (%.0f kayıt/sn)",
+            table, len(rows), elapsed, len(rows) / elapsed if elapsed > 0 else 0
+        )
+        return [row[0] for row in result]
+
+    def update_diet_tracking(self, tracking_id, status, notes=None, tx=None):
+        """Diyet takip kaydını güncelle"""
+        query = """
+            UPDATE diet_tracking
+            SET status = %s, notes = %s
+            WHERE id = %s
+        """
+        return self._execute(query, (status, notes, tracking_id), tx=tx)
+
+    def update_exercise_tracking(self, tracking_id, status, notes=None, tx=None):
+        """Egzersiz takip kaydını güncelle"""
+        query = """
+            UPDATE exercise_tracking
+            SET status = %s, notes = %s
+            WHERE id = %s
+        """
+        return self._execute(query, (status, notes, tracking_id), tx=tx)
+
+    def get_diet_types(self):
+        """Diyet türlerini getir (önbellekten)"""
+        return self.reference_cache.get('diet_types').rows
+
+    def get_exercise_types(self):
+        """Egzersiz türlerini getir (önbellekten)"""
+        return self.reference_cache.get('exercise_types').rows
+
+    def get_diet_type_id(self, name):
+        """Diyet türü adından id'yi bul, bulunamazsa None döndür"""
+        return self._reference_id('diet_types', name)
+
+    def get_diet_type_name(self, diet_type_id):
+        return self.reference_cache.get('diet_types').name_for(diet_type_id)
+
+    def get_exercise_type_id(self, name):
+        """Egzersiz türü adından id'yi bul, bulunamazsa None döndür"""
+        return self._reference_id('exercise_types', name)
+
+    def get_exercise_type_name(self, exercise_type_id):
+        return self.reference_cache.get('exercise_types').name_for(exercise_type_id)
+
+    def invalidate_reference_data(self, table=None):
+        """Referans tablo önbelleğini boşalt (tablolar değiştirildikten sonra çağrılmalı)"""
+        self.reference_cache.invalidate(table)
+
+    def _reference_id(self, table, name):
+        type_id = self.reference_cache.get(table).id_for(name)
+        if type_id is None:
+            # Tür yeni eklenmiş olabilir, sürümü hemen kontrol et
+            type_id = self.reference_cache.get(table, force_check=True).id_for(name)
+        return type_id
+
+    def _load_reference_table(self, table):
+        """Referans tablosunu veritabanından oku"""
+        if table not in REFERENCE_TABLES:
+            raise ValueError(f"Geçersiz referans tablosu: {table}")
+        query = "SELECT id, name, description FROM %s ORDER BY name" % table
+        return self._fetch_all(query)
+
+    def _reference_data_version(self):
+        """Referans tablolarının içerik özetini getir; değişiklik tespiti için kullanılır"""
+        query = """
+            SELECT
+                (SELECT md5(COALESCE(string_agg(id || ':' || name || ':' || COALESCE(description, ''),
+                                                ',' ORDER BY id), ''))
+                 FROM diet_types),
+                (SELECT md5(COALESCE(string_agg(id || ':' || name || ':' || COALESCE(description, ''),
+                                                ',' ORDER BY id), ''))
+                 FROM exercise_types)
+        """
+        return self._fetch_one(query)
+
+    def get_daily_diet_tracking(self, patient_id, date=None):
+        """Belirli bir güne ait diyet takip kayıtlarını getir"""
+        if date is None:
+            date = datetime.now().date()
+            
+        query = """
+            SELECT dt.id, dty.name, dt.status, dt.notes
+            FROM diet_tracking dt
+            JOIN diet_types dty ON dt.diet_type_id = dty.id
+            WHERE dt.patient_id = %s AND dt.date = %s
+            ORDER BY dt.id DESC
+        """
+        return self._fetch_all(query, (patient_id, date), name='get_daily_diet_tracking')
+
+    def get_daily_exercise_tracking(self, patient_id, date=None):
+        """Belirli bir güne ait egzersiz takip kayıtlarını getir"""
+        if date is None:
+            date = datetime.now().date()
+            
+        query = """
+            SELECT et.id, ety.name, et.duration, et.status, et.notes
+            FROM exercise_tracking et
+            JOIN exercise_types ety ON et.exercise_type_id = ety.id
+            WHERE et.patient_id = %s AND et.date = %s
+            ORDER BY et.id DESC
+        """
+        return self._fetch_all(query, (patient_id, date), name='get_daily_exercise_tracking')
+
+    def get_daily_measurements(self, patient_id, date=None):
+        """Belirli bir güne ait kan şekeri ölçümlerini getir"""
+        if date is None:
+            date = datetime.now().date()
+            
+        day_start, day_end = _day_range(date)
+        query = """
+            SELECT id, sugar_level, measurement_time, notes
+            FROM sugar_measurements
+            WHERE patient_id = %s 
+            AND measurement_time >= %s
+            AND measurement_time < %s
+            ORDER BY measurement_time DESC
+        """
+        return self._fetch_all(query, (patient_id, day_start, day_end), name='get_daily_measurements')
+
+    def get_measurement_statistics(self, patient_id, start_date=None, end_date=None):
+        """Belirli bir tarih aralığı için ölçüm istatistiklerini getir.
+
+        Gün olarak verilen sınırlar (bitiş günü dahil) günlük özet tablosundan
+        (daily_glucose_rollup) okunur, maliyet ölçüm değil gün sayısıyla artar.
+        Saat içeren (datetime) sınırlarda ham ölçümler taranır.
+        """
+        if isinstance(start_date, datetime) or isinstance(end_date, datetime):
+            return self._raw_measurement_statistics(patient_id, start_date, end_date)
+
+        query = """
+            SELECT 
+                COALESCE(SUM(measurement_count), 0) as total_measurements,
+                ROUND(SUM(sugar_sum) / NULLIF(SUM(measurement_count), 0), 2) as average_level,
+                MIN(min_level) as min_level,
+                MAX(max_level) as max_level,
+                COALESCE(SUM(low_count), 0) as low_count,
+                COALESCE(SUM(high_count), 0) as high_count
+            FROM daily_glucose_rollup
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+
+        if start_date:
+            query += " AND day >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND day <= %s"
+            params.append(end_date)
+
+        return self._fetch_one(query, tuple(params))
+
+    def _raw_measurement_statistics(self, patient_id, start_date=None, end_date=None):
+        query = """
+            SELECT 
+                COUNT(*) as total_measurements,
+                ROUND(AVG(sugar_level)::numeric, 2) as average_level,
+                MIN(sugar_level) as min_level,
+                MAX(sugar_level) as max_level,
+                COUNT(CASE WHEN sugar_level < 70 THEN 1 END) as low_count,
+                COUNT(CASE WHEN sugar_level > 200 THEN 1 END) as high_count
+            FROM sugar_measurements
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+        
+        if start_date:
+            query += " AND measurement_time >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND measurement_time <= %s"
+            params.append(end_date)
+            
+        return self._fetch_one(query, tuple(params))
+
+    def get_patient_alerts(self, patient_id, unread_only=False):
+        """Hastanın uyarılarını getir"""
+        query = """
+            SELECT id, alert_type, message, alert_time, priority
+            FROM alerts
+            WHERE patient_id = %s
+        """
+        if unread_only:
+            query += " AND is_read = FALSE"
+            
+        query += " ORDER BY alert_time DESC"
+        return self._fetch_all(query, (patient_id,))
+
+    def get_patient_alerts_page(self, patient_id, page_size=50, cursor=None, unread_only=False):
+        """Hastanın uyarılarını yeniden eskiye (alert_time, id) anahtarıyla sayfa sayfa getir.
+
+        Satırlar get_patient_alerts ile tamamen aynı biçimdedir; sayfa imleci
+        ilk sütundaki id ve dördüncü sütundaki alert_time'dan oluşturulur.
+        """
+        query = """
+            SELECT id, alert_type, message, alert_time, priority
+            FROM alerts
+            WHERE patient_id = %s
+        """
+        params = [patient_id]
+
+        if unread_only:
+            query += " AND is_read = FALSE"
+        if cursor:
+            query += " AND (alert_time, id) < (%s, %s)"
+            params.extend(_decode_cursor(cursor, 'alerts'))
+
+        query += " ORDER BY alert_time DESC, id DESC LIMIT %s"
+        params.append(page_size + 1)
+        return self._fetch_page(query, tuple(params), page_size, 'alerts', 3, 0)
+
+    def mark_alert_as_read(self, alert_id, alert_time=None, tx=None):
+        """Uyarıyı okundu olarak işaretle.
+
+        alert_time verilirse yalnızca uyarının bulunduğu aylık bölüm taranır.
+        """
+        query = """
+            UPDATE alerts
+            SET is_read = TRUE
+            WHERE id = %s
+        """
+        params = [alert_id]
+        if alert_time is not None:
+            query += " AND alert_time = %s"
+            params.append(alert_time)
+        return self._execute(query, tuple(params), tx=tx)
+
+    def save_alert(self, patient_id, alert_type, message, priority='normal', tx=None):
+        """Yeni uyarı ekle; e-posta bildirimleri tetikleyiciyle aynı işlemde giden kutusuna yazılır"""
+        valid_types = ['şeker_ölçümü', 'diyet_hatırlatma', 'egzersiz_hatırlatma', 
+                      'yüksek_şeker', 'düşük_şeker', 'genel',
+                      'hipoglisemi', 'hiperglisemi', 'zaman_uyarisi']
+        if alert_type not in valid_types:
+            raise ValueError(f"Geçersiz uyarı tipi. Geçerli tipler: {', '.join(valid_types)}")
+            
+        query = """
+            INSERT INTO alerts (patient_id, alert_type, message, priority)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id
+        """
+        return self._fetch_value(query, (patient_id, alert_type, message, priority), tx=tx)
+
+    def send_measurement_reminders(self, since=None, batch_size=None, notify=None, reminded_since=None):
+        """since'ten beri ölçüm girmemiş aktif hastalara ölçüm hatırlatması oluştur.
+
+        Hatırlatılacak hastalar tek bir INSERT ... SELECT ile bulunup uyarı
+        olarak yazılır; hasta sayısından bağımsız olarak sabit sayıda sorgu
+        çalışır. reminded_since'ten (verilmezse since) beri zaten hatırlatılmış
+        hastalar atlanır, bu yüzden iş tekrar çalışsa da hatırlatma çoğalmaz.
+        since verilmezse bugünün başlangıcı kullanılır. Hatırlatma e-postaları uyarılarla birlikte
+        giden kutusuna yazılır (bkz. outbox.py). notify verilirse işlem
+        onaylandıktan sonra Reminder listeleriyle batch_size'lık gruplar
+        halinde çağrılır. Oluşturulan hatırlatma sayısını döndürür.
+        """
+        if since is None:
+            since = datetime.combine(date.today(), datetime.min.time())
+        if reminded_since is None:
+            reminded_since = since
+        if batch_size is None:
+            batch_size = REMINDER_CONFIG['batch_size']
+
+        query = """
+            WITH due AS (
+                SELECT DISTINCT dp.patient_id
+                FROM doctor_patient dp
+                WHERE dp.status = 'aktif'
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM sugar_measurements sm
+                    WHERE sm.patient_id = dp.patient_id
+                    AND sm.measurement_time >= %s
+                )
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM alerts a
+                    WHERE a.patient_id = dp.patient_id
+                    AND a.alert_time >= %s
+                    AND a.alert_type = 'şeker_ölçümü'
+                )
+            ),
+            inserted AS (
+                INSERT INTO alerts (patient_id, alert_type, message, priority)
+                SELECT patient_id, 'şeker_ölçümü', %s, 'normal'
+                FROM due
+                ORDER BY patient_id
+                RETURNING id, patient_id
+            )
+            SELECT i.id, i.patient_id, u.email, CONCAT(u.name, ' ', u.surname)
+            FROM inserted i
+            JOIN users u ON u.user_id = i.patient_id
+            ORDER BY i.patient_id
+        """
+        with self.transaction() as tx:
+            tx.execute("SELECT pg_advisory_xact_lock(%s)", (REMINDER_LOCK_ID,))
+            rows = self.execute_query(query, (since, reminded_since, MEASUREMENT_REMINDER_MESSAGE), tx=tx) or []
+        logging.info("%d hastaya ölçüm hatırlatması oluşturuldu (%s sonrası)", len(rows), since)
+
+        if notify is not None:
+            for start in range(0, len(rows), batch_size):
+                notify([Reminder(*row) for row in rows[start:start + batch_size]])
+        return len(rows)
+
+    def send_weekly_reports(self, week_start=None, send=None):
+        """Haftalık raporları oluştur ve teslim et (bkz. weekly_reports.WeeklyReportJob)"""
+        # weekly_reports bu modülü içe aktardığından döngüsel içe aktarmayı önlemek için burada yüklenir
+        from weekly_reports import WeeklyReportJob
+        return WeeklyReportJob(self).run(week_start, send=send)
+
+    def get_report_doctors(self):
+        """Aktif hastası olan doktorları (user_id, tc, ad soyad, e-posta) getir"""
+        query = """
+            SELECT u.user_id, u.tc, CONCAT(u.name, ' ', u.surname), u.email
+            FROM users u
+            WHERE u.user_type = 'doctor'
+            AND EXISTS (
+                SELECT 1
+                FROM doctor_patient dp
+                WHERE dp.doctor_id = u.user_id
+                AND dp.status = 'aktif'
+            )
+            ORDER BY u.user_id
+        """
+        return self._fetch_all(query)
+
+    def get_completed_weekly_report_doctors(self, week_start):
+        """Haftalık raporları o hafta için zaten oluşturulmuş doktorların kimlikleri"""
+        query = """
+            SELECT doctor_id
+            FROM weekly_reports
+            WHERE week_start = %s
+            AND patient_id IS NULL
+        """
+        return [row[0] for row in self._fetch_all(query, (week_start,))]
+
+    def save_weekly_reports(self, week_start, doctor_id, reports):
+        """Bir doktorun haftalık raporlarını tek işlemde kaydet.
+
+        reports (patient_id, özet sözlüğü, PNG grafik) demetleridir; kohort
+        özeti için patient_id None'dır.
+        """
+        rows = [
+            (week_start, doctor_id, patient_id, json.dumps(summary, ensure_ascii=False), chart)
+            for patient_id, summary, chart in reports
+        ]
+        return self._bulk_insert('weekly_reports', ('week_start', 'doctor_id', 'patient_id', 'summary', 'chart'),
+                                 rows)
+
+    def claim_weekly_reports(self, limit, lease_seconds, max_age_days):
+        """Teslim zamanı gelmiş raporları alıcılarıyla birlikte sahiplen.
+
+        Hangi haftaya ait olursa olsun son max_age_days gün içindeki kuyruktaki
+        raporlar FOR UPDATE SKIP LOCKED ile seçilir; deneme sayısı artırılır ve
+        sıradaki deneme lease_seconds sonrasına ertelenir. Sorgu kendi işleminde
+        onaylanır, böylece gönderim sırasında kilit tutulmaz; teslim yarım
+        kalırsa raporlar süre dolunca yeniden alınır. Son sütun bu sahiplenme
+        dahil deneme sayısıdır.
+        """
+        query = """
+            UPDATE weekly_reports wr
+            SET attempts = wr.attempts + 1,
+                next_attempt_at = NOW() + %s * INTERVAL '1 second'
+            FROM (
+                SELECT id
+                FROM weekly_reports
+                WHERE status = 'kuyrukta'
+                AND next_attempt_at <= NOW()
+                AND week_start >= CURRENT_DATE - %s
+                ORDER BY next_attempt_at, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ) due, users u
+            WHERE wr.id = due.id
+            AND u.user_id = COALESCE(wr.patient_id, wr.doctor_id)
+            RETURNING
+                wr.id,
+                wr.doctor_id,
+                wr.patient_id,
+                u.email,
+                CONCAT(u.name, ' ', u.surname),
+                wr.summary,
+                wr.chart,
+                wr.attempts
+        """
+        return self._fetch_all(query, (lease_seconds, max_age_days, limit)) or []
+
+    def mark_weekly_reports_sent(self, report_ids, tx=None):
+        """Raporları gönderildi olarak işaretle"""
+        query = """
+            UPDATE weekly_reports
+            SET status = 'gönderildi', sent_at = NOW()
+            WHERE id = ANY(%s)
+        """
+        return self._execute(query, (list(report_ids),), tx=tx)
+
+    def fail_weekly_reports(self, failures, tx=None):
+        """Gönderilemeyen raporları yeniden denemeye ertele ya da kalıcı başarısız say.
+
+        failures (id, bekleme saniyesi, hata) listesidir; bekleme None ise
+        rapor 'başarısız' durumuna alınır ve bir daha denenmez.
+        """
+        if not failures:
+            return
+        ids, delays, errors = (list(column) for column in zip(*failures))
+        query = """
+            UPDATE weekly_reports wr
+            SET status = CASE WHEN f.delay IS NULL THEN 'başarısız' ELSE wr.status END,
+                next_attempt_at = CASE WHEN f.delay IS NULL THEN wr.next_attempt_at
+                                       ELSE NOW() + f.delay * INTERVAL '1 second' END,
+                last_error = f.error
+            FROM unnest(%s::int[], %s::float8[], %s::text[]) AS f(id, delay, error)
+            WHERE wr.id = f.id
+        """
+        self._execute(query, (ids, delays, errors), tx=tx)
+
+    def claim_notifications(self, limit, lease_seconds):
+        """Teslim zamanı gelmiş bildirimleri alıcılarının e-postasıyla birlikte sahiplen.
+
+        Satırlar FOR UPDATE SKIP LOCKED ile seçilir; deneme sayısı artırılır
+        ve sıradaki deneme lease_seconds sonrasına ertelenir. Sorgu kendi
+        işleminde onaylandığından aynı anda çalışan işçiler aynı bildirimi
+        almaz; sahiplenen işçi sonucu yazmadan çökerse bildirim süre dolunca
+        yeniden teslim edilir. (id, alıcı, e-posta, konu, metin, deneme) listesi
+        döndürür.
+        """
+        query = """
+            UPDATE notification_outbox o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = NOW() + %s * INTERVAL '1 second'
+            FROM (
+                SELECT id
+                FROM notification_outbox
+                WHERE status = 'bekliyor'
+                AND next_attempt_at <= NOW()
+                ORDER BY next_attempt_at, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ) due, users u
+            WHERE o.id = due.id
+            AND u.user_id = o.recipient_id
+            RETURNING o.id, o.recipient_id, u.email, o.subject, o.body, o.attempts
+        """
+        return self._fetch_all(query, (lease_seconds, limit), name='claim_notifications') or []
+
+    def mark_notifications_sent(self, notification_ids, tx=None):
+        """Bildirimleri gönderildi olarak işaretle"""
+        query = """
+            UPDATE notification_outbox
+            SET status = 'gönderildi', sent_at = NOW(), last_error = NULL
+            WHERE id = ANY(%s)
+        """
+        self._execute(query, (list(notification_ids),), tx=tx)
+
+    def fail_notifications(self, failures, tx=None):
+        """Gönderilemeyen bildirimleri yeniden denemeye ertele ya da kalıcı başarısız say.
+
+        failures (id, bekleme saniyesi, hata) listesidir; bekleme None ise
+        bildirim 'başarısız' durumuna alınır ve bir daha denenmez.
+        """
+        if not failures:
+            return
+        ids, delays, errors = (list(column) for column in zip(*failures))
+        query = """
+            UPDATE notification_outbox o
+            SET status = CASE WHEN f.delay IS NULL THEN 'başarısız' ELSE o.status END,
+                next_attempt_at = CASE WHEN f.delay IS NULL THEN o.next_attempt_at
+                                       ELSE NOW() + f.delay * INTERVAL '1 second' END,
+                last_error = f.error
+            FROM unnest(%s::bigint[], %s::float8[], %s::text[]) AS f(id, delay, error)
+            WHERE o.id = f.id
+        """
+        self._execute(query, (ids, delays, errors), tx=tx)
+
+    def requeue_failed_notifications(self, notification_ids=None):
+        """Başarısız bildirimleri (ya da verilenleri) deneme sayısı sıfırlanmış olarak yeniden kuyruğa al"""
+        condition = ""
+        params = None
+        if notification_ids is not None:
+            condition = "AND id = ANY(%s)"
+            params = (list(notification_ids),)
+        query = f"""
+            WITH requeued AS (
+                UPDATE notification_outbox
+                SET status = 'bekliyor', attempts = 0, next_attempt_at = NOW()
+                WHERE status = 'başarısız'
+                {condition}
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM requeued
+        """
+        return self._fetch_value(query, params, default=0)
+
+    def get_outbox_counts(self):
+        """Giden kutusundaki bildirim sayılarını duruma göre getir"""
+        query = """
+            SELECT status, COUNT(*)
+            FROM notification_outbox
+            GROUP BY status
+        """
+        return dict(self._fetch_all(query))
+
+    def delete_sent_notifications(self, older_than_days):
+        """older_than_days günden eski gönderilmiş bildirimleri sil, silinen sayısını döndür"""
+        query = """
+            WITH deleted AS (
+                DELETE FROM notification_outbox
+                WHERE status = 'gönderildi'
+                AND sent_at < NOW() - %s * INTERVAL '1 day'
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM deleted
+        """
+        return self._fetch_value(query, (older_than_days,), default=0)
+
+    def get_insulin_recommendation(self, sugar_level, meal_time, tx=None):
+        """Şeker seviyesi ve öğün durumuna göre insülin önerisini getir"""
+        query = """
+            SELECT insulin_type, base_units, unit_per_carb, notes
+            FROM insulin_recommendations
+            WHERE %s BETWEEN min_sugar AND max_sugar
+            AND meal_time = %s
+            ORDER BY min_sugar
+            LIMIT 1
+        """
+        return self._fetch_all(query, (sugar_level, meal_time), tx=tx)
+
+    def save_insulin_record(self, patient_id, measurement_id, insulin_type, units, notes=None,
+                            given_time=None, tx=None):
+        """Uygulanan insülin dozunu kaydet"""
+        if given_time is None:
+            given_time = datetime.now()
+
+        query = """
+            INSERT INTO insulin_records
+            (patient_id, measurement_id, insulin_type, units, given_time, notes)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """
+        return self._fetch_value(
+            query, (patient_id, measurement_id, insulin_type, units, given_time, notes), tx=tx
+        )
+
+    def get_profile_image(self, user_id):
+        """Kullanıcının profil resmini getir"""
+        query = """
+            SELECT profile_image, profile_image_type
+            FROM users
+            WHERE user_id = %s
+        """
+        result = self.execute_query(query, (user_id,))
+        if result and result[0][0] is not None:
+            return result[0][0], result[0][1]  # image_data, image_type
+        return None, None
+
+    def save_profile_image(self, user_id, image_data, image_type):
+        """Kullanıcının profil resmini kaydet"""
+        query = """
+            UPDATE users
+            SET profile_image = %s, profile_image_type = %s
+            WHERE user_id = %s
+        """
+        result = self._execute(query, (image_data, image_type, user_id))
+        self.invalidate_user(user_id)
+        return result
+
+    def delete_profile_image(self, user_id):
+        """Kullanıcının profil resmini sil"""
+        query = """
+            UPDATE users
+            SET profile_image = NULL, profile_image_type = NULL
+            WHERE user_id = %s
+        """
+        result = self._execute(query, (user_id,))
+        self.invalidate_user(user_id)
+        return result
+
+    def get_patient_summary(self, patient_id):
+        """Hastanın özet bilgilerini getir"""
+        return self.get_patient_summaries([patient_id])[patient_id]
+
+    def get_patient_summaries(self, patient_ids):
+        """Birden fazla hastanın özetini tek sorguda getir.
+
+        {patient_id: {'stats', 'last_diet', 'last_exercise'}} sözlüğü döner;
+        her özet get_patient_summary ile aynı biçimdedir.
+        """
+        patient_ids = list(dict.fromkeys(patient_ids))
+        if not patient_ids:
+            return {}
+        rows = self._fetch_all(self._patient_summaries_query(), (patient_ids,),
+                               name='get_patient_summaries')
+        return self._patient_summaries_from_rows(rows)
+
+    def _patient_summaries_query(self):
+        # Son 7 günlük istatistikler günlük özetten, son diyet ve egzersiz
+        # kayıtları hasta başına LATERAL alt sorgularla (LIMIT 1) okunur
+        return """
+            SELECT 
+                p.patient_id,
+                s.total_measurements,
+                s.avg_sugar_level,
+                s.low_count,
+                s.high_count,
+                d.date,
+                d.diet_type,
+                d.status,
+                e.date,
+                e.exercise_type,
+                e.duration,
+                e.status
+            FROM unnest(%s::integer[]) AS p (patient_id)
+            CROSS JOIN LATERAL (
+                SELECT 
+                    COALESCE(SUM(measurement_count), 0) as total_measurements,
+                    ROUND(SUM(sugar_sum) / NULLIF(SUM(measurement_count), 0), 2) as avg_sugar_level,
+                    COALESCE(SUM(low_count), 0) as low_count,
+                    COALESCE(SUM(high_count), 0) as high_count
+                FROM daily_glucose_rollup
+                WHERE patient_id = p.patient_id
+                AND day >= CURRENT_DATE - 7
+            ) s
+            LEFT JOIN LATERAL (
+                SELECT 
+                    dt.date,
+                    dty.name as diet_type,
+                    dt.status
+                FROM diet_tracking dt
+                JOIN diet_types dty ON dt.diet_type_id = dty.id
+                WHERE dt.patient_id = p.patient_id
+                ORDER BY dt.date DESC, dt.id DESC
+                LIMIT 1
+            ) d ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT 
+                    et.date,
+                    ety.name as exercise_type,
+                    et.duration,
+                    et.status
+                FROM exercise_tracking et
+                JOIN exercise_types ety ON et.exercise_type_id = ety.id
+                WHERE et.patient_id = p.patient_id
+                ORDER BY et.date DESC, et.id DESC
+                LIMIT 1
+            ) e ON TRUE
+        """
+
+    @staticmethod
+    def _patient_summaries_from_rows(rows):
+        summaries = {}
+        for row in rows or ():
+            summaries[row[0]] = {
+                'stats': tuple(row[1:5]),
+                # Kayıt yoksa LEFT JOIN tüm sütunları NULL döndürür
+                'last_diet': tuple(row[5:8]) if row[5] is not None else None,
+                'last_exercise': tuple(row[8:12]) if row[8] is not None else None
+            }
+        return summaries
+
+    def get_doctor_patients_count(self, doctor_id):
+        """Doktorun toplam hasta sayısını getir"""
+        query = """
+            SELECT COUNT(*)
+            FROM doctor_patient
+            WHERE doctor_id = %s AND status = 'aktif'
+        """
+        return self._fetch_value(query, (doctor_id,), default=0, name='get_doctor_patients_count')
+
+    def get_daily_measurements_count(self, doctor_id):
+        """Doktorun hastalarının günlük toplam ölçüm sayısını getir"""
+        query = """
+            SELECT COUNT(*)
+            FROM sugar_measurements sm
+            JOIN doctor_patient dp ON sm.patient_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            AND sm.measurement_time >= CURRENT_DATE
+            AND sm.measurement_time < CURRENT_DATE + 1
+        """
+        return self._fetch_value(query, (doctor_id,), default=0, name='get_daily_measurements_count')
+
+    def get_critical_patients_count(self, doctor_id):
+        """Kritik değerlerde ölçümü olan hasta sayısını getir"""
+        query = """
+            SELECT COUNT(DISTINCT dp.patient_id)
+            FROM doctor_patient dp
+            JOIN sugar_measurements sm ON dp.patient_id = sm.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            AND sm.measurement_time >= CURRENT_DATE
+            AND sm.measurement_time < CURRENT_DATE + 1
+            AND (sm.sugar_level < 70 OR sm.sugar_level > 180)
+        """
+        return self._fetch_value(query, (doctor_id,), default=0, name='get_critical_patients_count')
+
+    def get_doctor_patients_weekly_averages(self, doctor_id):
+        """Doktorun hastalarının haftalık ortalama şeker değerlerini getir"""
+        query = """
+            SELECT 
+                r.day as measure_date,
+                ROUND(SUM(r.sugar_sum) / SUM(r.measurement_count), 2)
+            FROM daily_glucose_rollup r
+            JOIN doctor_patient dp ON r.patient_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            AND r.day >= CURRENT_DATE - 7
+            GROUP BY r.day
+            ORDER BY r.day
+        """
+        return self._fetch_all(query, (doctor_id,), name='get_doctor_patients_weekly_averages')
+
+    def get_doctor_recent_measurements(self, doctor_id, limit=10):
+        """Doktorun hastalarının son ölçümlerini getir"""
+        query = """
+            SELECT 
+                u.tc,
+                CONCAT(u.name, ' ', u.surname) as full_name,
+                sm.measurement_time,
+                sm.sugar_level,
+                CASE 
+                    WHEN sm.sugar_level < 70 THEN 'Düşük'
+                    WHEN sm.sugar_level > 180 THEN 'Yüksek'
+                    ELSE 'Normal'
+                END as status
+            FROM sugar_measurements sm
+            JOIN doctor_patient dp ON sm.patient_id = dp.patient_id
+            JOIN users u ON dp.patient_id = u.user_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            ORDER BY sm.measurement_time DESC
+            LIMIT %s
+        """
+        return self._fetch_all(query, (doctor_id, limit), name='get_doctor_recent_measurements')
+
+    def get_doctor_recent_measurements_page(self, doctor_id, page_size=20, cursor=None):
+        """Doktorun hastalarının ölçümlerini yeniden eskiye sayfa sayfa getir.
+
+        Satırlar get_doctor_recent_measurements ile aynı biçimdedir, sonlarına
+        ölçüm id'si eklenir. Her hasta için yalnızca imlecin ardındaki ilk
+        page_size + 1 ölçüm indeksten okunur (LATERAL), bu yüzden sayfa maliyeti
+        hasta sayısıyla artar ama sayfa derinliğiyle artmaz.
+        """
+        cursor_filter = ""
+        params = []
+        if cursor:
+            cursor_filter = "AND (measurement_time, id) < (%s, %s)"
+            params.extend(_decode_cursor(cursor, 'doctor_measurements'))
+        params.extend([page_size + 1, doctor_id, page_size + 1])
+
+        query = """
+            SELECT 
+                u.tc,
+                CONCAT(u.name, ' ', u.surname) as full_name,
+                sm.measurement_time,
+                sm.sugar_level,
+                CASE 
+                    WHEN sm.sugar_level < 70 THEN 'Düşük'
+                    WHEN sm.sugar_level > 180 THEN 'Yüksek'
+                    ELSE 'Normal'
+                END as status,
+                sm.id
+            FROM doctor_patient dp
+            CROSS JOIN LATERAL (
+                SELECT id, measurement_time, sugar_level
+                FROM sugar_measurements
+                WHERE patient_id = dp.patient_id
+                %s
+                ORDER BY measurement_time DESC, id DESC
+                LIMIT %%s
+            ) sm
+            JOIN users u ON dp.patient_id = u.user_id
+            WHERE dp.doctor_id = %%s 
+            AND dp.status = 'aktif'
+            ORDER BY sm.measurement_time DESC, sm.id DESC
+            LIMIT %%s
+        """ % cursor_filter
+        return self._fetch_page(query, tuple(params), page_size, 'doctor_measurements', 2, 5)
+
+    def get_doctor_dashboard_snapshot(self, doctor_id, recent_limit=10):
+        """Doktor panosunun tüm verilerini tek sorgu ve tek gidiş-dönüşle getir.
+
+        Aktif hasta kümesi bir kez okunur; sayılar, haftalık ortalamalar ve son
+        ölçümler aynı kümeden hesaplanır. Listeler get_doctor_patients_weekly_averages
+        ve get_doctor_recent_measurements ile aynı satır biçimindedir.
+        """
+        row = self._fetch_one(self._doctor_dashboard_query(), (doctor_id, recent_limit, recent_limit),
+                              name='get_doctor_dashboard_snapshot')
+        return self._doctor_dashboard_from_row(row)
+
+    def _doctor_dashboard_query(self):
+        # Birden fazla kez kullanılan "active" CTE'si bir kez hesaplanır (materialize)
+        return """
+            WITH active AS (
+                SELECT patient_id
+                FROM doctor_patient
+                WHERE doctor_id = %s
+                AND status = 'aktif'
+            ),
+            today AS (
+                SELECT sm.patient_id, sm.sugar_level
+                FROM active a
+                JOIN sugar_measurements sm ON sm.patient_id = a.patient_id
+                WHERE sm.measurement_time >= CURRENT_DATE
+                AND sm.measurement_time < CURRENT_DATE + 1
+            ),
+            weekly AS (
+                SELECT r.day, ROUND(SUM(r.sugar_sum) / SUM(r.measurement_count), 2) AS avg_sugar
+                FROM active a
+                JOIN daily_glucose_rollup r ON r.patient_id = a.patient_id
+                WHERE r.day >= CURRENT_DATE - 7
+                GROUP BY r.day
+            ),
+            recent AS (
+                SELECT 
+                    u.tc,
+                    CONCAT(u.name, ' ', u.surname) as full_name,
+                    sm.measurement_time,
+                    sm.sugar_level
+                FROM active a
+                CROSS JOIN LATERAL (
+                    SELECT measurement_time, sugar_level
+                    FROM sugar_measurements
+                    WHERE patient_id = a.patient_id
+                    ORDER BY measurement_time DESC
+                    LIMIT %s
+                ) sm
+                JOIN users u ON u.user_id = a.patient_id
+                ORDER BY sm.measurement_time DESC
+                LIMIT %s
+            )
+            SELECT
+                (SELECT COUNT(*) FROM active),
+                (SELECT COUNT(*) FROM today),
+                (SELECT COUNT(DISTINCT patient_id) FROM today
+                 WHERE sugar_level < 70 OR sugar_level > 180),
+                (SELECT json_agg(json_build_array(day, avg_sugar::text) ORDER BY day)
+                 FROM weekly),
+                (SELECT json_agg(json_build_array(
+                            tc, full_name,
+                            to_char(measurement_time, 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                            sugar_level::text)
+                        ORDER BY measurement_time DESC)
+                 FROM recent)
+        """
+
+    @staticmethod
+    def _doctor_dashboard_from_row(row):
+        if row is None:
+            return DoctorDashboard(0, 0, 0, [], [])
+        patient_count, daily_count, critical_count, weekly, recent = row
+        # Tarih ve sayılar JSON içinde metin olarak gelir, burada asıl tiplerine çevrilir
+        weekly_averages = [
+            (date.fromisoformat(day), Decimal(avg_sugar)) for day, avg_sugar in weekly or ()
+        ]
+        recent_measurements = []
+        for tc, full_name, measurement_time, sugar_level in recent or ():
+            sugar_level = Decimal(sugar_level)
+            if sugar_level < 70:
+                status = 'Düşük'
+            elif sugar_level > 180:
+                status = 'Yüksek'
+            else:
+                status = 'Normal'
+            recent_measurements.append((
+                tc, full_name, datetime.fromisoformat(measurement_time), sugar_level, status
+            ))
+        return DoctorDashboard(patient_count, daily_count, critical_count,
+                               weekly_averages, recent_measurements)
+
+    def get_doctor_measurement_arrays(self, doctor_id, start_date=None, end_date=None):
+        """Doktorun aktif hastalarının ölçümlerini hasta ve zaman sırasıyla NumPy dizileri olarak getir"""
+        query = """
+            SELECT 
+                sm.patient_id::int4,
+                EXTRACT(EPOCH FROM sm.measurement_time)::int8,
+                sm.sugar_level::float4
+            FROM doctor_patient dp
+            JOIN sugar_measurements sm ON sm.patient_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+        """
+        params = [doctor_id]
+
+        if start_date:
+            query += " AND sm.measurement_time >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND sm.measurement_time <= %s"
+            params.append(end_date)
+
+        query += " ORDER BY sm.patient_id, sm.measurement_time"
+        arrays = self.fetch_columns(query, tuple(params), [
+            ('patient_ids', 'int4'), ('times', 'int8'), ('levels', 'float4')
+        ])
+        return DoctorMeasurementArrays(arrays['patient_ids'], arrays['times'], arrays['levels'])
+
+    def get_doctor_daily_arrays(self, doctor_id, start_date=None, end_date=None):
+        """Doktorun aktif hastalarının günlük özetlerini NumPy dizileri olarak getir.
+
+        days 1970-01-01'den itibaren gün sayısıdır (int32); bitiş günü dahildir.
+        """
+        query = """
+            SELECT 
+                r.patient_id::int4,
+                (r.day - DATE '1970-01-01')::int4,
+                r.measurement_count::int4,
+                (r.sugar_sum / r.measurement_count)::float4,
+                r.min_level::float4,
+                r.max_level::float4,
+                r.low_count::int4,
+                r.high_count::int4
+            FROM doctor_patient dp
+            JOIN daily_glucose_rollup r ON r.patient_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+        """
+        params = [doctor_id]
+
+        if start_date:
+            query += " AND r.day >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND r.day <= %s"
+            params.append(end_date)
+
+        query += " ORDER BY r.patient_id, r.day"
+        arrays = self.fetch_columns(query, tuple(params), [
+            ('patient_ids', 'int4'), ('days', 'int4'), ('counts', 'int4'), ('means', 'float4'),
+            ('mins', 'float4'), ('maxs', 'float4'), ('low_counts', 'int4'), ('high_counts', 'int4')
+        ])
+        return DailyRollupArrays(**arrays)
+
+    def get_doctor_report_counts(self, doctor_id, start_date, end_date):
+        """Rapor dönemi için hasta başına diyet/egzersiz uyumu ve uyarı sayılarını getir.
+
+        Satırlar (patient_id, tc, ad soyad, diyet uygulanan gün, egzersiz
+        yapılan gün, uyarı sayısı, kritik uyarı sayısı) biçimindedir; tarih
+        aralığının iki ucu da dahildir.
+        """
+        day_start, _ = _day_range(start_date)
+        _, day_end = _day_range(end_date)
+        query = """
+            SELECT 
+                u.user_id,
+                u.tc,
+                CONCAT(u.name, ' ', u.surname) as full_name,
+                COALESCE(d.done_days, 0),
+                COALESCE(e.done_days, 0),
+                COALESCE(a.alert_count, 0),
+                COALESCE(a.critical_count, 0)
+            FROM doctor_patient dp
+            JOIN users u ON u.user_id = dp.patient_id
+            LEFT JOIN LATERAL (
+                SELECT COUNT(DISTINCT date) as done_days
+                FROM diet_tracking
+                WHERE patient_id = dp.patient_id
+                AND date BETWEEN %s AND %s
+                AND status = 'uygulandı'
+            ) d ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT COUNT(DISTINCT date) as done_days
+                FROM exercise_tracking
+                WHERE patient_id = dp.patient_id
+                AND date BETWEEN %s AND %s
+                AND status = 'yapıldı'
+            ) e ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT 
+                    COUNT(*) as alert_count,
+                    COUNT(*) FILTER (WHERE alert_type IN ('hipoglisemi', 'hiperglisemi',
+                                                          'düşük_şeker', 'yüksek_şeker')) as critical_count
+                FROM alerts
+                WHERE patient_id = dp.patient_id
+                AND alert_time >= %s
+                AND alert_time < %s
+            ) a ON TRUE
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            ORDER BY u.user_id
+        """
+        params = (start_date, end_date, start_date, end_date, day_start, day_end, doctor_id)
+        return self._fetch_all(query, params)
+
+    def get_doctor_patients_list(self, doctor_id):
+        """Doktorun hasta listesini detaylı bilgilerle getir"""
+        return self._fetch_all(self._doctor_patients_list_query(), (doctor_id,))
+
+    def iter_doctor_patients_list(self, doctor_id, chunk_size=500):
+        """Doktorun detaylı hasta listesini parça parça getir"""
+        return self.iter_query(self._doctor_patients_list_query(), (doctor_id,), chunk_size=chunk_size)
+
+    def _doctor_patients_list_query(self):
+        return """
+            SELECT 
+                u.tc,
+                u.name,
+                u.surname,
+                u.birth_date,
+                u.gender,
+                u.email,
+                u.phone,
+                dp.created_at as start_date
+            FROM users u
+            JOIN doctor_patient dp ON u.user_id = dp.patient_id
+            WHERE dp.doctor_id = %s 
+            AND dp.status = 'aktif'
+            ORDER BY u.surname, u.name
+        """
+
+
+# AsyncDatabaseManager'ın SQL'i tekrar yazmadan devraldığı sorgu metotları
+SHARED_QUERY_METHODS = (
+    'get_user_by_tc', 'get_user_by_id',
+    'get_doctor_patients', '_doctor_patients_query',
+    'get_patient_measurements', '_patient_measurements_query',
+    'save_sugar_measurement', 'save_diet_tracking', 'save_exercise_tracking',
+    'update_diet_tracking', 'update_exercise_tracking',
+    '_load_reference_table',
+    'get_daily_diet_tracking', 'get_daily_exercise_tracking', 'get_daily_measurements',
+    'get_patient_measurements_page', 'get_patient_alerts_page',
+    'get_doctor_recent_measurements_page',
+    'get_measurement_statistics', '_raw_measurement_statistics',
+    'get_patient_alerts', 'mark_alert_as_read', 'save_alert',
+    'get_insulin_recommendation', 'save_insulin_record',
+    'save_profile_image', 'delete_profile_image',
+    'get_doctor_patients_count', 'get_daily_measurements_count', 'get_critical_patients_count',
+    'get_doctor_patients_weekly_averages', 'get_doctor_recent_measurements',
+    '_doctor_dashboard_query', '_patient_summaries_query', 'get_doctor_report_counts',
+    'get_doctor_patients_list', '_doctor_patients_list_query',
+)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Uzun kan şekeri serilerini çizimden önce seyrelten yardımcılar.
+
+Ekranda piksel sütunundan fazla nokta çizmek grafiği hem yavaşlatır hem de
+okunmaz hale getirir. Buradaki fonksiyonlar (times, levels) dizilerini
+(bkz. glycemic_analytics) point_budget() ile hesaplanan nokta sayısına indirir:
+
+    minmax_downsample -- her zaman kovasının en düşük ve en yüksek noktası;
+                         tepe ve çukurlar kaybolmaz, çok hızlıdır
+    lttb              -- Largest-Triangle-Three-Buckets; eğrinin görsel
+                         şeklini en iyi koruyan noktaları seçer
+
+İki yöntemde de hedef aralık dışına çıkan (hipo/hiper) kovaların uç
+noktaları sonuca eklenir, bu yüzden çıktı bütçeyi bu noktalar kadar aşabilir.
+Aynı seyreltme veritabanı tarafında
+DatabaseManager.get_patient_measurements_downsampled ile de yapılabilir.
+"""
+
+import numpy as np
+
+from glycemic_analytics import HIGH, LOW
+
+# Piksel sütunu başına çizilecek nokta sayısı (min/max kovası iki nokta verir)
+POINTS_PER_PIXEL = 2
+MIN_POINTS = 50
+
+
+def point_budget(width_px, points_per_pixel=POINTS_PER_PIXEL):
+    """Çizim alanının piksel genişliğine göre nokta bütçesi"""
+    return max(MIN_POINTS, int(width_px * points_per_pixel))
+
+
+def axes_point_budget(ax, points_per_pixel=POINTS_PER_PIXEL):
+    """Matplotlib eksen alanının (Axes) genişliğine göre nokta bütçesi"""
+    return point_budget(ax.bbox.width, points_per_pixel)
+
+
+def _time_buckets(times, bucket_count):
+    """Artan zamanları eşit süreli kovalara ayır; her noktanın kova numarası"""
+    times = np.asarray(times, dtype=np.int64)
+    span = int(times[-1] - times[0]) + 1
+    return (times - times[0]) * bucket_count // span
+
+
+def _bucket_extremes(levels, buckets):
+    """Her kovanın en düşük ve en yüksek değerli noktasının indeksleri"""
+    order = np.lexsort((levels, buckets))
+    sorted_buckets = buckets[order]
+    first = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    last = np.r_[first[1:] - 1, sorted_buckets.size - 1]
+    return order[first], order[last]
+
+
+def _excursions(levels, buckets, low=LOW, high=HIGH):
+    """Hedef aralık dışına çıkan kovalarda en uç noktaların indeksleri"""
+    lowest, highest = _bucket_extremes(levels, buckets)
+    return np.union1d(lowest[levels[lowest] < low], highest[levels[highest] > high])
+
+
+def minmax_downsample(times, levels, max_points):
+    """Seriyi her kovanın en düşük ve en yüksek noktasıyla max_points'e indir"""
+    times = np.asarray(times)
+    levels = np.asarray(levels)
+    if levels.size <= max_points:
+        return times, levels
+    buckets = _time_buckets(times, max(1, max_points // 2))
+    lowest, highest = _bucket_extremes(levels, buckets)
+    keep = np.union1d(lowest, highest)
+    return times[keep], levels[keep]
+
+
+def lttb(times, levels, max_points, low=LOW, high=HIGH):
+    """Largest-Triangle-Three-Buckets ile seriyi max_points noktaya indir.
+
+    İlk ve son nokta her zaman korunur. Aradaki noktalar eşit sayıda noktadan
+    oluşan kovalara ayrılır; her kovadan, bir önceki seçilen nokta ile sonraki
+    kovanın ortalaması arasında en büyük üçgeni oluşturan nokta seçilir.
+    Seçim sıralı olduğundan döngü kova sayısı kadardır, kova içi hesaplar
+    vektöreldir.
+    """
+    times = np.asarray(times)
+    levels = np.asarray(levels)
+    size = levels.size
+    if size <= max_points or max_points < 3:
+        return times, levels
+
+    x = (times - times[0]).astype(np.float64)
+    y = levels.astype(np.float64)
+    edges = np.linspace(1, size - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = size - 1, size
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        # Önceki nokta, kovadaki aday ve sonraki kovanın ortalamasının üçgen alanı (x2)
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    # Hipo/hiper uçları, LTTB onları seçmemiş olsa da korunur
+    buckets = np.searchsorted(edges, np.arange(size), side='right')
+    keep = np.union1d(selected, _excursions(levels, buckets, low, high))
+    return times[keep], levels[keep]
+
+
+def downsample(times, levels, max_points, method='lttb'):
+    """Seriyi seçilen yöntemle (lttb ya da minmax) max_points noktaya indir"""
+    if method == 'lttb':
+        return lttb(times, levels, max_points)
+    if method == 'minmax':
+        return minmax_downsample(times, levels, max_points)
+    raise ValueError(f"Geçersiz seyreltme yöntemi: {method}")
@@ -1,4 +1,454 @@
-# -*- coding: utf-8 -*-
-
-import smtplib
-# ... rest of the existing code ... 
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""Kalıcı SMTP bağlantı havuzu üzerinden kuyruklu, toplu e-posta gönderimi.
+
+İletiler sınırlı bir kuyruğa alınır ve iş parçacıkları tarafından
+gönderilir. Her iş parçacığı kuyruktan batch_size kadar iletiyi birlikte
+alır, havuzdan kimliği doğrulanmış açık bir bağlantı ödünç alıp hepsini
+aynı oturumda gönderir; her ileti için yeniden bağlanma, TLS el sıkışması
+ve kimlik doğrulama yapılmaz. Aynı partide aynı alıcıya giden birden fazla
+ileti tek bir ileti halinde birleştirilir.
+
+send() bir Future döndürür; ileti gönderilince sonucu None olur, alıcı ya
+da sunucu reddederse hatayı taşır. Kuyruk doluysa send() yer açılana kadar
+bekler (geri basınç). Gönderilmeye başlanmadan iptal edilen (bkz.
+wait_for) iletiler gönderilmez.
+
+Kullanım:
+    mailer = EmailManager.get_instance()
+    mailer.send('hasta@example.com', 'Konu', 'Metin').result()
+    sent, failed = mailer.send_many([OutgoingEmail(...), ...])
+"""
+
+import logging
+import queue
+import random
+import smtplib
+import ssl
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+from config import EMAIL_CONFIG
+from query_stats import LatencyHistogram
+
+OutgoingEmail = namedtuple('OutgoingEmail', 'to subject body attachments')
+OutgoingEmail.__new__.__defaults__ = ((),)
+Attachment = namedtuple('Attachment', 'filename content maintype subtype')
+
+# Birleştirilen iletilerin gövdeleri arasına konan ayraç
+_DIGEST_SEPARATOR = "\n\n" + "-" * 40 + "\n\n"
+
+
+class SendTimeoutError(Exception):
+    """İletinin gönderimi verilen süre içinde tamamlanmadı"""
+
+
+def wait_for(future, deadline):
+    """Gönderimin sonucunu deadline'a (time.monotonic) kadar bekle; hatayı ya da None döndür.
+
+    Süre dolarsa ileti henüz gönderilmeye başlanmadıysa iptal edilir ve
+    SendTimeoutError döndürülür; ileti gönderilmemiş sayılıp yeniden
+    denenmelidir.
+    """
+    try:
+        return future.exception(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        return SendTimeoutError("E-posta gönderimi süresi içinde tamamlanmadı")
+
+
+def backoff_delay(attempts, base, maximum):
+    """attempts. denemeden sonraki bekleme süresi (saniye).
+
+    Süre her denemede iki katına çıkar (en fazla maximum); aynı anda
+    başarısız olan iletiler aynı anda yeniden denenmesin diye yarısına kadar
+    rastgele kısaltılır.
+    """
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def is_permanent(error):
+    """Sunucunun 5xx ile reddettiği iletiler kalıcı hatadır; yeniden denemek sonucu değiştirmez.
+
+    Kimlik doğrulama hataları iletiye değil ayarlara bağlı olduğundan
+    yeniden denenir.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _connection_lost(error):
+    """Hata bağlantının koptuğunu mu gösteriyor?
+
+    smtplib.SMTPException bir OSError alt sınıfıdır; sunucunun bir komutu
+    reddetmesi (kimlik doğrulama, RSET yanıtı vb.) bağlantı kopması sayılmaz.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class _PooledConnection:
+    """Havuzdaki bir SMTP oturumu ve kullanım bilgisi"""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Kimliği doğrulanmış, kalıcı SMTP bağlantılarından oluşan havuz.
+
+    Aynı anda en fazla size bağlantı açık olur. Uzun süre boşta kalan
+    bağlantı kullanılmadan önce NOOP ile denenir; max_messages iletiden
+    sonra bağlantı kapatılıp yenisi açılır.
+    """
+
+    def __init__(self, host, port, username=None, password=None, starttls=False, use_ssl=False,
+                 timeout=30.0, size=4, max_messages=0, idle_check=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.idle_check = idle_check
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.opened = 0
+        self.reconnects = 0
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        try:
+            smtp.ehlo_or_helo_if_needed()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        with self._lock:
+            self.opened += 1
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _quit(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _alive(self, connection):
+        if time.monotonic() - connection.last_used < self.idle_check:
+            return True
+        try:
+            return connection.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self.max_messages and connection.messages >= self.max_messages:
+                self._quit(connection.smtp)
+                continue
+            if self._alive(connection):
+                return connection
+            connection.smtp.close()
+            with self._lock:
+                self.reconnects += 1
+
+    @contextmanager
+    def connection(self):
+        """Havuzdan bir bağlantı ödünç al; bağlantı hatasında bağlantı atılır"""
+        if self._closed:
+            raise Exception("SMTP bağlantı havuzu kapatıldı")
+        self._slots.acquire()
+        connection = None
+        try:
+            connection = self._checkout()
+            yield connection
+        except Exception as e:
+            # Oturumun durumu bilinmediğinden bağlantı havuza geri konmaz
+            if connection is not None:
+                connection.smtp.close()
+                connection = None
+                if _connection_lost(e):
+                    with self._lock:
+                        self.reconnects += 1
+            raise
+        finally:
+            if connection is not None:
+                connection.last_used = time.monotonic()
+                if self._closed:
+                    self._quit(connection.smtp)
+                else:
+                    self._idle.put(connection)
+            self._slots.release()
+
+    def close_all(self):
+        """Boştaki bağlantıları QUIT ile kapat"""
+        self._closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(connection.smtp)
+
+
+class EmailManager:
+    """Sınırlı gönderim kuyruğu, iş parçacıkları ve SMTP havuzuyla e-posta gönderici"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, config=None):
+        config = dict(EMAIL_CONFIG, **(config or {}))
+        self.sender = config['sender']
+        self.batch_size = max(1, config['batch_size'])
+        # Message-ID alan adı her iletide socket.getfqdn() çağrılmasın diye bir kez belirlenir
+        self._msgid_domain = self.sender.rpartition('@')[2] or 'localhost'
+        self.pool = SMTPConnectionPool(
+            config['host'], config['port'],
+            username=config['username'], password=config['password'],
+            starttls=config['starttls'], use_ssl=config['ssl'],
+            timeout=config['timeout'], size=config['pool_size'],
+            max_messages=config['max_messages_per_connection'], idle_check=config['idle_check'],
+        )
+        self._queue = queue.Queue(maxsize=config['queue_size'])
+        self._lock = threading.Lock()
+        self._latency = LatencyHistogram()
+        self._counters = {'sent': 0, 'failed': 0, 'merged': 0, 'batches': 0, 'retries': 0}
+        self._started = time.monotonic()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f'email-{i}', daemon=True)
+            for i in range(max(1, config['workers']))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def send(self, to, subject, body, attachments=(), timeout=None):
+        """İletiyi gönderim kuyruğuna ekle ve sonucunu taşıyan Future döndür.
+
+        Kuyruk doluysa timeout saniye (None: süresiz) yer açılmasını bekler;
+        süre dolarsa queue.Full fırlatır.
+        """
+        if self._closed:
+            raise Exception("E-posta yöneticisi kapatıldı")
+        future = Future()
+        self._queue.put((OutgoingEmail(to, subject, body, tuple(attachments)), future, time.perf_counter()),
+                        timeout=timeout)
+        return future
+
+    def send_many(self, emails, wait=True, timeout=None):
+        """OutgoingEmail listesini kuyruğa ekle.
+
+        wait ise hepsinin sonucunu bekleyip (gönderilen, başarısız) sayılarını,
+        değilse Future listesini döndürür.
+        """
+        futures = [self.send(*email) for email in emails]
+        if not wait:
+            return futures
+        sent = failed = 0
+        for future in futures:
+            if future.exception(timeout) is None:
+                sent += 1
+            else:
+                failed += 1
+        return sent, failed
+
+    def flush(self):
+        """Kuyruktaki tüm iletiler işlenene kadar bekle"""
+        self._queue.join()
+
+    def close(self, timeout=None):
+        """Kuyruktakileri gönderip iş parçacıklarını durdur ve bağlantıları kapat"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self.pool.close_all()
+        with EmailManager._instance_lock:
+            if EmailManager._instance is self:
+                EmailManager._instance = None
+
+    def stats(self):
+        """Gönderim sayaçları, saniyedeki ileti ve kuyrukta bekleme dahil gecikme (ms)"""
+        with self._lock:
+            stats = dict(self._counters)
+            latency = self._latency.snapshot()
+        elapsed = time.monotonic() - self._started
+        stats.update({
+            'queued': self._queue.qsize(),
+            'connections_opened': self.pool.opened,
+            'reconnects': self.pool.reconnects,
+            'per_second': round(stats['sent'] / elapsed, 1) if elapsed else 0.0,
+            'latency_p50_ms': latency['p50_ms'],
+            'latency_p95_ms': latency['p95_ms'],
+            'latency_p99_ms': latency['p99_ms'],
+            'latency_max_ms': latency['max_ms'],
+        })
+        return stats
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            # Bekleyenin vazgeçip iptal ettiği iletiler atlanır; kalanlar artık iptal edilemez
+            active = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            try:
+                if active:
+                    self._send_batch(active)
+            except Exception as e:
+                logging.error(f"E-posta partisi gönderilemedi: {str(e)}")
+                self._finish(active, e)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _group(self, batch):
+        """Partideki iletileri alıcıya göre grupla (ilk geliş sırası korunur)"""
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[0].to.strip().lower(), []).append(item)
+        return list(groups.values())
+
+    def _build_message(self, items):
+        emails = [item[0] for item in items]
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = emails[0].to
+        if len(emails) == 1:
+            message['Subject'] = emails[0].subject
+            message.set_content(emails[0].body)
+        else:
+            message['Subject'] = f"{len(emails)} yeni bildirim"
+            message.set_content(_DIGEST_SEPARATOR.join(
+                f"{email.subject}\n\n{email.body}" for email in emails))
+        message['Date'] = formatdate(localtime=True)
+        message['Message-ID'] = make_msgid(domain=self._msgid_domain)
+        for email in emails:
+            for attachment in email.attachments:
+                message.add_attachment(attachment.content, maintype=attachment.maintype,
+                                       subtype=attachment.subtype, filename=attachment.filename)
+        return message
+
+    def _send_batch(self, batch):
+        """Partiyi tek bağlantıda gönder; bağlantı koparsa kalanlar yeni bağlantıyla denenir.
+
+        Kopmadan önce ileti gönderilebildiyse (ör. sunucunun bağlantı başına
+        ileti sınırı) yeniden denenir; art arda iki denemede hiç ileti
+        gönderilemezse kalanlar başarısız sayılır.
+        """
+        pending = self._group(batch)
+        with self._lock:
+            self._counters['batches'] += 1
+            self._counters['merged'] += len(batch) - len(pending)
+        failures = 0
+        while pending:
+            remaining = len(pending)
+            try:
+                with self.pool.connection() as connection:
+                    while pending:
+                        items = pending[0]
+                        try:
+                            connection.smtp.send_message(self._build_message(items), self.sender,
+                                                         [items[0][0].to])
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                                smtplib.SMTPDataError, ValueError) as e:
+                            # Yalnızca bu ileti reddedildi; ileti sonuçlandırılır ve
+                            # oturum sıfırlanıp kullanılmaya devam edilir
+                            connection.messages += 1
+                            pending.pop(0)
+                            self._finish(items, e)
+                            self._reset(connection)
+                            continue
+                        connection.messages += 1
+                        pending.pop(0)
+                        self._finish(items)
+            except Exception as e:
+                if not _connection_lost(e):
+                    raise
+                failures = 0 if len(pending) < remaining else failures + 1
+                if failures == 2:
+                    raise
+                logging.warning(f"SMTP bağlantısı koptu, {len(pending)} ileti yeniden denenecek: {str(e)}")
+                with self._lock:
+                    self._counters['retries'] += 1
+
+    @staticmethod
+    def _reset(connection):
+        """Reddedilen iletiden sonra oturumu RSET ile sıfırla.
+
+        RSET de reddedilirse oturum kullanılamaz; bağlantı kopmuş gibi
+        atılır ve kalan iletiler yeni bağlantıyla gönderilir.
+        """
+        try:
+            connection.smtp.rset()
+        except smtplib.SMTPResponseException as e:
+            raise smtplib.SMTPServerDisconnected(f"RSET reddedildi: {str(e)}") from e
+
+    def _finish(self, items, error=None):
+        now = time.perf_counter()
+        with self._lock:
+            for _, future, enqueued in items:
+                if future.done():
+                    continue
+                self._latency.record((now - enqueued) * 1000, failed=error is not None)
+                self._counters['failed' if error is not None else 'sent'] += 1
+        for _, future, _ in items:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
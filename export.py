@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Hasta kayıtlarının COPY ile akış halinde CSV/NDJSON dökümü.
+
+Bir hastanın ya da bir doktorun aktif hastalarının ölçüm, diyet, egzersiz,
+insülin ve uyarı kayıtları COPY (SELECT ...) TO STDOUT ile doğrudan (isteğe
+bağlı gzip ile sıkıştırılmış) dosyalara yazılır. Satırlar sunucudan geldikçe
+dosyaya aktarıldığından bellek kullanımı döküm boyutundan bağımsızdır. Tüm
+tablolar tek bir REPEATABLE READ işleminde okunur; dosyalar aynı anın
+tutarlı görüntüsüdür.
+
+Her tablo için <klasör>/<tablo>.csv[.gz] ya da .ndjson[.gz] dosyası ve
+satır sayılarını içeren manifest.json yazılır.
+
+Kullanım:
+    python export.py --patient 12 --out export_12
+    python export.py --doctor 3 --out export_dr3 --format ndjson --no-gzip
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from db_manager import DatabaseManager
+
+FORMATS = ('csv', 'ndjson')
+
+# İlerleme bildirimleri arasındaki en kısa süre (saniye)
+PROGRESS_INTERVAL = 0.5
+
+ExportProgress = namedtuple('ExportProgress', 'table rows bytes done')
+ExportedFile = namedtuple('ExportedFile', 'table path rows bytes')
+
+# Döküme giren tablolar; sorgular patient_id = ANY(%s) ile süzülür ve hasta,
+# zaman sırasıyla döner. Parola ve profil resmi dökülmez.
+EXPORT_TABLES = (
+    ('patients', """
+        SELECT user_id AS patient_id, tc, name, surname, birth_date, gender, email, phone, created_at
+        FROM users
+        WHERE user_id = ANY(%s)
+        ORDER BY user_id
+    """),
+    ('measurements', """
+        SELECT patient_id, id, measurement_time, sugar_level, notes
+        FROM sugar_measurements
+        WHERE patient_id = ANY(%s)
+        ORDER BY patient_id, measurement_time, id
+    """),
+    ('diet', """
+        SELECT dt.patient_id, dt.id, dt.date, d.name AS diet_type, dt.status, dt.notes
+        FROM diet_tracking dt
+        JOIN diet_types d ON d.id = dt.diet_type_id
+        WHERE dt.patient_id = ANY(%s)
+        ORDER BY dt.patient_id, dt.date, dt.id
+    """),
+    ('exercise', """
+        SELECT et.patient_id, et.id, et.date, e.name AS exercise_type, et.duration, et.status, et.notes
+        FROM exercise_tracking et
+        JOIN exercise_types e ON e.id = et.exercise_type_id
+        WHERE et.patient_id = ANY(%s)
+        ORDER BY et.patient_id, et.date, et.id
+    """),
+    ('insulin', """
+        SELECT patient_id, id, given_time, insulin_type, units, measurement_id, notes
+        FROM insulin_records
+        WHERE patient_id = ANY(%s)
+        ORDER BY patient_id, given_time, id
+    """),
+    ('alerts', """
+        SELECT patient_id, id, alert_time, alert_type, priority, is_read, message
+        FROM alerts
+        WHERE patient_id = ANY(%s)
+        ORDER BY patient_id, alert_time, id
+    """),
+)
+
+# NDJSON satırları row_to_json ile sunucuda üretilir. COPY'nin metin biçimi
+# ters bölüleri kaçışladığından CSV biçimi, veride hiç geçmeyen tırnak ve
+# ayraç karakterleriyle kullanılır; JSON'daki kontrol karakterleri zaten
+# \uXXXX olarak kaçışlı olduğundan satırlar olduğu gibi yazılır.
+_COPY_OPTIONS = {
+    'csv': "FORMAT csv, HEADER",
+    'ndjson': "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'",
+}
+
+
+class _ProgressWriter:
+    """Yazılan baytları ve satırları sayan, ilerlemeyi aralıklarla bildiren dosya sarmalayıcısı.
+
+    Satır sayısı yazılan satır sonlarından hesaplanır; CSV'de çok satırlı
+    notlar bu sayıyı artırabilir, kesin sayı tablo bitince bildirilir.
+    """
+
+    def __init__(self, file, table, callback):
+        self.file = file
+        self.table = table
+        self.callback = callback
+        self.bytes = 0
+        self.lines = 0
+        self._reported = time.monotonic()
+
+    def write(self, data):
+        self.file.write(data)
+        self.bytes += len(data)
+        self.lines += data.count(b'\n')
+        if self.callback is not None:
+            now = time.monotonic()
+            if now - self._reported >= PROGRESS_INTERVAL:
+                self._reported = now
+                self.callback(ExportProgress(self.table, self.lines, self.bytes, False))
+        return len(data)
+
+
+def _log_progress(progress):
+    if progress.done:
+        logging.info("%s dökümü tamamlandı: %d satır, %d bayt", progress.table, progress.rows, progress.bytes)
+    else:
+        logging.info("%s dökümü sürüyor: ~%d satır, %d bayt", progress.table, progress.rows, progress.bytes)
+
+
+def _doctor_patient_ids(tx, doctor_id):
+    rows = tx.execute("""
+        SELECT patient_id
+        FROM doctor_patient
+        WHERE doctor_id = %s
+        AND status = 'aktif'
+        ORDER BY patient_id
+    """, (doctor_id,))
+    return [row[0] for row in rows]
+
+
+def export_records(output_dir, patient_ids=None, doctor_id=None, fmt='csv', compress=True,
+                   progress=_log_progress, db=None):
+    """Hastaların (ya da doktorun aktif hastalarının) kayıtlarını output_dir'e dök.
+
+    progress, ExportProgress alan bir fonksiyondur (None: bildirim yok).
+    Yazılan dosyaları ExportedFile listesi olarak döndürür.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Geçersiz döküm biçimi: {fmt}")
+    if (patient_ids is None) == (doctor_id is None):
+        raise ValueError("Hasta listesi ya da doktor kimliğinden yalnızca biri verilmelidir")
+
+    db = db or DatabaseManager.get_instance()
+    os.makedirs(output_dir, exist_ok=True)
+    extension = '.' + fmt + ('.gz' if compress else '')
+    exported = []
+
+    with db.transaction() as tx:
+        # Tüm tablolar aynı anlık görüntüden okunur
+        tx.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        if doctor_id is not None:
+            patient_ids = _doctor_patient_ids(tx, doctor_id)
+        patient_ids = list(patient_ids)
+
+        for table, query in EXPORT_TABLES:
+            if fmt == 'ndjson':
+                query = "SELECT row_to_json(t) FROM (%s) t" % query
+            path = os.path.join(output_dir, table + extension)
+            opener = gzip.open if compress else open
+            with opener(path, 'wb') as file:
+                writer = _ProgressWriter(file, table, progress)
+                rows = db.copy_to(query, (patient_ids,), writer, _COPY_OPTIONS[fmt], tx=tx)
+            if rows is None or rows < 0:
+                # Sürücü COPY satır sayısını bildirmediyse satır sonlarından hesaplanır
+                rows = writer.lines - (1 if fmt == 'csv' else 0)
+            if progress is not None:
+                progress(ExportProgress(table, rows, writer.bytes, True))
+            exported.append(ExportedFile(table, path, rows, writer.bytes))
+
+    manifest = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'format': fmt,
+        'compressed': compress,
+        'doctor_id': doctor_id,
+        'patient_ids': patient_ids,
+        'files': [{'table': f.table, 'file': os.path.basename(f.path), 'rows': f.rows} for f in exported],
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hasta kayıtlarının CSV/NDJSON dökümü")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--patient', type=int, action='append', help="hasta kimliği (birden fazla verilebilir)")
+    scope.add_argument('--doctor', type=int, help="doktor kimliği (aktif hastalarının tümü)")
+    parser.add_argument('--out', required=True, help="dosyaların yazılacağı klasör")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--no-gzip', action='store_true', help="dosyaları sıkıştırma")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db = DatabaseManager.get_instance()
+    try:
+        exported = export_records(
+            args.out, patient_ids=args.patient, doctor_id=args.doctor,
+            fmt=args.format, compress=not args.no_gzip, db=db
+        )
+        for f in exported:
+            print("%-14s %10d satır  %s" % (f.table, f.rows, f.path))
+    finally:
+        db.close_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
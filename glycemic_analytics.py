@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Kan şekeri serileri için NumPy ile vektörel klinik metrikler.
+
+Fonksiyonlar iki dizi alır:
+    times  -- yerel saatle 1970-01-01 00:00'dan geçen saniye (int64), artan sırada
+    levels -- mg/dL cinsinden kan şekeri değerleri (float)
+
+get_patient_measurements satırları measurements_to_arrays() ile bu biçime
+çevrilir. Zaman içindeki oranlar (TIR/TBR/TAR) ölçüm sayısına göre
+hesaplanır; düzenli aralıklı CGM verisinde bu süre oranına eşittir.
+
+Hedef aralıklar ve metrikler uluslararası CGM uzlaşı raporunu izler:
+    TIR 70-180, TBR <70 (<54 çok düşük), TAR >180 (>250 çok yüksek) mg/dL
+    GMI (%)        = 3.31 + 0.02392 x ortalama
+    tahmini HbA1c  = (ortalama + 46.7) / 28.7
+    LBGI / HBGI    Kovatchev risk fonksiyonu
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Hedef aralık sınırları (mg/dL)
+VERY_LOW = 54
+LOW = 70
+HIGH = 180
+VERY_HIGH = 250
+
+# Yerel saat "epoch"u; PostgreSQL'de EXTRACT(EPOCH FROM timestamp) ile aynı değeri verir
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+RangeFractions = namedtuple('RangeFractions', 'very_low low in_range high very_high')
+
+GlycemicSummary = namedtuple('GlycemicSummary', [
+    'count', 'mean', 'std', 'min', 'max', 'cv', 'gmi', 'ea1c',
+    'tir', 'tbr', 'tar', 'ranges', 'mage', 'lbgi', 'hbgi'
+])
+
+HourlyProfile = namedtuple('HourlyProfile', 'hours count mean percentiles quantiles')
+
+
+def measurements_to_arrays(rows, level_index=1, time_index=2):
+    """Ölçüm satırlarını (id, sugar_level, measurement_time, ...) artan zamanlı dizilere çevir"""
+    count = len(rows)
+    levels = np.fromiter((float(row[level_index]) for row in rows), dtype=np.float64, count=count)
+    times = np.fromiter(((row[time_index] - _EPOCH) // _SECOND for row in rows),
+                        dtype=np.int64, count=count)
+    order = np.argsort(times, kind='stable')
+    return times[order], levels[order]
+
+
+def to_datetime64(times):
+    """Epoch saniyelerini matplotlib'in çizebileceği datetime64 dizisine çevir"""
+    return np.asarray(times).astype('datetime64[s]')
+
+
+def range_fractions(levels, very_low=VERY_LOW, low=LOW, high=HIGH, very_high=VERY_HIGH):
+    """Değerlerin hedef aralıklara dağılımını oran (0-1) olarak hesapla"""
+    levels = np.asarray(levels, dtype=np.float64)
+    if not levels.size:
+        return RangeFractions(0.0, 0.0, 0.0, 0.0, 0.0)
+    below_very_low = np.count_nonzero(levels < very_low)
+    below_low = np.count_nonzero(levels < low)
+    up_to_high = np.count_nonzero(levels <= high)
+    up_to_very_high = np.count_nonzero(levels <= very_high)
+    total = float(levels.size)
+    return RangeFractions(
+        very_low=below_very_low / total,
+        low=(below_low - below_very_low) / total,
+        in_range=(up_to_high - below_low) / total,
+        high=(up_to_very_high - up_to_high) / total,
+        very_high=(total - up_to_very_high) / total
+    )
+
+
+def gmi(mean_level):
+    """Glukoz yönetim göstergesi (GMI, %)"""
+    return 3.31 + 0.02392 * mean_level
+
+
+def estimated_a1c(mean_level):
+    """Ortalama şekerden tahmini HbA1c (%)"""
+    return (mean_level + 46.7) / 28.7
+
+
+def coefficient_of_variation(levels):
+    """Değişkenlik katsayısı (CV, %)"""
+    levels = np.asarray(levels, dtype=np.float64)
+    if levels.size < 2:
+        return 0.0
+    return float(levels.std(ddof=1) / levels.mean() * 100)
+
+
+def mage(levels, sd=None):
+    """Ortalama glisemik salınım genliği (MAGE).
+
+    Ardışık tepe ve çukurlar arasındaki salınımlardan bir standart sapmayı
+    aşanlar alınır; Service yöntemindeki gibi ilk geçerli salınımın yönündeki
+    (yükseliş ya da düşüş) salınımların ortalaması döner.
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    if levels.size < 3:
+        return 0.0
+    if sd is None:
+        sd = levels.std(ddof=1)
+
+    # Eşit ardışık değerler (platolar) tek noktaya indirilir
+    series = levels[np.r_[True, np.diff(levels) != 0]]
+    if series.size < 3:
+        return 0.0
+    slope = np.sign(np.diff(series))
+    turning = np.flatnonzero(slope[1:] != slope[:-1]) + 1
+    extremes = series[np.r_[0, turning, series.size - 1]]
+    amplitudes = np.diff(extremes)
+
+    valid = np.abs(amplitudes) > sd
+    if not valid.any():
+        return 0.0
+    rising = amplitudes[valid][0] > 0
+    selected = amplitudes[valid & ((amplitudes > 0) == rising)]
+    return float(np.abs(selected).mean())
+
+
+def risk_indices(levels):
+    """Kovatchev düşük ve yüksek kan şekeri risk indeksleri (LBGI, HBGI)"""
+    levels = np.asarray(levels, dtype=np.float64)
+    if not levels.size:
+        return 0.0, 0.0
+    f = 1.509 * (np.log(np.clip(levels, 1.0, None)) ** 1.084 - 5.381)
+    risk = 10.0 * f * f
+    lbgi = np.where(f < 0, risk, 0.0).mean()
+    hbgi = np.where(f > 0, risk, 0.0).mean()
+    return float(lbgi), float(hbgi)
+
+
+def hourly_profile(times, levels, quantiles=(10, 25, 50, 75, 90)):
+    """Günün her saati için ölçüm sayısı, ortalama ve yüzdelik değerler.
+
+    percentiles dizisi (len(quantiles), 24) boyutundadır; ölçüm olmayan
+    saatlerde ortalama ve yüzdelikler NaN olur.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    levels = np.asarray(levels, dtype=np.float64)
+    hours = (times // 3600) % 24
+
+    count = np.bincount(hours, minlength=24)
+    sums = np.bincount(hours, weights=levels, minlength=24)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / count
+
+    # Değerler sıralandıktan sonra saate göre kararlı sıralanır (uint8 anahtarda
+    # NumPy radix sort kullanır); böylece her saatin değerleri kendi içinde
+    # sıralı kalır ve yüzdelikler saat dilimlerinin başlangıcından indeksle okunur
+    order = np.argsort(levels)
+    order = order[np.argsort(hours[order].astype(np.uint8), kind='stable')]
+    sorted_levels = levels[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    percentiles = np.full((len(quantiles), 24), np.nan)
+    filled = count > 0
+    for row, q in enumerate(quantiles):
+        position = starts[filled] + (count[filled] - 1) * (q / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, starts[filled] + count[filled] - 1)
+        weight = position - lower
+        percentiles[row, filled] = (sorted_levels[lower] * (1 - weight)
+                                    + sorted_levels[upper] * weight)
+
+    return HourlyProfile(np.arange(24), count, mean, percentiles, tuple(quantiles))
+
+
+def summarize(levels):
+    """Serinin tüm özet metriklerini hesapla; boş seride None döner"""
+    levels = np.asarray(levels, dtype=np.float64)
+    if not levels.size:
+        return None
+
+    mean_level = float(levels.mean())
+    std = float(levels.std(ddof=1)) if levels.size > 1 else 0.0
+    ranges = range_fractions(levels)
+    lbgi, hbgi = risk_indices(levels)
+    return GlycemicSummary(
+        count=int(levels.size),
+        mean=mean_level,
+        std=std,
+        min=float(levels.min()),
+        max=float(levels.max()),
+        cv=std / mean_level * 100 if mean_level else 0.0,
+        gmi=gmi(mean_level),
+        ea1c=estimated_a1c(mean_level),
+        tir=ranges.in_range,
+        tbr=ranges.very_low + ranges.low,
+        tar=ranges.high + ranges.very_high,
+        ranges=ranges,
+        mage=mage(levels, std),
+        lbgi=lbgi,
+        hbgi=hbgi
+    )
@@ -0,0 +1,942 @@
+# -*- coding: utf-8 -*-
+"""Veritabanı şeması ve sürümlü geçişler (migration).
+
+Her geçiş bir sürüm numarası, açıklama ve sırayla çalıştırılacak adımlardan
+oluşur; adım bir SQL metni ya da Transaction alan bir fonksiyondur. Her geçiş
+kendi işleminde uygulanır ve schema_migrations tablosuna yazılır. Aynı anda
+çalışan iki güncelleme advisory lock ile sıraya sokulur.
+
+Kullanım:
+    python migrations.py upgrade            # bekleyen tüm geçişleri uygula
+    python migrations.py upgrade --to 1     # belirli bir sürüme kadar uygula
+    python migrations.py status             # uygulanan/bekleyen geçişleri listele
+    python migrations.py check-plans        # sık sorguların indeks kullandığını doğrula
+    python migrations.py backfill-rollup    # günlük özeti ham ölçümlerden yeniden oluştur
+    python migrations.py maintain-partitions  # gelecek ay bölümleri ve uyarı saklama politikası
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+from collections import namedtuple
+from datetime import date
+from functools import partial
+
+from config import PARTITION_CONFIG
+from db_manager import DatabaseManager, SHARED_QUERY_METHODS
+
+Migration = namedtuple('Migration', 'version description steps')
+
+# pg_advisory_xact_lock anahtarı; geçişlerin aynı anda iki kez uygulanmasını önler
+MIGRATION_LOCK_ID = 7310001
+
+_CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+_INITIAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id SERIAL PRIMARY KEY,
+        tc VARCHAR(11) NOT NULL UNIQUE,
+        name VARCHAR(100) NOT NULL,
+        surname VARCHAR(100) NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        user_type VARCHAR(10) NOT NULL CHECK (user_type IN ('doctor', 'patient')),
+        birth_date DATE,
+        gender VARCHAR(10),
+        email VARCHAR(255),
+        phone VARCHAR(20),
+        profile_image BYTEA,
+        profile_image_type VARCHAR(10),
+        created_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+
+    CREATE TABLE IF NOT EXISTS doctor_patient (
+        id SERIAL PRIMARY KEY,
+        doctor_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        status VARCHAR(10) NOT NULL DEFAULT 'aktif',
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        UNIQUE (doctor_id, patient_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS sugar_measurements (
+        id SERIAL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        sugar_level NUMERIC(5, 1) NOT NULL,
+        measurement_time TIMESTAMP NOT NULL DEFAULT NOW(),
+        notes TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS diet_types (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        description TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS diet_tracking (
+        id SERIAL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        diet_type_id INTEGER NOT NULL REFERENCES diet_types (id),
+        date DATE NOT NULL DEFAULT CURRENT_DATE,
+        status VARCHAR(20) NOT NULL DEFAULT 'beklemede',
+        notes TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS exercise_types (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        description TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS exercise_tracking (
+        id SERIAL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+        duration INTEGER,
+        date DATE NOT NULL DEFAULT CURRENT_DATE,
+        status VARCHAR(20) NOT NULL DEFAULT 'beklemede',
+        notes TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS alerts (
+        id SERIAL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        alert_type VARCHAR(30) NOT NULL,
+        message TEXT NOT NULL,
+        priority VARCHAR(10) NOT NULL DEFAULT 'normal',
+        is_read BOOLEAN NOT NULL DEFAULT FALSE,
+        alert_time TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+
+    CREATE TABLE IF NOT EXISTS insulin_recommendations (
+        id SERIAL PRIMARY KEY,
+        min_sugar NUMERIC(5, 1) NOT NULL,
+        max_sugar NUMERIC(5, 1) NOT NULL,
+        meal_time VARCHAR(10) NOT NULL,
+        insulin_type VARCHAR(50) NOT NULL,
+        base_units NUMERIC(5, 1) NOT NULL,
+        unit_per_carb NUMERIC(5, 2) NOT NULL DEFAULT 0,
+        notes TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS insulin_records (
+        id SERIAL PRIMARY KEY,
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        measurement_id INTEGER REFERENCES sugar_measurements (id) ON DELETE SET NULL,
+        insulin_type VARCHAR(50) NOT NULL,
+        units NUMERIC(5, 1) NOT NULL,
+        given_time TIMESTAMP NOT NULL DEFAULT NOW(),
+        notes TEXT
+    );
+
+    -- Panellerdeki seçeneklerle aynı referans verileri
+    INSERT INTO diet_types (name) VALUES
+        ('Az Şekerli Diyet'), ('Şekersiz Diyet'), ('Dengeli Beslenme')
+    ON CONFLICT (name) DO NOTHING;
+
+    INSERT INTO exercise_types (name) VALUES
+        ('Yürüyüş'), ('Koşu'), ('Yüzme'), ('Bisiklet')
+    ON CONFLICT (name) DO NOTHING;
+"""
+
+# Sorgu kalıplarına göre indeksler. Hepsi "eşitlik sütunları önce, sıralama /
+# aralık sütunu sonra" kuralına göre dizilmiştir.
+_QUERY_INDEXES = """
+    -- Hasta ölçümleri: patient_id = ? AND measurement_time aralığı, ORDER BY measurement_time DESC
+    CREATE INDEX IF NOT EXISTS idx_sugar_measurements_patient_time
+        ON sugar_measurements (patient_id, measurement_time DESC);
+
+    -- Doktor panosu: doctor_id = ? AND status = 'aktif'; patient_id sona eklendiği
+    -- için birleştirmelerde tabloya dönmeden (index-only) okunabilir
+    CREATE INDEX IF NOT EXISTS idx_doctor_patient_doctor_status
+        ON doctor_patient (doctor_id, status, patient_id);
+
+    -- Okunmamış uyarılar: yalnızca is_read = FALSE satırları indekslenir
+    CREATE INDEX IF NOT EXISTS idx_alerts_unread
+        ON alerts (patient_id, alert_time DESC)
+        WHERE is_read = FALSE;
+
+    CREATE INDEX IF NOT EXISTS idx_alerts_patient_time
+        ON alerts (patient_id, alert_time DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_diet_tracking_patient_date
+        ON diet_tracking (patient_id, date);
+
+    CREATE INDEX IF NOT EXISTS idx_exercise_tracking_patient_date
+        ON exercise_tracking (patient_id, date);
+
+    CREATE INDEX IF NOT EXISTS idx_insulin_records_patient_time
+        ON insulin_records (patient_id, given_time DESC);
+
+    ANALYZE sugar_measurements;
+    ANALYZE doctor_patient;
+    ANALYZE alerts;
+"""
+
+# Hasta başına günlük ölçüm özeti. Ekleme tetikleyicisi yeni satırları gün
+# bazında toplayıp özete ekler; silme ve güncellemede min/max geri
+# alınamadığından etkilenen günler ham ölçümlerden yeniden hesaplanır.
+# Tetikleyiciler komut düzeyindedir, böylece toplu eklemeler (execute_values)
+# her sayfa için tek bir upsert yapar.
+_DAILY_ROLLUP = """
+    CREATE TABLE IF NOT EXISTS daily_glucose_rollup (
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        day DATE NOT NULL,
+        measurement_count INTEGER NOT NULL,
+        sugar_sum NUMERIC(12, 1) NOT NULL,
+        min_level NUMERIC(5, 1) NOT NULL,
+        max_level NUMERIC(5, 1) NOT NULL,
+        low_count INTEGER NOT NULL,
+        high_count INTEGER NOT NULL,
+        PRIMARY KEY (patient_id, day)
+    );
+
+    CREATE OR REPLACE FUNCTION refresh_glucose_rollup(p_patient_ids INTEGER[], p_days DATE[])
+    RETURNS void AS $$
+        WITH keys AS (
+            SELECT DISTINCT patient_id, day
+            FROM unnest(p_patient_ids, p_days) AS k (patient_id, day)
+        ),
+        fresh AS (
+            SELECT k.patient_id, k.day,
+                   COUNT(*) AS measurement_count,
+                   SUM(sm.sugar_level) AS sugar_sum,
+                   MIN(sm.sugar_level) AS min_level,
+                   MAX(sm.sugar_level) AS max_level,
+                   COUNT(*) FILTER (WHERE sm.sugar_level < 70) AS low_count,
+                   COUNT(*) FILTER (WHERE sm.sugar_level > 200) AS high_count
+            FROM keys k
+            JOIN sugar_measurements sm
+              ON sm.patient_id = k.patient_id
+             AND sm.measurement_time >= k.day
+             AND sm.measurement_time < k.day + 1
+            GROUP BY k.patient_id, k.day
+        ),
+        emptied AS (
+            DELETE FROM daily_glucose_rollup r
+            USING keys k
+            WHERE r.patient_id = k.patient_id AND r.day = k.day
+            AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.patient_id = k.patient_id AND f.day = k.day)
+        )
+        INSERT INTO daily_glucose_rollup
+        SELECT * FROM fresh
+        ORDER BY patient_id, day
+        ON CONFLICT (patient_id, day) DO UPDATE SET
+            measurement_count = EXCLUDED.measurement_count,
+            sugar_sum = EXCLUDED.sugar_sum,
+            min_level = EXCLUDED.min_level,
+            max_level = EXCLUDED.max_level,
+            low_count = EXCLUDED.low_count,
+            high_count = EXCLUDED.high_count;
+    $$ LANGUAGE sql;
+
+    CREATE OR REPLACE FUNCTION glucose_rollup_after_insert() RETURNS trigger AS $$
+    BEGIN
+        -- Satırlar sıralı eklenir; eşzamanlı toplu eklemeler birbirini kilitlemez
+        INSERT INTO daily_glucose_rollup AS r
+        SELECT patient_id, measurement_time::date,
+               COUNT(*), SUM(sugar_level), MIN(sugar_level), MAX(sugar_level),
+               COUNT(*) FILTER (WHERE sugar_level < 70),
+               COUNT(*) FILTER (WHERE sugar_level > 200)
+        FROM new_rows
+        GROUP BY patient_id, measurement_time::date
+        ORDER BY patient_id, measurement_time::date
+        ON CONFLICT (patient_id, day) DO UPDATE SET
+            measurement_count = r.measurement_count + EXCLUDED.measurement_count,
+            sugar_sum = r.sugar_sum + EXCLUDED.sugar_sum,
+            min_level = LEAST(r.min_level, EXCLUDED.min_level),
+            max_level = GREATEST(r.max_level, EXCLUDED.max_level),
+            low_count = r.low_count + EXCLUDED.low_count,
+            high_count = r.high_count + EXCLUDED.high_count;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION glucose_rollup_after_delete() RETURNS trigger AS $$
+    BEGIN
+        PERFORM refresh_glucose_rollup(array_agg(patient_id), array_agg(measurement_time::date))
+        FROM old_rows;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION glucose_rollup_after_update() RETURNS trigger AS $$
+    BEGIN
+        PERFORM refresh_glucose_rollup(array_agg(patient_id), array_agg(day))
+        FROM (
+            SELECT patient_id, measurement_time::date AS day FROM old_rows
+            UNION
+            SELECT patient_id, measurement_time::date FROM new_rows
+        ) changed;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+_ROLLUP_TRIGGERS = """
+    DROP TRIGGER IF EXISTS glucose_rollup_insert ON sugar_measurements;
+    CREATE TRIGGER glucose_rollup_insert
+        AFTER INSERT ON sugar_measurements
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE glucose_rollup_after_insert();
+
+    DROP TRIGGER IF EXISTS glucose_rollup_delete ON sugar_measurements;
+    CREATE TRIGGER glucose_rollup_delete
+        AFTER DELETE ON sugar_measurements
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE glucose_rollup_after_delete();
+
+    DROP TRIGGER IF EXISTS glucose_rollup_update ON sugar_measurements;
+    CREATE TRIGGER glucose_rollup_update
+        AFTER UPDATE ON sugar_measurements
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE glucose_rollup_after_update();
+"""
+
+_BACKFILL_ROLLUP = """
+    WITH inserted AS (
+        INSERT INTO daily_glucose_rollup
+        SELECT patient_id, measurement_time::date,
+               COUNT(*), SUM(sugar_level), MIN(sugar_level), MAX(sugar_level),
+               COUNT(*) FILTER (WHERE sugar_level < 70),
+               COUNT(*) FILTER (WHERE sugar_level > 200)
+        FROM sugar_measurements
+        {where}
+        GROUP BY patient_id, measurement_time::date
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM inserted
+"""
+
+
+def _backfill_rollup(tx, patient_id=None):
+    # SHARE kilidi okumalara izin verir, yazmaları bekletir; yeniden hesaplama
+    # sırasında eklenen bir ölçüm özetten kaçamaz
+    tx.execute("LOCK TABLE sugar_measurements IN SHARE MODE")
+    if patient_id is None:
+        tx.execute("DELETE FROM daily_glucose_rollup")
+        return tx.execute(_BACKFILL_ROLLUP.format(where=""))[0][0]
+    tx.execute("DELETE FROM daily_glucose_rollup WHERE patient_id = %s", (patient_id,))
+    return tx.execute(_BACKFILL_ROLLUP.format(where="WHERE patient_id = %s"), (patient_id,))[0][0]
+
+
+def backfill_rollup(db=None, patient_id=None):
+    """daily_glucose_rollup tablosunu ham ölçümlerden yeniden oluştur, gün sayısını döndür"""
+    db = db or DatabaseManager.get_instance()
+    with db.transaction() as tx:
+        days = _backfill_rollup(tx, patient_id)
+    logging.info("Günlük özet yeniden oluşturuldu: %d hasta-gün", days)
+    return days
+
+
+# Anahtar kümesi sayfalaması (zaman, id) sırasıyla ilerler; id'nin indekse
+# eklenmesiyle aynı zamanlı satırlarda da sayfa sınırı indeksten bulunur.
+# Yeni indeksler eskilerinin öneki olduğundan eskiler kaldırılır.
+_KEYSET_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_sugar_measurements_patient_time_id
+        ON sugar_measurements (patient_id, measurement_time DESC, id DESC);
+    DROP INDEX IF EXISTS idx_sugar_measurements_patient_time;
+
+    CREATE INDEX IF NOT EXISTS idx_alerts_patient_time_id
+        ON alerts (patient_id, alert_time DESC, id DESC);
+    DROP INDEX IF EXISTS idx_alerts_patient_time;
+
+    CREATE INDEX IF NOT EXISTS idx_alerts_unread_time_id
+        ON alerts (patient_id, alert_time DESC, id DESC)
+        WHERE is_read = FALSE;
+    DROP INDEX IF EXISTS idx_alerts_unread;
+"""
+
+# Aylık aralık bölümlemesi (range partitioning). Her ayın satırları
+# <tablo>_YYYY_MM bölümünde tutulur; bölümü olmayan aylara düşen satırlar
+# <tablo>_default bölümüne gider ve bir sonraki bakımda kendi bölümlerine
+# taşınır. Birincil anahtar bölüm anahtarını içermek zorunda olduğundan
+# (id, zaman) olur; insulin_records.measurement_id bu yüzden yabancı anahtar
+# olmaktan çıkar.
+_PARTITION_FUNCTIONS = """
+    CREATE OR REPLACE FUNCTION create_month_partition(p_parent TEXT, p_column TEXT, p_month DATE)
+    RETURNS BOOLEAN AS $$
+    DECLARE
+        v_start DATE := date_trunc('month', p_month)::date;
+        v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+        v_name TEXT := p_parent || '_' || to_char(date_trunc('month', p_month), 'YYYY_MM');
+        v_check TEXT := v_name || '_range';
+    BEGIN
+        -- Aynı anda çalışan iki bakım aynı bölümü oluşturmaya çalışmaz
+        PERFORM pg_advisory_xact_lock(hashtext(p_parent));
+        IF to_regclass(v_name) IS NOT NULL THEN
+            RETURN FALSE;
+        END IF;
+
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', v_name, p_parent);
+        -- Bölümle aynı CHECK kısıtı, ATTACH sırasında tablonun taranmasını önler
+        EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (%I >= %L AND %I < %L)',
+                       v_name, v_check, p_column, v_start, p_column, v_end);
+        -- Varsayılan bölüme düşmüş satırlar taşınır; komutlar doğrudan bölüm
+        -- tablolarında çalıştığından üst tablonun tetikleyicileri çalışmaz
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                       'INSERT INTO %I SELECT * FROM moved',
+                       p_parent || '_default', p_column, v_start, p_column, v_end, v_name);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       p_parent, v_name, v_start, v_end);
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', v_name, v_check);
+        RETURN TRUE;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION ensure_month_partitions(p_parent TEXT, p_column TEXT,
+                                                       p_from DATE, p_to DATE)
+    RETURNS INTEGER AS $$
+    DECLARE
+        v_month DATE := date_trunc('month', p_from)::date;
+        v_created INTEGER := 0;
+    BEGIN
+        WHILE v_month <= p_to LOOP
+            IF create_month_partition(p_parent, p_column, v_month) THEN
+                v_created := v_created + 1;
+            END IF;
+            v_month := (v_month + INTERVAL '1 month')::date;
+        END LOOP;
+        RETURN v_created;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+PartitionedTable = namedtuple('PartitionedTable', 'table column columns definition indexes')
+
+MEASUREMENT_PARTITIONS = PartitionedTable(
+    table='sugar_measurements',
+    column='measurement_time',
+    columns=('id', 'patient_id', 'sugar_level', 'measurement_time', 'notes'),
+    definition="""
+        id INTEGER NOT NULL DEFAULT nextval('sugar_measurements_id_seq'),
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        sugar_level NUMERIC(5, 1) NOT NULL,
+        measurement_time TIMESTAMP NOT NULL DEFAULT NOW(),
+        notes TEXT
+    """,
+    indexes="""
+        ALTER TABLE sugar_measurements ADD PRIMARY KEY (id, measurement_time);
+        CREATE INDEX idx_sugar_measurements_patient_time_id
+            ON sugar_measurements (patient_id, measurement_time DESC, id DESC);
+    """
+)
+
+ALERT_PARTITIONS = PartitionedTable(
+    table='alerts',
+    column='alert_time',
+    columns=('id', 'patient_id', 'alert_type', 'message', 'priority', 'is_read', 'alert_time'),
+    definition="""
+        id INTEGER NOT NULL DEFAULT nextval('alerts_id_seq'),
+        patient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        alert_type VARCHAR(30) NOT NULL,
+        message TEXT NOT NULL,
+        priority VARCHAR(10) NOT NULL DEFAULT 'normal',
+        is_read BOOLEAN NOT NULL DEFAULT FALSE,
+        alert_time TIMESTAMP NOT NULL DEFAULT NOW()
+    """,
+    indexes="""
+        ALTER TABLE alerts ADD PRIMARY KEY (id, alert_time);
+        CREATE INDEX idx_alerts_patient_time_id
+            ON alerts (patient_id, alert_time DESC, id DESC);
+        CREATE INDEX idx_alerts_unread_time_id
+            ON alerts (patient_id, alert_time DESC, id DESC)
+            WHERE is_read = FALSE;
+    """
+)
+
+PARTITIONED_TABLES = (MEASUREMENT_PARTITIONS, ALERT_PARTITIONS)
+
+
+def _add_months(day, months):
+    """day'in ayından months ay sonraki (negatifse önceki) ayın ilk günü"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _ensure_partitions(tx, spec, first_month, months_ahead):
+    """first_month'tan bu aydan months_ahead ay sonrasına kadar eksik bölümleri oluştur"""
+    last_month = _add_months(date.today(), months_ahead)
+    created = tx.execute(
+        "SELECT ensure_month_partitions(%s, %s, %s, %s)",
+        (spec.table, spec.column, first_month, last_month)
+    )[0][0]
+    # Bölümü olmayan bir aya (ör. geriye dönük kayıt) düşüp varsayılan bölümde
+    # kalan satırlar için de bölüm açılır
+    stray = tx.execute(
+        "SELECT DISTINCT date_trunc('month', {column})::date FROM {table}_default".format(
+            column=spec.column, table=spec.table)
+    )
+    for (month,) in stray:
+        if tx.execute("SELECT create_month_partition(%s, %s, %s)", (spec.table, spec.column, month))[0][0]:
+            created += 1
+    return created
+
+
+def _partition_table(spec, tx):
+    """Tabloyu aynı adla aylık bölümlenmiş tabloya dönüştür; satırlar ve id dizisi korunur"""
+    legacy = spec.table + '_legacy'
+    columns = ', '.join(spec.columns)
+    tx.execute(f"LOCK TABLE {spec.table} IN ACCESS EXCLUSIVE MODE")
+    tx.execute(f"ALTER TABLE {spec.table} RENAME TO {legacy}")
+    # Dizi eski tabloyla birlikte silinmesin diye sahipliği geçici olarak kaldırılır
+    tx.execute(f"ALTER SEQUENCE {spec.table}_id_seq OWNED BY NONE")
+    tx.execute(f"CREATE TABLE {spec.table} ({spec.definition}) PARTITION BY RANGE ({spec.column})")
+    tx.execute(f"CREATE TABLE {spec.table}_default PARTITION OF {spec.table} DEFAULT")
+
+    first_month = tx.execute(f"SELECT COALESCE(MIN({spec.column}), NOW())::date FROM {legacy}")[0][0]
+    _ensure_partitions(tx, spec, first_month, PARTITION_CONFIG['months_ahead'])
+
+    # İndeksler satırlar kopyalandıktan sonra oluşturulur; tetikleyiciler henüz
+    # yeni tabloda olmadığından günlük özet iki kez sayılmaz
+    tx.execute(f"INSERT INTO {spec.table} ({columns}) SELECT {columns} FROM {legacy}")
+    tx.execute(f"DROP TABLE {legacy}")
+    tx.execute(f"ALTER SEQUENCE {spec.table}_id_seq OWNED BY {spec.table}.id")
+    tx.execute(spec.indexes)
+    tx.execute(f"ANALYZE {spec.table}")
+
+
+def _partitions(tx, table):
+    """Tablonun aylık bölümlerini eskiden yeniye [(ay başı, bölüm adı), ...] olarak getir"""
+    rows = tx.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+    """, (table,))
+    pattern = re.compile(re.escape(table) + r'_(\d{4})_(\d{2})')
+    months = []
+    for (name,) in rows:
+        match = pattern.fullmatch(name)
+        if match:
+            months.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(months)
+
+
+def _apply_retention(tx, table, months, mode):
+    """months aydan eski bölümleri ayır (detach) ya da sil (drop), işlenen bölümleri döndür.
+
+    Ayrılan bölüm <tablo>_archive_YYYY_MM adıyla bağımsız tablo olarak kalır.
+    """
+    if mode not in ('detach', 'drop'):
+        raise ValueError(f"Geçersiz saklama yöntemi: {mode}")
+    cutoff = _add_months(date.today(), -months)
+    removed = []
+    for month, name in _partitions(tx, table):
+        if month >= cutoff:
+            break
+        tx.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        if mode == 'drop':
+            tx.execute(f"DROP TABLE {name}")
+        else:
+            archive = f"{table}_archive_{month:%Y_%m}"
+            if tx.execute("SELECT to_regclass(%s)", (archive,))[0][0]:
+                # Aynı ayın daha önce ayrılmış arşivi varsa satırlar ona eklenir
+                tx.execute(f"INSERT INTO {archive} SELECT * FROM {name}")
+                tx.execute(f"DROP TABLE {name}")
+            else:
+                tx.execute(f"ALTER TABLE {name} RENAME TO {archive}")
+        removed.append(name)
+    return removed
+
+
+def maintain_partitions(db=None, months_ahead=None, retention_months=None, retention_mode=None):
+    """Gelecek ayların bölümlerini oluştur ve uyarılara saklama politikasını uygula.
+
+    Zamanlayıcı tarafından her gün çalıştırılır. (oluşturulan bölüm sayısı,
+    ayrılan/silinen uyarı bölümleri) döndürür; retention_months 0 ise
+    saklama politikası uygulanmaz.
+    """
+    db = db or DatabaseManager.get_instance()
+    months_ahead = PARTITION_CONFIG['months_ahead'] if months_ahead is None else months_ahead
+    if retention_months is None:
+        retention_months = PARTITION_CONFIG['alert_retention_months']
+    retention_mode = retention_mode or PARTITION_CONFIG['alert_retention_mode']
+
+    if current_version(db) < PARTITIONING_VERSION:
+        logging.warning("Bölümleme geçişi (%d) uygulanmamış, bölüm bakımı atlandı", PARTITIONING_VERSION)
+        return 0, []
+
+    created = 0
+    removed = []
+    with db.transaction() as tx:
+        for spec in PARTITIONED_TABLES:
+            created += _ensure_partitions(tx, spec, date.today(), months_ahead)
+        if retention_months > 0:
+            removed = _apply_retention(tx, ALERT_PARTITIONS.table, retention_months, retention_mode)
+    logging.info("Bölüm bakımı: %d yeni bölüm, %d uyarı bölümü kaldırıldı", created, len(removed))
+    return created, removed
+
+
+# Haftalık raporlar. Bir doktorun kohort özeti (patient_id NULL) ve hasta
+# raporları tek işlemde yazılır; özet satırının varlığı o doktorun o hafta
+# için tamamlandığını gösterir (kaldığı yerden devam noktası). Teslim
+# edilmeyi bekleyen raporlar kısmi indeksle bulunur.
+_WEEKLY_REPORTS = """
+    CREATE TABLE IF NOT EXISTS weekly_reports (
+        id SERIAL PRIMARY KEY,
+        week_start DATE NOT NULL,
+        doctor_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        patient_id INTEGER REFERENCES users (user_id) ON DELETE CASCADE,
+        summary JSONB NOT NULL,
+        chart BYTEA,
+        status VARCHAR(12) NOT NULL DEFAULT 'kuyrukta',
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        sent_at TIMESTAMP
+    );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_weekly_reports_week_doctor_patient
+        ON weekly_reports (week_start, doctor_id, COALESCE(patient_id, 0));
+
+    CREATE INDEX IF NOT EXISTS idx_weekly_reports_queued
+        ON weekly_reports (week_start, id)
+        WHERE status = 'kuyrukta';
+"""
+
+# Giden kutusu: bildirimler tetikleyen uyarıyla aynı işlemde yazılır, outbox.py
+# işçileri tarafından teslim edilir. Uyarılar INSERT deyimi başına tek seferde
+# (geçiş tablosuyla) kuyruğa alınır; böylece toplu hatırlatmalar da satır
+# başına tetikleyici çalıştırmaz. Hasta kendi uyarılarını (ölçüm saati ve
+# genel uyarılar hariç), aktif doktorları kritik şeker uyarılarını alır.
+_NOTIFICATION_OUTBOX = """
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id BIGSERIAL PRIMARY KEY,
+        alert_id INTEGER,
+        recipient_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status VARCHAR(12) NOT NULL DEFAULT 'bekliyor',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        last_error TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        sent_at TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+        ON notification_outbox (next_attempt_at, id)
+        WHERE status = 'bekliyor';
+
+    CREATE OR REPLACE FUNCTION enqueue_alert_notifications() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO notification_outbox (alert_id, recipient_id, subject, body)
+        SELECT a.id, a.patient_id,
+               CASE a.alert_type
+                   WHEN 'şeker_ölçümü' THEN 'Kan Şekeri Ölçüm Hatırlatması'
+                   WHEN 'diyet_hatırlatma' THEN 'Diyet Hatırlatması'
+                   WHEN 'egzersiz_hatırlatma' THEN 'Egzersiz Hatırlatması'
+                   WHEN 'hipoglisemi' THEN 'Düşük Kan Şekeri Uyarısı'
+                   WHEN 'düşük_şeker' THEN 'Düşük Kan Şekeri Uyarısı'
+                   WHEN 'hiperglisemi' THEN 'Yüksek Kan Şekeri Uyarısı'
+                   WHEN 'yüksek_şeker' THEN 'Yüksek Kan Şekeri Uyarısı'
+                   ELSE 'Diyabet Takip Bildirimi'
+               END,
+               CONCAT('Sayın ', p.name, ' ', p.surname, ',', E'\\n\\n', a.message)
+        FROM new_alerts a
+        JOIN users p ON p.user_id = a.patient_id
+        WHERE a.alert_type NOT IN ('zaman_uyarisi', 'genel')
+        AND COALESCE(p.email, '') <> ''
+        UNION ALL
+        SELECT a.id, dp.doctor_id,
+               CONCAT('Kritik Hasta Uyarısı: ', p.name, ' ', p.surname),
+               CONCAT('Sayın ', d.name, ' ', d.surname, ',', E'\\n\\n',
+                      'Hastanız ', p.name, ' ', p.surname, ' için ',
+                      to_char(a.alert_time, 'DD.MM.YYYY HH24:MI'), ' tarihli uyarı:', E'\\n', a.message)
+        FROM new_alerts a
+        JOIN users p ON p.user_id = a.patient_id
+        JOIN doctor_patient dp ON dp.patient_id = a.patient_id AND dp.status = 'aktif'
+        JOIN users d ON d.user_id = dp.doctor_id
+        WHERE a.alert_type IN ('hipoglisemi', 'hiperglisemi', 'düşük_şeker', 'yüksek_şeker')
+        AND COALESCE(d.email, '') <> '';
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS alerts_enqueue_notifications ON alerts;
+    CREATE TRIGGER alerts_enqueue_notifications
+        AFTER INSERT ON alerts
+        REFERENCING NEW TABLE AS new_alerts
+        FOR EACH STATEMENT EXECUTE PROCEDURE enqueue_alert_notifications();
+"""
+
+# Haftalık rapor teslimi giden kutusu gibi sahiplenme süresiyle (lease) çalışır:
+# sahiplenilen satırın next_attempt_at'i ileri alınıp hemen onaylanır, gönderim
+# işlem dışında yapılır. Teslimi yarım kalan raporlar süre dolunca, hangi
+# haftaya ait olursa olsun sonraki teslimde yeniden alınır.
+_WEEKLY_REPORT_DELIVERY = """
+    ALTER TABLE weekly_reports
+        ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+    DROP INDEX IF EXISTS idx_weekly_reports_queued;
+    CREATE INDEX IF NOT EXISTS idx_weekly_reports_due
+        ON weekly_reports (next_attempt_at, id)
+        WHERE status = 'kuyrukta';
+"""
+
+MIGRATIONS = [
+    Migration(1, "Başlangıç şeması", (_INITIAL_SCHEMA,)),
+    Migration(2, "Sorgu kalıplarına göre bileşik ve kısmi indeksler", (_QUERY_INDEXES,)),
+    Migration(3, "Günlük kan şekeri özeti (daily_glucose_rollup)",
+              (_DAILY_ROLLUP, _ROLLUP_TRIGGERS, _backfill_rollup)),
+    Migration(4, "Sayfalama için (zaman, id) indeksleri", (_KEYSET_INDEXES,)),
+    Migration(5, "Ölçüm ve uyarı tablolarının aylık bölümlenmesi", (
+        _PARTITION_FUNCTIONS,
+        "ALTER TABLE insulin_records DROP CONSTRAINT IF EXISTS insulin_records_measurement_id_fkey",
+        partial(_partition_table, MEASUREMENT_PARTITIONS),
+        _ROLLUP_TRIGGERS,
+        partial(_partition_table, ALERT_PARTITIONS),
+    )),
+    Migration(6, "Haftalık raporlar (weekly_reports)", (_WEEKLY_REPORTS,)),
+    Migration(7, "Bildirim giden kutusu (notification_outbox)", (_NOTIFICATION_OUTBOX,)),
+    Migration(8, "Haftalık rapor teslimi için sahiplenme ve deneme sütunları", (_WEEKLY_REPORT_DELIVERY,)),
+]
+
+PARTITIONING_VERSION = 5
+
+
+def applied_migrations(db):
+    """Uygulanmış geçişleri {sürüm: uygulanma zamanı} olarak getir"""
+    db.execute_query(_CREATE_MIGRATIONS_TABLE)
+    rows = db.execute_query("SELECT version, applied_at FROM schema_migrations ORDER BY version")
+    return {version: applied_at for version, applied_at in rows}
+
+
+def current_version(db):
+    """Veritabanının şema sürümünü getir (hiç geçiş yoksa 0)"""
+    applied = applied_migrations(db)
+    return max(applied) if applied else 0
+
+
+def upgrade(db=None, target=None):
+    """Bekleyen geçişleri sırayla uygula, uygulanan sürümleri döndür"""
+    db = db or DatabaseManager.get_instance()
+    db.execute_query(_CREATE_MIGRATIONS_TABLE)
+    applied = []
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if target is not None and migration.version > target:
+            break
+
+        with db.transaction() as tx:
+            tx.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            if tx.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (migration.version,)):
+                continue
+
+            logging.info("Geçiş uygulanıyor: %d - %s", migration.version, migration.description)
+            for step in migration.steps:
+                if callable(step):
+                    step(tx)
+                else:
+                    tx.execute(step)
+            tx.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (migration.version, migration.description)
+            )
+        applied.append(migration.version)
+
+    return applied
+
+
+class PlanCapture:
+    """DatabaseManager sorgu metotlarını çalıştırmadan EXPLAIN eden yardımcı.
+
+    Paylaşılan sorgu metotları (SHARED_QUERY_METHODS) bu sınıfa da bağlanır;
+    _fetch_all sorguyu çalıştırmak yerine planını alıp boş sonuç döndürür.
+    Böylece kontrol edilen SQL, uygulamanın gerçekten çalıştırdığı SQL'dir.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.plans = []
+
+    def _fetch_all(self, query, params=None, tx=None, name=None):
+        self.cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = self.cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        self.plans.append(plan[0]['Plan'])
+        return []
+
+    _fetch_one = DatabaseManager._fetch_one
+    _fetch_value = DatabaseManager._fetch_value
+    _execute = DatabaseManager._execute
+    _fetch_page = DatabaseManager._fetch_page
+    _doctor_dashboard_from_row = staticmethod(DatabaseManager._doctor_dashboard_from_row)
+    get_doctor_dashboard_snapshot = DatabaseManager.get_doctor_dashboard_snapshot
+    _patient_summaries_from_rows = staticmethod(DatabaseManager._patient_summaries_from_rows)
+    get_patient_summaries = DatabaseManager.get_patient_summaries
+
+
+for _name in SHARED_QUERY_METHODS:
+    setattr(PlanCapture, _name, getattr(DatabaseManager, _name))
+
+
+# (metot, argümanlar, indeksle okunması gereken tablolar); argümanlardaki
+# 'patient' ve 'doctor' örnek kimliklerle değiştirilir
+PLAN_CHECKS = [
+    ('get_daily_measurements', ('patient',), ('sugar_measurements',)),
+    ('get_patient_measurements', ('patient',), ('sugar_measurements',)),
+    ('get_measurement_statistics', ('patient',), ('daily_glucose_rollup',)),
+    ('get_patient_alerts', ('patient', True), ('alerts',)),
+    ('get_daily_diet_tracking', ('patient',), ('diet_tracking',)),
+    ('get_daily_exercise_tracking', ('patient',), ('exercise_tracking',)),
+    ('get_doctor_patients_count', ('doctor',), ('doctor_patient',)),
+    ('get_daily_measurements_count', ('doctor',), ('doctor_patient', 'sugar_measurements')),
+    ('get_critical_patients_count', ('doctor',), ('doctor_patient', 'sugar_measurements')),
+    ('get_doctor_patients_weekly_averages', ('doctor',), ('doctor_patient', 'daily_glucose_rollup')),
+    ('get_doctor_recent_measurements', ('doctor',), ('doctor_patient', 'sugar_measurements')),
+    ('get_patient_measurements_page', ('patient',), ('sugar_measurements',)),
+    ('get_patient_alerts_page', ('patient',), ('alerts',)),
+    ('get_doctor_recent_measurements_page', ('doctor',), ('doctor_patient', 'sugar_measurements')),
+    ('get_patient_summaries', (['patient'],),
+     ('daily_glucose_rollup', 'diet_tracking', 'exercise_tracking')),
+    ('get_doctor_dashboard_snapshot', ('doctor',),
+     ('doctor_patient', 'sugar_measurements', 'daily_glucose_rollup')),
+]
+
+_INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def _table_scans(plan, table, parents=None):
+    """Planda tabloyu ya da bölümlerini okuyan düğümleri (düğüm tipi, indeks adları, tablo) olarak getir"""
+    parents = parents or {}
+    scans = []
+    for node in _plan_nodes(plan):
+        relation = node.get('Relation Name')
+        if relation != table and parents.get(relation) != table:
+            continue
+        indexes = {node['Index Name']} if 'Index Name' in node else set()
+        for child in _plan_nodes(node):
+            if child.get('Node Type') == 'Bitmap Index Scan':
+                indexes.add(child['Index Name'])
+        scans.append((node['Node Type'], indexes, relation))
+    return scans
+
+
+def _sample_arg(arg, sample):
+    if isinstance(arg, list):
+        return [_sample_arg(item, sample) for item in arg]
+    return sample.get(arg, arg)
+
+
+def check_plans(db=None):
+    """PLAN_CHECKS'teki sorguların planlarında beklenen tabloların indeksle okunduğunu doğrula.
+
+    Sıralı taramalar (enable_seqscan) kapatılır; böylece az satırlı bir
+    geliştirme veritabanında bile yalnızca kullanılabilir indeksi olmayan
+    sorgular Seq Scan'e düşer. Bölümlenmiş tablolarda okunan bölüm sayısı
+    da açıklamaya eklenir; zaman aralıklı sorgularda bölüm budaması (partition
+    pruning) buradan izlenebilir. (metot, tablo, başarılı mı, açıklama)
+    listesi döndürür.
+    """
+    db = db or DatabaseManager.get_instance()
+    results = []
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SELECT doctor_id, patient_id FROM doctor_patient LIMIT 1")
+        row = cursor.fetchone()
+        sample = {'doctor': row[0] if row else 0, 'patient': row[1] if row else 0}
+        cursor.execute("""
+            SELECT c.relname, p.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+        """)
+        parents = dict(cursor.fetchall())
+
+        for method, args, tables in PLAN_CHECKS:
+            capture = PlanCapture(cursor)
+            getattr(capture, method)(*[_sample_arg(arg, sample) for arg in args])
+            for table in tables:
+                scans = [scan for plan in capture.plans for scan in _table_scans(plan, table, parents)]
+                if not scans:
+                    results.append((method, table, False, "tablo planda yok"))
+                    continue
+                seq = [node_type for node_type, _, _ in scans if node_type not in _INDEX_SCANS]
+                indexes = sorted(set().union(*(names for _, names, _ in scans)))
+                detail = ", ".join(seq or indexes)
+                partitions = {relation for _, _, relation in scans if relation != table}
+                if partitions:
+                    detail += " (%d bölüm)" % len(partitions)
+                results.append((method, table, not seq, detail))
+        cursor.close()
+    finally:
+        conn.rollback()
+        db.return_connection(conn)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Veritabanı şema geçişleri")
+    commands = parser.add_subparsers(dest='command', required=True)
+    upgrade_parser = commands.add_parser('upgrade', help="bekleyen geçişleri uygula")
+    upgrade_parser.add_argument('--to', type=int, default=None, help="hedef sürüm")
+    commands.add_parser('status', help="geçiş durumunu göster")
+    commands.add_parser('check-plans', help="sorgu planlarının indeks kullandığını doğrula")
+    backfill_parser = commands.add_parser('backfill-rollup', help="günlük özeti ham ölçümlerden yeniden oluştur")
+    backfill_parser.add_argument('--patient', type=int, default=None, help="yalnızca bu hasta")
+    partitions_parser = commands.add_parser('maintain-partitions',
+                                            help="gelecek ay bölümlerini oluştur, eski uyarı bölümlerini kaldır")
+    partitions_parser.add_argument('--ahead', type=int, default=None, help="kaç ay ilerisi için bölüm açılacak")
+    partitions_parser.add_argument('--retention', type=int, default=None, help="uyarıların saklanacağı ay sayısı")
+    partitions_parser.add_argument('--drop', action='store_true', help="eski bölümleri ayırmak yerine sil")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager.get_instance()
+    try:
+        if args.command == 'upgrade':
+            applied = upgrade(db, target=args.to)
+            if applied:
+                print("Uygulanan geçişler: %s" % ", ".join(map(str, applied)))
+            print("Şema sürümü: %d" % current_version(db))
+
+        elif args.command == 'status':
+            applied = applied_migrations(db)
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                applied_at = applied.get(migration.version)
+                state = applied_at.strftime('%Y-%m-%d %H:%M') if applied_at else 'bekliyor'
+                print("%4d  %-16s  %s" % (migration.version, state, migration.description))
+
+        elif args.command == 'check-plans':
+            results = check_plans(db)
+            for method, table, ok, detail in results:
+                print("%-4s %-38s %-20s %s" % ('OK' if ok else 'HATA', method, table, detail))
+            if not all(ok for _, _, ok, _ in results):
+                return 1
+
+        elif args.command == 'backfill-rollup':
+            days = backfill_rollup(db, patient_id=args.patient)
+            print("Günlük özet yeniden oluşturuldu: %d hasta-gün" % days)
+
+        elif args.command == 'maintain-partitions':
+            created, removed = maintain_partitions(
+                db, months_ahead=args.ahead, retention_months=args.retention,
+                retention_mode='drop' if args.drop else None
+            )
+            print("Oluşturulan bölüm: %d" % created)
+            for name in removed:
+                print("Kaldırılan uyarı bölümü: %s" % name)
+    finally:
+        db.close_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
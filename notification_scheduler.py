@@ -1,54 +1,123 @@
-# -*- coding: utf-8 -*-
-
-import schedule
-import time
-from db_manager import DatabaseManager
-import logging
-
-def setup_logging():
-    logging.basicConfig(
-        filename='scheduler.log',
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
-
-def send_weekly_reports():
-    """Haftalık raporları gönder"""
-    try:
-        db = DatabaseManager.get_instance()
-        db.send_weekly_reports()
-        logging.info("Haftalık raporlar gönderildi")
-    except Exception as e:
-        logging.error(f"Haftalık rapor gönderimi sırasında hata: {str(e)}")
-
-def send_measurement_reminders():
-    """Ölçüm hatırlatmalarını gönder"""
-    try:
-        db = DatabaseManager.get_instance()
-        db.send_measurement_reminders()
-        logging.info("Ölçüm hatırlatmaları gönderildi")
-    except Exception as e:
-        logging.error(f"Ölçüm hatırlatması gönderimi sırasında hata: {str(e)}")
-
-def main():
-    setup_logging()
-    logging.info("Bildirim zamanlayıcısı başlatıldı")
-
-    # Haftalık raporları her Pazartesi saat 09:00'da gönder
-    schedule.every().monday.at("09:00").do(send_weekly_reports)
-
-    # Ölçüm hatırlatmalarını her gün belirli saatlerde gönder
-    schedule.every().day.at("07:00").do(send_measurement_reminders)  # Sabah
-    schedule.every().day.at("12:00").do(send_measurement_reminders)  # Öğle
-    schedule.every().day.at("18:00").do(send_measurement_reminders)  # Akşam
-
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(60)  # Her dakika kontrol et
-        except Exception as e:
-            logging.error(f"Zamanlayıcı döngüsünde hata: {str(e)}")
-            time.sleep(300)  # Hata durumunda 5 dakika bekle
-
-if __name__ == "__main__":
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime, timedelta
+from config import OUTBOX_CONFIG, REMINDER_CONFIG, SCHEDULER_CONFIG
+from db_manager import DatabaseManager
+from weekly_reports import WeeklyReportJob, email_reports
+import migrations
+import outbox
+from scheduler_engine import Daily, Every, Scheduler, Weekly
+import logging
+
+def setup_logging():
+    logging.basicConfig(
+        filename='scheduler.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def send_weekly_reports():
+    """Haftalık raporları gönder"""
+    try:
+        db = DatabaseManager.get_instance()
+        result = db.send_weekly_reports(send=email_reports)
+        logging.info(f"Haftalık raporlar hazırlandı: {result.reports} rapor, {result.delivered} teslim")
+    except Exception as e:
+        logging.error(f"Haftalık rapor gönderimi sırasında hata: {str(e)}")
+
+def deliver_weekly_reports():
+    """Teslimi yarım kalan ya da ertelenen haftalık raporları gönder"""
+    try:
+        delivered = WeeklyReportJob().deliver(email_reports)
+        if delivered:
+            logging.info(f"Bekleyen haftalık raporlar teslim edildi: {delivered} rapor")
+    except Exception as e:
+        logging.error(f"Haftalık rapor teslimi sırasında hata: {str(e)}")
+
+def _passed_reminder_slots(now, times):
+    """Dün ve bugünün now'a kadar geçmiş hatırlatma saatleri (sıralı)"""
+    slots = sorted(
+        datetime.combine(now.date() - timedelta(days=days), datetime.strptime(t, '%H:%M').time())
+        for days in (0, 1) for t in times
+    )
+    return [slot for slot in slots if slot <= now] or slots[:1]
+
+def reminder_window_start(now=None, times=None):
+    """Şu anki hatırlatma penceresinin başlangıcı (son hatırlatma saatinden bir önceki saat)"""
+    now = now or datetime.now()
+    passed = _passed_reminder_slots(now, times or REMINDER_CONFIG['times'])
+    return passed[-2] if len(passed) > 1 else passed[0]
+
+def reminder_slot_start(now=None, times=None):
+    """Şu anki hatırlatma saatinin başlangıcı; bu saatte zaten hatırlatılanlar yeniden hatırlatılmaz"""
+    now = now or datetime.now()
+    return _passed_reminder_slots(now, times or REMINDER_CONFIG['times'])[-1]
+
+def send_measurement_reminders():
+    """Ölçüm hatırlatmalarını gönder"""
+    try:
+        db = DatabaseManager.get_instance()
+        # E-postalar uyarılarla aynı işlemde giden kutusuna yazılır ve teslim işçilerince gönderilir
+        # Ölçüm önceki saatten beri aranır; hatırlatma tekrarı yalnızca bu saat içinde engellenir,
+        # yoksa önceki saatin hatırlatmaları bu saatinkini gizlerdi
+        now = datetime.now()
+        count = db.send_measurement_reminders(since=reminder_window_start(now),
+                                              reminded_since=reminder_slot_start(now))
+        logging.info(f"Ölçüm hatırlatmaları oluşturuldu: {count} hasta")
+    except Exception as e:
+        logging.error(f"Ölçüm hatırlatması gönderimi sırasında hata: {str(e)}")
+
+def maintain_partitions():
+    """Gelecek ay bölümlerini oluştur, eski uyarı bölümlerini kaldır"""
+    try:
+        created, removed = migrations.maintain_partitions()
+        logging.info(f"Bölüm bakımı tamamlandı: {created} yeni bölüm, {len(removed)} uyarı bölümü kaldırıldı")
+    except Exception as e:
+        logging.error(f"Bölüm bakımı sırasında hata: {str(e)}")
+
+def prune_outbox():
+    """Eski gönderilmiş bildirimleri sil ve giden kutusu durumunu kaydet"""
+    try:
+        db = DatabaseManager.get_instance()
+        deleted = db.delete_sent_notifications(OUTBOX_CONFIG['retention_days'])
+        logging.info(f"Giden kutusu temizlendi: {deleted} bildirim silindi, durum: {db.get_outbox_counts()}")
+    except Exception as e:
+        logging.error(f"Giden kutusu temizliği sırasında hata: {str(e)}")
+
+def log_metrics(scheduler):
+    """İş başına gecikme ve süre metriklerini kaydet"""
+    logging.info(f"Zamanlayıcı metrikleri: {json.dumps(scheduler.metrics(), ensure_ascii=False)}")
+
+def create_scheduler():
+    """Bildirim işlerini içeren zamanlayıcıyı oluştur"""
+    scheduler = Scheduler(workers=SCHEDULER_CONFIG['workers'], state_file=SCHEDULER_CONFIG['state_file'])
+
+    # Haftalık raporları her Pazartesi saat 09:00'da gönder
+    scheduler.add_job('haftalık_rapor', send_weekly_reports, Weekly(0, "09:00"))
+    # Teslim edilemeyen parçalar sahiplenme süresi dolunca saatlik teslimde yeniden denenir
+    scheduler.add_job('haftalık_rapor_teslimi', deliver_weekly_reports, Every(3600), catch_up=False)
+
+    # Ölçüm hatırlatmalarını her gün belirli saatlerde gönder (varsayılan: sabah, öğle, akşam)
+    scheduler.add_job('ölçüm_hatırlatma', send_measurement_reminders, Daily(*REMINDER_CONFIG['times']))
+
+    # Bölüm bakımını her gece ve başlangıçta bir kez çalıştır
+    scheduler.add_job('bölüm_bakımı', maintain_partitions, Daily("02:30"), run_at_start=True)
+
+    scheduler.add_job('giden_kutusu_temizliği', prune_outbox, Daily("03:00"))
+    scheduler.add_job('metrikler', lambda: log_metrics(scheduler), Every(SCHEDULER_CONFIG['metrics_interval']),
+                      catch_up=False)
+    return scheduler
+
+def main():
+    setup_logging()
+    logging.info("Bildirim zamanlayıcısı başlatıldı")
+
+    # Giden kutusundaki bildirimler arka planda sürekli teslim edilir
+    outbox.start_workers()
+
+    # İşler zamanı geldiğinde iş parçacığı havuzunda çalışır; kapalıyken kaçırılanlar açılışta yapılır
+    create_scheduler().run_forever()
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Bildirim giden kutusunun (notification_outbox) teslimi.
+
+Uyarılar alerts tablosuna yazıldığında tetikleyici aynı işlemde giden
+kutusuna bildirim satırları ekler (bkz. migrations._NOTIFICATION_OUTBOX);
+ölçüm ya da uyarı geri alınırsa bildirim de oluşmaz. İşçiler zamanı gelmiş
+bildirimleri FOR UPDATE SKIP LOCKED ile partiler halinde sahiplenir,
+EmailManager üzerinden gönderir ve sonucu yazar:
+
+    - gönderilenler 'gönderildi' olur,
+    - gönderilemeyenler üstel artan beklemeyle (rastgele sapmayla) yeniden
+      denenir,
+    - max_attempts denemeden sonra, sunucu iletiyi kalıcı olarak (5xx)
+      reddederse ya da alıcının e-posta adresi yoksa 'başarısız' (ölü
+      mektup) durumuna alınır; requeue komutuyla yeniden kuyruğa konabilir.
+
+Sahiplenme kendi işleminde onaylanır ve bildirimi lease_seconds boyunca
+diğer işçilerden gizler; işçi sayısı artırılarak (aynı süreçte ya da ayrı
+süreçlerde) teslim hızı artırılabilir.
+
+Kullanım:
+    python outbox.py run --workers 4
+    python outbox.py status
+    python outbox.py requeue
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from config import OUTBOX_CONFIG
+from db_manager import DatabaseManager
+from email_manager import EmailManager, SendTimeoutError, backoff_delay, is_permanent, wait_for
+
+OutboxNotification = namedtuple('OutboxNotification', 'id recipient_id email subject body attempts')
+OutboxResult = namedtuple('OutboxResult', 'claimed sent retried failed')
+
+# Sonuçlar sahiplenme süresinin bu oranı kadar beklenir; kalan süre sonuçları yazmaya ayrılır
+LEASE_WAIT_RATIO = 0.9
+
+
+class OutboxWorker:
+    """Giden kutusundaki bildirimleri partiler halinde sahiplenip gönderen işçi"""
+
+    def __init__(self, db=None, mailer=None, batch_size=None, lease_seconds=None, max_attempts=None):
+        self.db = db or DatabaseManager.get_instance()
+        self.mailer = mailer or EmailManager.get_instance()
+        self.batch_size = batch_size or OUTBOX_CONFIG['batch_size']
+        self.lease_seconds = lease_seconds or OUTBOX_CONFIG['lease_seconds']
+        self.max_attempts = max_attempts or OUTBOX_CONFIG['max_attempts']
+
+    def run_once(self):
+        """Bir parti bildirimi sahiplen ve gönder; OutboxResult döndür.
+
+        Sonuçlar sahiplenme süresi dolmadan beklenir; süresinde gönderilemeyen
+        bildirimler gönderildi sayılmaz ve yeniden denenir. Böylece süre dolup
+        başka bir işçi aynı bildirimleri sahiplendiğinde çift gönderim olmaz.
+        """
+        deadline = time.monotonic() + self.lease_seconds * LEASE_WAIT_RATIO
+        notifications = [
+            OutboxNotification(*row)
+            for row in self.db.claim_notifications(self.batch_size, self.lease_seconds)
+        ]
+        if not notifications:
+            return OutboxResult(0, 0, 0, 0)
+
+        pending = []
+        failures = []
+        for notification in notifications:
+            if not notification.email:
+                failures.append((notification.id, None, "Alıcının e-posta adresi yok"))
+                continue
+            future = self.mailer.send(notification.email, notification.subject, notification.body)
+            pending.append((notification, future))
+
+        sent = []
+        retried = 0
+        for notification, future in pending:
+            error = wait_for(future, deadline)
+            if error is None:
+                sent.append(notification.id)
+            elif not isinstance(error, SendTimeoutError) and (
+                    notification.attempts >= self.max_attempts or is_permanent(error)):
+                failures.append((notification.id, None, str(error)))
+            else:
+                delay = backoff_delay(notification.attempts, OUTBOX_CONFIG['backoff_base'],
+                                      OUTBOX_CONFIG['backoff_max'])
+                failures.append((notification.id, delay, str(error)))
+                retried += 1
+
+        with self.db.transaction() as tx:
+            if sent:
+                self.db.mark_notifications_sent(sent, tx=tx)
+            self.db.fail_notifications(failures, tx=tx)
+
+        failed = len(failures) - retried
+        if failed:
+            logging.warning("%d bildirim kalıcı olarak gönderilemedi", failed)
+        return OutboxResult(len(notifications), len(sent), retried, failed)
+
+    def run(self, stop, poll_interval=None):
+        """stop (threading.Event) kurulana kadar bildirimleri teslim et"""
+        poll_interval = poll_interval or OUTBOX_CONFIG['poll_interval']
+        while not stop.is_set():
+            try:
+                result = self.run_once()
+            except Exception as e:
+                logging.error("Bildirim teslimi sırasında hata: %s", e)
+                stop.wait(poll_interval)
+                continue
+            # Parti dolu geldiyse kuyrukta bekleyen olabilir, beklemeden devam edilir
+            if result.claimed < self.batch_size:
+                stop.wait(poll_interval)
+
+
+def start_workers(count=None, db=None, mailer=None):
+    """count kadar teslim iş parçacığı başlat; (iş parçacıkları, durdurma olayı) döndür"""
+    count = count or OUTBOX_CONFIG['workers']
+    stop = threading.Event()
+    threads = []
+    for i in range(count):
+        worker = OutboxWorker(db, mailer)
+        thread = threading.Thread(target=worker.run, args=(stop,), name=f'outbox-{i}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    logging.info("%d bildirim teslim işçisi başlatıldı", count)
+    return threads, stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bildirim giden kutusu teslimi")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="bildirimleri durdurulana kadar teslim et")
+    run.add_argument('--workers', type=int, default=None)
+    commands.add_parser('status', help="duruma göre bildirim sayıları")
+    requeue = commands.add_parser('requeue', help="başarısız bildirimleri yeniden kuyruğa al")
+    requeue.add_argument('ids', type=int, nargs='*')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db = DatabaseManager.get_instance()
+    try:
+        if args.command == 'run':
+            threads, stop = start_workers(args.workers, db)
+            try:
+                for thread in threads:
+                    thread.join()
+            except KeyboardInterrupt:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+                EmailManager.get_instance().close()
+        elif args.command == 'status':
+            for status, count in sorted(db.get_outbox_counts().items()):
+                print("%-12s %8d" % (status, count))
+        else:
+            count = db.requeue_failed_notifications(args.ids or None)
+            print("%d bildirim yeniden kuyruğa alındı" % count)
+    finally:
+        db.close_all()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
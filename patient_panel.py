@@ -13,6 +13,8 @@ from matplotlib.figure import Figure
 import matplotlib
 import sys
 from db_manager import DatabaseManager
+from glycemic_analytics import summarize, to_datetime64
+from downsampling import axes_point_budget, downsample
 matplotlib.use('TkAgg')
 
 class PatientPanel(ctk.CTkToplevel):
@@ -128,7 +130,7 @@ class PatientPanel(ctk.CTkToplevel):
             db = DatabaseManager.get_instance()
 
             # Kullanıcı ID'sini al
-            user = db.get_user_by_tc(self.tc)
+            user = db.get_user_record(tc=self.tc)
             if not user:
                 self.show_message("Kullanıcı bulunamadı!", "error")
                 return
@@ -136,7 +138,7 @@ class PatientPanel(ctk.CTkToplevel):
             user_id = user[0]  # user_id ilk sırada
 
             # Son 7 günlük ölçümler
-            measurements = db.get_patient_measurements(
+            times, levels = db.get_patient_measurement_arrays(
                 user_id, 
                 start_date=datetime.now() - timedelta(days=7)
             )
@@ -168,23 +170,25 @@ class PatientPanel(ctk.CTkToplevel):
             stats_frame = ctk.CTkFrame(self.dashboard_frame)
             stats_frame.pack(fill="x", padx=10, pady=5)
 
-            if measurements:
-                levels = [m[0] for m in measurements]
-                avg_level = sum(levels) / len(levels)
-                min_level = min(levels)
-                max_level = max(levels)
+            if levels.size:
+                summary = summarize(levels)
 
                 ctk.CTkLabel(stats_frame, text=f"Son 7 Gün İstatistikleri:").pack()
-                ctk.CTkLabel(stats_frame, text=f"Ortalama: {avg_level:.1f} mg/dL").pack()
-                ctk.CTkLabel(stats_frame, text=f"En Düşük: {min_level:.1f} mg/dL").pack()
-                ctk.CTkLabel(stats_frame, text=f"En Yüksek: {max_level:.1f} mg/dL").pack()
+                ctk.CTkLabel(stats_frame, text=f"Ortalama: {summary.mean:.1f} mg/dL").pack()
+                ctk.CTkLabel(stats_frame, text=f"En Düşük: {summary.min:.1f} mg/dL").pack()
+                ctk.CTkLabel(stats_frame, text=f"En Yüksek: {summary.max:.1f} mg/dL").pack()
+                ctk.CTkLabel(stats_frame, text=f"Hedef Aralıkta (70-180): %{summary.tir * 100:.0f}").pack()
+                ctk.CTkLabel(stats_frame, text=f"Hedefin Altında / Üstünde: %{summary.tbr * 100:.0f} / %{summary.tar * 100:.0f}").pack()
+                ctk.CTkLabel(stats_frame, text=f"Tahmini HbA1c (GMI): %{summary.gmi:.1f}").pack()
+                ctk.CTkLabel(stats_frame, text=f"Değişkenlik (CV): %{summary.cv:.1f}").pack()
 
                 # Grafik
                 fig = Figure(figsize=(6, 4))
                 ax = fig.add_subplot(111)
                 
-                dates = [m[1] for m in measurements]
-                ax.plot(dates, levels, 'b-')
+                # Çizilen nokta sayısı eksen genişliğine göre sınırlanır
+                plot_times, plot_levels = downsample(times, levels, axes_point_budget(ax))
+                ax.plot(to_datetime64(plot_times), plot_levels, 'b-')
                 ax.set_title('Şeker Seviyesi Grafiği')
                 ax.set_xlabel('Tarih')
                 ax.set_ylabel('mg/dL')
@@ -441,28 +445,48 @@ class PatientPanel(ctk.CTkToplevel):
 
             try:
                 db = DatabaseManager.get_instance()
-                user = db.get_user_by_tc(self.tc)
+
+                # İnsülin önerisi al
+                meal_time = 'açlık'  # Varsayılan olarak açlık
+                if current_hour >= 11:  # 11:00'dan sonraki ölçümler tokluk sayılır
+                    meal_time = 'tokluk'
+
+                # Uyarı kontrolü
+                alert_message = None
+                alert_type = None
+
+                if value < 70:
+                    alert_type = "hipoglisemi"
+                    alert_message = "Hipoglisemi riski! Acil müdahale gerekebilir."
+                elif value > 200:
+                    alert_type = "hiperglisemi"
+                    alert_message = "Hiperglisemi durumu! Acil müdahale gerekebilir."
+
+                user = db.get_user_record(tc=self.tc)
                 if not user:
                     self.show_message("Kullanıcı bulunamadı!", "error")
                     return
 
                 user_id = user[0]
 
-                # Ölçümü kaydet
-                measurement_query = """
-                    INSERT INTO sugar_measurements (patient_id, sugar_level, measurement_time)
-                    VALUES (%s, %s, %s) RETURNING id
-                """
-                measurement_result = db.execute_query(measurement_query, (user_id, value, current_time))
-                measurement_id = measurement_result[0][0]
+                # Ölçüm, öneri sorgusu ve uyarılar tek işlemde kaydedilir;
+                # herhangi biri başarısız olursa hiçbiri kaydedilmez
+                with db.transaction() as tx:
+                    # Ölçümü kaydet
+                    measurement_id = db.save_sugar_measurement(user_id, value, current_time, tx=tx)
 
-                # İnsülin önerisi al
-                meal_time = 'açlık'  # Varsayılan olarak açlık
-                if current_hour >= 11:  # 11:00'dan sonraki ölçümler tokluk sayılır
-                    meal_time = 'tokluk'
+                    recommendation = db.get_insulin_recommendation(value, meal_time, tx=tx)
+
+                    if alert_message:
+                        db.save_alert(user_id, alert_type, alert_message, tx=tx)
+
+                    if not is_valid_time:
+                        db.save_alert(
+                            user_id, "zaman_uyarisi",
+                            "Ölçüm standart saatler dışında yapıldı. Lütfen belirtilen saatlerde ölçüm yapın.",
+                            tx=tx
+                        )
 
-                recommendation = db.get_insulin_recommendation(value, meal_time)
-                
                 if recommendation:
                     insulin_type, base_units, unit_per_carb, notes = recommendation[0]
                     
@@ -477,30 +501,6 @@ class PatientPanel(ctk.CTkToplevel):
                         notes
                     )
 
-                # Uyarı kontrolü ve kaydetme
-                alert_message = None
-                alert_type = None
-
-                if value < 70:
-                    alert_type = "hipoglisemi"
-                    alert_message = "Hipoglisemi riski! Acil müdahale gerekebilir."
-                elif value > 200:
-                    alert_type = "hiperglisemi"
-                    alert_message = "Hiperglisemi durumu! Acil müdahale gerekebilir."
-
-                if alert_message:
-                    db.execute_query("""
-                        INSERT INTO alerts (patient_id, alert_type, message)
-                        VALUES (%s, %s, %s)
-                    """, (user_id, alert_type, alert_message))
-
-                if not is_valid_time:
-                    db.execute_query("""
-                        INSERT INTO alerts (patient_id, alert_type, message)
-                        VALUES (%s, %s, %s)
-                    """, (user_id, "zaman_uyarisi", 
-                          "Ölçüm standart saatler dışında yapıldı. Lütfen belirtilen saatlerde ölçüm yapın."))
-
                 # Başarı mesajı
                 success_msg = f"Ölçüm kaydedildi: {value} mg/dL"
                 if not is_valid_time:
@@ -658,7 +658,7 @@ class PatientPanel(ctk.CTkToplevel):
             db = DatabaseManager.get_instance()
 
             # Kullanıcı ID'sini al
-            user = db.get_user_by_tc(self.tc)
+            user = db.get_user_record(tc=self.tc)
             if not user:
                 self.show_message("Kullanıcı bulunamadı!", "error")
                 return
@@ -666,17 +666,12 @@ class PatientPanel(ctk.CTkToplevel):
             user_id = user[0]
 
             # Diyet türü ID'sini al
-            diet_types = db.execute_query(
-                "SELECT id FROM diet_types WHERE name = %s",
-                (diet_type,)
-            )
+            diet_type_id = db.get_diet_type_id(diet_type)
             
-            if not diet_types:
+            if diet_type_id is None:
                 self.show_message("Diyet türü bulunamadı!", "error")
                 return
 
-            diet_type_id = diet_types[0][0]
-
             # Bugün için kayıt var mı kontrol et
             existing = db.execute_query("""
                 SELECT id FROM diet_tracking 
@@ -726,7 +721,7 @@ class PatientPanel(ctk.CTkToplevel):
             db = DatabaseManager.get_instance()
 
             # Kullanıcı ID'sini al
-            user = db.get_user_by_tc(self.tc)
+            user = db.get_user_record(tc=self.tc)
             if not user:
                 self.show_message("Kullanıcı bulunamadı!", "error")
                 return
@@ -734,17 +729,12 @@ class PatientPanel(ctk.CTkToplevel):
             user_id = user[0]
 
             # Egzersiz türü ID'sini al
-            exercise_types = db.execute_query(
-                "SELECT id FROM exercise_types WHERE name = %s",
-                (exercise_type,)
-            )
+            exercise_type_id = db.get_exercise_type_id(exercise_type)
             
-            if not exercise_types:
+            if exercise_type_id is None:
                 self.show_message("Egzersiz türü bulunamadı!", "error")
                 return
 
-            exercise_type_id = exercise_types[0][0]
-
             # Bugün için kayıt var mı kontrol et
             existing = db.execute_query("""
                 SELECT id FROM exercise_tracking 
@@ -789,7 +779,7 @@ class PatientPanel(ctk.CTkToplevel):
         """Kullanıcı bilgilerini ve profil resmini yükle"""
         try:
             db = DatabaseManager.get_instance()
-            user = db.get_user_by_tc(self.tc)
+            user = db.get_user_record(tc=self.tc)
             if not user:
                 self.show_message("Kullanıcı bulunamadı!", "error")
                 return
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Gecikme kovalarının üst sınırları (ms): 0.05 ms'den ~100 s'ye 1.25 katlanarak
+_BUCKET_BOUNDS = []
+_bound = 0.05
+while _bound < 100000:
+    _BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.25
+_BUCKET_BOUNDS.append(float('inf'))
+
+
+# Sorgu metotlarının tanımlandığı modüller
+_MANAGER_MODULES = ('db_manager', 'async_db_manager')
+
+
+def caller_tag(internal, depth=1):
+    """Sorguyu başlatan metodun adını bul.
+
+    db_manager içindeki yardımcı katmanları (`internal`) atlayıp ilk gerçek
+    çağıranı döndürür; DatabaseManager dışından gelen çağrılar
+    `modül.fonksiyon` biçiminde etiketlenir.
+    """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        if module in _MANAGER_MODULES:
+            if code.co_name not in internal:
+                return code.co_name
+        elif module not in ('contextlib', 'query_stats'):
+            return "%s.%s" % (module, code.co_name)
+        frame = frame.f_back
+    return 'bilinmeyen'
+
+
+class LatencyHistogram:
+    """Log ölçekli kovalarla tutulan gecikme histogramı"""
+
+    def __init__(self):
+        self.buckets = [0] * len(_BUCKET_BOUNDS)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def record(self, elapsed_ms, rows=0, failed=False):
+        index = 0
+        while elapsed_ms > _BUCKET_BOUNDS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.rows += rows
+        if failed:
+            self.errors += 1
+        if self.min_ms is None or elapsed_ms < self.min_ms:
+            self.min_ms = elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def percentile(self, p):
+        """Yüzdelik değeri kova üst sınırı olarak yaklaşık hesapla"""
+        if not self.count:
+            return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                return min(_BUCKET_BOUNDS[index], self.max_ms)
+        return self.max_ms
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': round(self.percentile(50), 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+        }
+
+
+class QueryTimer:
+    """Tek bir sorgunun süresini ölçüp QueryStats'a kaydeden bağlam yöneticisi"""
+
+    def __init__(self, stats, tag, query):
+        self.stats = stats
+        self.tag = tag
+        self.query = query
+        self.rows = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        # Üretecin erken kapatılması (GeneratorExit) hata sayılmaz
+        failed = exc_type is not None and issubclass(exc_type, Exception)
+        self.stats.record(self.tag, elapsed_ms, self.rows, self.query, failed=failed)
+        return False
+
+
+class QueryStats:
+    """Sorgu gecikme histogramları ve yavaş sorgu günlüğü.
+
+    Her sorgu çağıran metodun adıyla etiketlenir; etiket başına sayı,
+    dönen satır ve p50/p95/p99 gecikme tutulur. Eşiği aşan sorgular
+    parametreleri olmadan JSON satırı olarak yavaş sorgu günlüğüne yazılır.
+    """
+
+    def __init__(self, slow_query_ms=200.0, slow_query_log='slow_queries.log'):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._started_at = datetime.now()
+        self._slow_logger = logging.getLogger('diyabet.slow_queries')
+        self._slow_logger.propagate = False
+        if slow_query_log and not self._slow_logger.handlers:
+            handler = logging.FileHandler(slow_query_log, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._slow_logger.addHandler(handler)
+            self._slow_logger.setLevel(logging.INFO)
+
+    def measure(self, tag, query=None):
+        return QueryTimer(self, tag, query)
+
+    def record(self, tag, elapsed_ms, rows=0, query=None, failed=False):
+        with self._lock:
+            histogram = self._histograms.get(tag)
+            if histogram is None:
+                histogram = self._histograms[tag] = LatencyHistogram()
+            histogram.record(elapsed_ms, rows, failed)
+
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            self._slow_logger.info(json.dumps({
+                'time': datetime.now().isoformat(timespec='milliseconds'),
+                'tag': tag,
+                'duration_ms': round(elapsed_ms, 3),
+                'rows': rows,
+                'failed': failed,
+                'query': " ".join(query.split())[:500] if query else None,
+            }, ensure_ascii=False))
+
+    def snapshot(self):
+        """Etiket başına istatistikleri toplam süreye göre azalan sırada döndür"""
+        with self._lock:
+            stats = {tag: histogram.snapshot() for tag, histogram in self._histograms.items()}
+        return dict(sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def export(self, path, extra=None):
+        """İstatistikleri (ve varsa extra sözlüğündeki ek bölümleri) JSON dosyasına yaz"""
+        data = {
+            'since': self._started_at.isoformat(timespec='seconds'),
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+            'slow_query_ms': self.slow_query_ms,
+            'queries': self.snapshot(),
+        }
+        data.update(extra or {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._started_at = datetime.now()
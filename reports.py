@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Doktor için dönemlik hasta ve kohort raporları.
+
+Veriler ana süreçte birkaç toplu sorguyla okunur: ölçümler ikili COPY ile
+NumPy dizisi olarak (get_doctor_measurement_arrays), diyet/egzersiz uyumu ve
+uyarı sayıları hasta başına tek satır olarak (get_doctor_report_counts).
+Hasta başına klinik metrikler (glycemic_analytics) süreç havuzunda parçalar
+halinde hesaplanır ve her parça bittikçe sonuçlar üreteçten akar; arayüz ilk
+satırları tüm rapor bitmeden gösterebilir.
+
+Kullanım:
+    engine = CohortReportEngine()
+    data = engine.load(doctor_id, start_date, end_date)
+    reports = []
+    for report in engine.iter_reports(data):
+        reports.append(report)
+    summary = cohort_summary(reports)
+"""
+
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from config import REPORT_CONFIG
+from db_manager import DatabaseManager
+from glycemic_analytics import summarize
+
+# Kohort özetinde TIR hedefi (uzlaşı raporu: zamanın en az %70'i hedef aralıkta)
+TIR_TARGET = 0.70
+
+PatientReport = namedtuple('PatientReport', [
+    'patient_id', 'tc', 'full_name', 'count', 'mean', 'tir', 'tbr', 'tar',
+    'gmi', 'cv', 'mage', 'lbgi', 'hbgi',
+    'diet_adherence', 'exercise_adherence', 'alert_count', 'critical_alert_count'
+])
+
+CohortSummary = namedtuple('CohortSummary', [
+    'patient_count', 'measured_patients', 'mean_tir', 'median_tir',
+    'below_target', 'total_alerts', 'ranking'
+])
+
+ReportData = namedtuple('ReportData', 'patients levels days')
+
+
+def _patient_metrics(chunk):
+    """İşçi süreçte çalışır: [(patient_id, levels), ...] -> [(patient_id, GlycemicSummary), ...]"""
+    return [(patient_id, summarize(levels)) for patient_id, levels in chunk]
+
+
+def patient_slices(patient_ids):
+    """Hasta sırasıyla gelen patient_ids dizisini {patient_id: slice} sözlüğüne ayır"""
+    if not patient_ids.size:
+        return {}
+    starts = np.flatnonzero(np.r_[True, patient_ids[1:] != patient_ids[:-1]])
+    ends = np.r_[starts[1:], patient_ids.size]
+    return {int(patient_ids[start]): slice(start, end) for start, end in zip(starts, ends)}
+
+
+def _build_report(row, summary, days):
+    patient_id, tc, full_name, diet_days, exercise_days, alert_count, critical_count = row
+    metrics = {}
+    if summary is not None:
+        metrics = {
+            'count': summary.count, 'mean': summary.mean, 'tir': summary.tir,
+            'tbr': summary.tbr, 'tar': summary.tar, 'gmi': summary.gmi, 'cv': summary.cv,
+            'mage': summary.mage, 'lbgi': summary.lbgi, 'hbgi': summary.hbgi,
+        }
+    return PatientReport(
+        patient_id=patient_id,
+        tc=tc,
+        full_name=full_name,
+        count=metrics.get('count', 0),
+        mean=metrics.get('mean'),
+        tir=metrics.get('tir'),
+        tbr=metrics.get('tbr'),
+        tar=metrics.get('tar'),
+        gmi=metrics.get('gmi'),
+        cv=metrics.get('cv'),
+        mage=metrics.get('mage'),
+        lbgi=metrics.get('lbgi'),
+        hbgi=metrics.get('hbgi'),
+        diet_adherence=diet_days / days,
+        exercise_adherence=exercise_days / days,
+        alert_count=alert_count,
+        critical_alert_count=critical_count
+    )
+
+
+class CohortReportEngine:
+    """Doktorun aktif hastaları için dönemlik raporları hesaplayan motor"""
+
+    def __init__(self, db=None, workers=None, chunk_size=None, parallel_threshold=None):
+        self.db = db or DatabaseManager.get_instance()
+        self.workers = workers or REPORT_CONFIG['workers'] or os.cpu_count() or 1
+        self.chunk_size = chunk_size or REPORT_CONFIG['chunk_size']
+        self.parallel_threshold = (parallel_threshold if parallel_threshold is not None
+                                   else REPORT_CONFIG['parallel_threshold'])
+
+    def load(self, doctor_id, start_date, end_date):
+        """Rapor dönemi verilerini toplu sorgularla oku (iki uç dahil)"""
+        if end_date < start_date:
+            raise ValueError("Bitiş tarihi başlangıç tarihinden önce olamaz")
+        patients = self.db.get_doctor_report_counts(doctor_id, start_date, end_date)
+        arrays = self.db.get_doctor_measurement_arrays(
+            doctor_id,
+            start_date=datetime.combine(start_date, datetime.min.time()),
+            end_date=datetime.combine(end_date, datetime.max.time())
+        )
+        levels = {patient_id: arrays.levels[rows] for patient_id, rows in patient_slices(arrays.patient_ids).items()}
+        return ReportData(patients, levels, (end_date - start_date).days + 1)
+
+    def iter_reports(self, data):
+        """Hasta raporlarını hesaplandıkça üret (sıra tamamlanma sırasıdır)"""
+        info = {row[0]: row for row in data.patients}
+        empty = np.empty(0, dtype=np.float32)
+        work = [(patient_id, data.levels.get(patient_id, empty)) for patient_id in info]
+
+        if len(work) < self.parallel_threshold or self.workers < 2:
+            for patient_id, summary in _patient_metrics(work):
+                yield _build_report(info[patient_id], summary, data.days)
+            return
+
+        chunks = [work[i:i + self.chunk_size] for i in range(0, len(work), self.chunk_size)]
+        # Arayüz iş parçacığından fork edilen süreç Tk ve bağlantı havuzunun
+        # kilitlerini kopyalayacağından süreçler spawn ile başlatılır
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_patient_metrics, chunk) for chunk in chunks]
+            try:
+                for future in as_completed(futures):
+                    for patient_id, summary in future.result():
+                        yield _build_report(info[patient_id], summary, data.days)
+            finally:
+                # Tüketici erken bırakırsa henüz başlamamış parçalar iptal edilir
+                for future in futures:
+                    future.cancel()
+
+    def run(self, doctor_id, start_date, end_date):
+        """Raporu baştan sona hesapla: (TIR'a göre sıralı hasta raporları, kohort özeti)"""
+        reports = list(self.iter_reports(self.load(doctor_id, start_date, end_date)))
+        summary = cohort_summary(reports)
+        return summary.ranking, summary
+
+
+def rank_by_tir(reports):
+    """Raporları TIR'a göre artan sırada (en çok dikkat gerektiren önce) sırala.
+
+    Dönemde ölçümü olmayan hastalar sonda yer alır.
+    """
+    return sorted(reports, key=lambda r: (r.tir is None, r.tir if r.tir is not None else 0.0,
+                                          r.full_name))
+
+
+def cohort_summary(reports):
+    """Hasta raporlarından kohort özetini hesapla"""
+    tirs = np.array([r.tir for r in reports if r.tir is not None], dtype=np.float64)
+    return CohortSummary(
+        patient_count=len(reports),
+        measured_patients=int(tirs.size),
+        mean_tir=float(tirs.mean()) if tirs.size else None,
+        median_tir=float(np.median(tirs)) if tirs.size else None,
+        below_target=int(np.count_nonzero(tirs < TIR_TARGET)),
+        total_alerts=sum(r.alert_count for r in reports),
+        ranking=rank_by_tir(reports)
+    )
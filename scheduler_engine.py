@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""Olay güdümlü iş zamanlayıcısı.
+
+İşlerin bir sonraki çalışma zamanları bir yığında (heap) tutulur; dağıtıcı
+iş parçacığı en yakın işin zamanına kadar koşul değişkeninde bekler ve
+zamanı gelen işi iş parçacığı havuzuna verir. Böylece işler dakikalarca
+kaymaz ve uzun süren bir iş diğerlerini bekletmez.
+
+    - Her işin aynı anda en fazla max_concurrency çalışması olur. Sınır
+      doluyken zamanı gelen çalıştırmalar tek bir bekleyen çalıştırmada
+      birleştirilir ve bir çalışma bitince hemen başlatılır.
+    - Son çalıştırma zamanları durum dosyasına yazılır. Zamanlayıcı
+      kapalıyken kaçırılan çalıştırmalar (catch_up) açılışta bir kez
+      çalıştırılır.
+    - İş başına çalışma sayısı, hata, birleştirilen çalıştırma, gecikme
+      (planlanan zaman ile başlama arası) ve süre histogramları tutulur.
+
+Kullanım:
+    scheduler = Scheduler(workers=4, state_file='scheduler_state.json')
+    scheduler.add_job('rapor', send_reports, Weekly(0, '09:00'))
+    scheduler.add_job('hatırlatma', send_reminders, Daily('07:00', '12:00', '18:00'))
+    scheduler.run_forever()
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from query_stats import LatencyHistogram
+
+# Saat değişikliklerinin (yaz saati, NTP düzeltmesi) fark edilmesi için en uzun bekleme (saniye)
+MAX_SLEEP = 3600.0
+
+
+class Daily:
+    """Her gün verilen saatlerde (SS:DD) çalışma"""
+
+    def __init__(self, *times):
+        if not times:
+            raise ValueError("En az bir saat verilmelidir")
+        self.times = sorted(datetime.strptime(t, '%H:%M').time() for t in times)
+
+    def next_after(self, moment):
+        for days in (0, 1):
+            day = moment.date() + timedelta(days=days)
+            for at in self.times:
+                candidate = datetime.combine(day, at)
+                if candidate > moment:
+                    return candidate
+
+    def __repr__(self):
+        return "Daily(%s)" % ", ".join(t.strftime('%H:%M') for t in self.times)
+
+
+class Weekly:
+    """Her hafta verilen günde (0: Pazartesi) ve saatte çalışma"""
+
+    def __init__(self, weekday, at):
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"Geçersiz gün: {weekday}")
+        self.weekday = weekday
+        self.time = datetime.strptime(at, '%H:%M').time()
+
+    def next_after(self, moment):
+        day = moment.date() + timedelta(days=(self.weekday - moment.weekday()) % 7)
+        candidate = datetime.combine(day, self.time)
+        if candidate <= moment:
+            candidate += timedelta(days=7)
+        return candidate
+
+    def __repr__(self):
+        return "Weekly(%d, %s)" % (self.weekday, self.time.strftime('%H:%M'))
+
+
+class Every:
+    """Sabit aralıklarla (saniye) çalışma"""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Aralık pozitif olmalıdır")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_after(self, moment):
+        return moment + self.interval
+
+    def __repr__(self):
+        return "Every(%s)" % self.interval.total_seconds()
+
+
+class _Job:
+    def __init__(self, name, func, schedule, max_concurrency, catch_up):
+        self.name = name
+        self.func = func
+        self.schedule = schedule
+        self.max_concurrency = max_concurrency
+        self.catch_up = catch_up
+        self.running = 0
+        # Sınır doluyken biriken çalıştırmaların en eski planlanan zamanı
+        self.pending = None
+        self.next_run = None
+        self.last_run = None
+        self.runs = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.lag = LatencyHistogram()
+        self.duration = LatencyHistogram()
+
+
+class Scheduler:
+    """Yığın tabanlı, iş parçacığı havuzunda çalışan zamanlayıcı"""
+
+    def __init__(self, workers=4, state_file=None):
+        self.state_file = state_file
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+        self._cond = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._state = self._load_state()
+        self._stopped = False
+        self._dispatcher = None
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return {name: datetime.fromisoformat(value) for name, value in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            logging.error("Zamanlayıcı durum dosyası okunamadı: %s", e)
+            return {}
+
+    def _save_state(self):
+        """Son çalıştırma zamanlarını dosyaya yaz (_cond tutulurken çağrılır)"""
+        if not self.state_file:
+            return
+        data = {name: moment.isoformat() for name, moment in self._state.items()}
+        temporary = self.state_file + '.tmp'
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temporary, self.state_file)
+        except OSError as e:
+            logging.error("Zamanlayıcı durum dosyası yazılamadı: %s", e)
+
+    def _push(self, job, moment):
+        job.next_run = moment
+        heapq.heappush(self._heap, (moment, next(self._sequence), job.name))
+        self._cond.notify()
+
+    def add_job(self, name, func, schedule, max_concurrency=1, catch_up=True, run_at_start=False):
+        """İş ekle.
+
+        catch_up ise zamanlayıcı kapalıyken kaçırılan çalıştırma açılışta bir
+        kez yapılır; run_at_start ise iş başlangıçta hemen çalıştırılır.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency en az 1 olmalıdır")
+        with self._cond:
+            if name in self._jobs:
+                raise ValueError(f"Aynı adla iş zaten var: {name}")
+            job = self._jobs[name] = _Job(name, func, schedule, max_concurrency, catch_up)
+            now = datetime.now()
+            last = self._state.get(name)
+            job.last_run = last
+            if run_at_start:
+                first = now
+            elif catch_up and last is not None and schedule.next_after(last) <= now:
+                # Kaçırılan çalıştırmalar tek çalıştırmada birleştirilir; gecikme kapalı kalınan süreyi gösterir
+                first = schedule.next_after(last)
+                logging.info("%s işi kapalıyken kaçırılan %s çalıştırması yapılacak", name, first)
+            else:
+                first = schedule.next_after(now)
+            self._push(job, first)
+        return job
+
+    def start(self):
+        """Dağıtıcı iş parçacığını başlat"""
+        with self._cond:
+            if self._dispatcher is not None:
+                return
+            self._dispatcher = threading.Thread(target=self._dispatch, name='scheduler-dispatch', daemon=True)
+            self._dispatcher.start()
+
+    def run_forever(self):
+        """Zamanlayıcıyı başlat ve durdurulana (ya da Ctrl+C) kadar bekle"""
+        self.start()
+        try:
+            while self._dispatcher.is_alive():
+                self._dispatcher.join(MAX_SLEEP)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self, wait=True):
+        """Yeni çalıştırmaları durdur; wait ise süren işlerin bitmesini bekle"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._pool.shutdown(wait=wait)
+
+    def _dispatch(self):
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait(MAX_SLEEP)
+                    continue
+                now = datetime.now()
+                moment = self._heap[0][0]
+                if moment > now:
+                    self._cond.wait(min((moment - now).total_seconds(), MAX_SLEEP))
+                    continue
+                _, _, name = heapq.heappop(self._heap)
+                job = self._jobs[name]
+                # Uzun bir duraklamada geçen çalıştırmalar atlanır, sıradaki gelecek zamana kurulur
+                self._push(job, job.schedule.next_after(max(now, moment)))
+                if job.running < job.max_concurrency:
+                    self._submit(job, moment)
+                else:
+                    job.coalesced += 1
+                    if job.pending is None:
+                        job.pending = moment
+                        logging.warning("%s işi hâlâ çalışıyor (%d), %s çalıştırması bekletiliyor",
+                                        name, job.running, moment)
+
+    def _submit(self, job, scheduled):
+        """İşi havuza ver (_cond tutulurken çağrılır)"""
+        job.running += 1
+        try:
+            self._pool.submit(self._run, job, scheduled)
+        except RuntimeError:
+            # Havuz kapatıldı
+            job.running -= 1
+
+    def _run(self, job, scheduled):
+        started = datetime.now()
+        start = time.perf_counter()
+        failed = False
+        try:
+            job.func()
+        except Exception as e:
+            failed = True
+            logging.error("%s işi sırasında hata: %s", job.name, e)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        lag_ms = max(0.0, (started - scheduled).total_seconds() * 1000)
+
+        with self._cond:
+            job.running -= 1
+            job.runs += 1
+            job.errors += failed
+            job.lag.record(lag_ms, failed=failed)
+            job.duration.record(elapsed_ms, failed=failed)
+            if job.last_run is None or scheduled > job.last_run:
+                job.last_run = scheduled
+                self._state[job.name] = scheduled
+                self._save_state()
+            if job.pending is not None and not self._stopped:
+                pending, job.pending = job.pending, None
+                self._submit(job, pending)
+
+    def metrics(self):
+        """İş başına çalışma, hata, birleştirilen çalıştırma, gecikme ve süre (ms) istatistikleri"""
+        with self._cond:
+            return {
+                name: {
+                    'schedule': repr(job.schedule),
+                    'runs': job.runs,
+                    'errors': job.errors,
+                    'coalesced': job.coalesced,
+                    'running': job.running,
+                    'last_run': job.last_run.isoformat(timespec='seconds') if job.last_run else None,
+                    'next_run': job.next_run.isoformat(timespec='seconds') if job.next_run else None,
+                    'lag': job.lag.snapshot(),
+                    'duration': job.duration.snapshot(),
+                }
+                for name, job in self._jobs.items()
+            }
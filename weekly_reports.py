@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""Haftalık hasta ve doktor raporlarının oluşturulması ve teslimi.
+
+Pazartesi işi bir önceki haftayı (Pazartesi-Pazar) raporlar:
+
+    1. Aktif hastası olan her doktorun kohortu ana süreçte toplu sorgularla
+       okunur (get_doctor_report_counts ve ikili COPY ile ölçüm dizileri).
+    2. Hasta özetleri, kohort özeti ve grafikler süreç havuzunda hesaplanır;
+       grafikler pencere açmadan (Agg) PNG olarak çizilir.
+    3. Bir doktorun tüm raporları weekly_reports tablosuna tek işlemde
+       yazılır. Yazılan kohort özeti o doktor için devam noktasıdır: iş
+       yarıda kesilirse bir sonraki çalıştırma yalnızca eksik doktorları
+       hesaplar.
+    4. Kuyruktaki raporlar kısa süreli sahiplenmeyle parça parça alınır ve
+       işlem dışında teslim fonksiyonuna aktarılır. Gönderilenler gönderildi
+       olarak işaretlenir; gönderilemeyenler delivery_backoff_* ayarlarıyla
+       artan beklemeyle, hangi haftaya ait olursa olsun yeniden denenir ve
+       delivery_max_attempts denemeden sonra ya da kalıcı hatada 'başarısız'
+       durumuna alınır.
+
+Kullanım:
+    job = WeeklyReportJob()
+    result = job.run(send=lambda reports: [])   # gönderilemeyen (rapor, hata) listesi
+    result = job.run(send=email_reports)   # EmailManager ile e-posta olarak
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from config import REPORT_CONFIG
+from db_manager import DatabaseManager
+from email_manager import Attachment, EmailManager, OutgoingEmail, SendTimeoutError, backoff_delay, is_permanent, wait_for
+from glycemic_analytics import HIGH, LOW, summarize
+from reports import TIR_TARGET, patient_slices
+
+DAY_NAMES = ('Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz')
+
+# Doktor özetinde listelenecek, TIR'ı en düşük hasta sayısı
+ATTENTION_COUNT = 5
+
+WeeklyReport = namedtuple('WeeklyReport', 'id doctor_id patient_id email full_name summary chart attempts')
+WeeklyRunResult = namedtuple('WeeklyRunResult', 'week_start doctors skipped failed reports delivered')
+
+# Teslim sonuçları sahiplenme süresinin bu oranı kadar beklenir; kalan süre sonuçları yazmaya ayrılır
+LEASE_WAIT_RATIO = 0.9
+
+
+def report_week(today=None):
+    """Raporlanacak haftanın (bir önceki Pazartesi-Pazar) ilk ve son günü"""
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday() + 7)
+    return start, start + timedelta(days=6)
+
+
+def _daily_sums(times, levels, week_start):
+    """Haftanın her günü için ölçüm sayısı ve toplamı"""
+    week_epoch = (week_start - date(1970, 1, 1)).days * 86400
+    days = np.clip((np.asarray(times, dtype=np.int64) - week_epoch) // 86400, 0, 6)
+    counts = np.bincount(days, minlength=7)
+    sums = np.bincount(days, weights=np.asarray(levels, dtype=np.float64), minlength=7)
+    return counts, sums
+
+
+def _daily_averages(counts, sums):
+    return [round(float(s / c), 1) if c else None for c, s in zip(counts, sums)]
+
+
+def _render_chart(title, daily_averages):
+    """Günlük ortalamaları PNG grafik olarak çiz (ekran gerektirmez)"""
+    figure = Figure(figsize=(6, 3), dpi=100)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    values = [np.nan if value is None else value for value in daily_averages]
+    ax.axhspan(LOW, HIGH, color='g', alpha=0.1)
+    ax.axhline(y=LOW, color='r', linestyle='--', alpha=0.5)
+    ax.axhline(y=HIGH, color='r', linestyle='--', alpha=0.5)
+    ax.plot(DAY_NAMES, values, 'b-', marker='o')
+    ax.set_title(title)
+    ax.set_ylabel('Şeker Seviyesi (mg/dL)')
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def _patient_summary(row, times, levels, week_start):
+    patient_id, tc, full_name, diet_days, exercise_days, alert_count, critical_count = row
+    counts, sums = _daily_sums(times, levels, week_start)
+    stats = summarize(levels)
+    return {
+        'patient_id': patient_id,
+        'tc': tc,
+        'full_name': full_name,
+        'week_start': week_start.isoformat(),
+        'measurement_count': int(levels.size),
+        'weekly_average': round(stats.mean, 1) if stats else None,
+        'min': stats.min if stats else None,
+        'max': stats.max if stats else None,
+        'tir': stats.tir if stats else None,
+        'hypo_count': int(np.count_nonzero(levels < LOW)),
+        'hyper_count': int(np.count_nonzero(levels > HIGH)),
+        'daily_averages': _daily_averages(counts, sums),
+        'diet_adherence': diet_days / 7,
+        'exercise_adherence': exercise_days / 7,
+        'alert_count': alert_count,
+        'critical_alert_count': critical_count,
+    }
+
+
+def _render_doctor(doctor, week_start, patients, measurements):
+    """İşçi süreçte çalışır: bir doktorun hasta ve kohort raporlarını hesaplayıp çizer.
+
+    measurements {patient_id: (times, levels)} sözlüğüdür. (doctor_id,
+    [(patient_id ya da None, özet, PNG), ...]) döndürür.
+    """
+    doctor_id, _, doctor_name, _ = doctor
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+    reports = []
+    summaries = []
+    cohort_counts = np.zeros(7, dtype=np.int64)
+    cohort_sums = np.zeros(7)
+
+    for row in patients:
+        times, levels = measurements.get(row[0], empty)
+        summary = _patient_summary(row, times, levels, week_start)
+        counts, sums = _daily_sums(times, levels, week_start)
+        cohort_counts += counts
+        cohort_sums += sums
+        chart = _render_chart(f"{summary['full_name']} - Günlük Ortalama", summary['daily_averages'])
+        reports.append((row[0], summary, chart))
+        summaries.append(summary)
+
+    measured = [s for s in summaries if s['measurement_count']]
+    total = sum(s['measurement_count'] for s in measured)
+    attention = sorted((s for s in measured if s['tir'] is not None), key=lambda s: s['tir'])
+    cohort = {
+        'doctor_id': doctor_id,
+        'full_name': doctor_name,
+        'week_start': week_start.isoformat(),
+        'patient_count': len(summaries),
+        'measured_patients': len(measured),
+        'weekly_average': round(sum(s['weekly_average'] * s['measurement_count'] for s in measured) / total, 1)
+        if total else None,
+        'hypo_count': sum(s['hypo_count'] for s in summaries),
+        'hyper_count': sum(s['hyper_count'] for s in summaries),
+        'mean_tir': float(np.mean([s['tir'] for s in measured])) if measured else None,
+        'below_tir_target': sum(1 for s in measured if s['tir'] < TIR_TARGET),
+        'mean_diet_adherence': float(np.mean([s['diet_adherence'] for s in summaries])) if summaries else None,
+        'mean_exercise_adherence': float(np.mean([s['exercise_adherence'] for s in summaries]))
+        if summaries else None,
+        'alert_count': sum(s['alert_count'] for s in summaries),
+        'daily_averages': _daily_averages(cohort_counts, cohort_sums),
+        'attention': [
+            {'patient_id': s['patient_id'], 'full_name': s['full_name'], 'tir': s['tir']}
+            for s in attention[:ATTENTION_COUNT]
+        ],
+    }
+    chart = _render_chart("Hastaların Günlük Ortalaması", cohort['daily_averages'])
+    # Kohort özeti en sona eklenir; devam noktası olduğundan hasta raporlarıyla birlikte yazılır
+    reports.append((None, cohort, chart))
+    return doctor_id, reports
+
+
+def _percent(value):
+    return "-" if value is None else f"%{value * 100:.0f}"
+
+
+def report_email(report):
+    """Raporu grafiği ekli bir e-posta iletisine dönüştür"""
+    s = report.summary
+    week = f"{s['week_start']} haftası"
+    if report.patient_id is not None:
+        subject = f"Haftalık Şeker Raporunuz - {week}"
+        lines = [
+            f"Sayın {report.full_name},",
+            "",
+            f"{week} için ölçüm özetiniz:",
+            f"Ölçüm sayısı: {s['measurement_count']}",
+            f"Haftalık ortalama: {s['weekly_average'] if s['weekly_average'] is not None else '-'} mg/dL",
+            f"Hedef aralıkta geçen süre: {_percent(s['tir'])}",
+            f"Düşük / yüksek ölçüm: {s['hypo_count']} / {s['hyper_count']}",
+            f"Diyet uyumu: {_percent(s['diet_adherence'])}, egzersiz uyumu: {_percent(s['exercise_adherence'])}",
+        ]
+    else:
+        subject = f"Haftalık Hasta Özeti - {week}"
+        lines = [
+            f"Sayın {report.full_name},",
+            "",
+            f"{week} için hastalarınızın özeti:",
+            f"Hasta sayısı: {s['patient_count']} (ölçüm giren: {s['measured_patients']})",
+            f"Haftalık ortalama: {s['weekly_average'] if s['weekly_average'] is not None else '-'} mg/dL",
+            f"Ortalama hedef aralık süresi: {_percent(s['mean_tir'])}",
+            f"Hedefin altında kalan hasta: {s['below_tir_target']}",
+            f"Düşük / yüksek ölçüm: {s['hypo_count']} / {s['hyper_count']}, uyarı: {s['alert_count']}",
+        ]
+        if s['attention']:
+            lines += ["", "Dikkat edilmesi gereken hastalar:"]
+            lines += [f"- {p['full_name']}: {_percent(p['tir'])}" for p in s['attention']]
+    attachments = ()
+    if report.chart is not None:
+        attachments = (Attachment('haftalik_rapor.png', report.chart, 'image', 'png'),)
+    return OutgoingEmail(report.email, subject, "\n".join(lines), attachments)
+
+
+def email_reports(reports, mailer=None, timeout=None):
+    """Raporları EmailManager ile gönder ve sonuçlarını en fazla timeout saniye bekle.
+
+    Gönderilemeyen raporlar için (rapor, hata) listesi döndürür; alıcısının
+    e-posta adresi olmayan raporlar ValueError ile, süresinde gönderilemeyenler
+    SendTimeoutError ile listeye eklenir. timeout verilmezse teslim sahiplenme
+    süresinin dolmasından önce beklemeyi bırakır.
+    """
+    if timeout is None:
+        timeout = REPORT_CONFIG['delivery_lease_seconds'] * LEASE_WAIT_RATIO
+    deadline = time.monotonic() + timeout
+    mailer = mailer or EmailManager.get_instance()
+    failures = [(report, ValueError("Alıcının e-posta adresi yok")) for report in reports if not report.email]
+    addressed = [report for report in reports if report.email]
+    futures = mailer.send_many([report_email(report) for report in addressed], wait=False)
+    for report, future in zip(addressed, futures):
+        error = wait_for(future, deadline)
+        if error is not None:
+            failures.append((report, error))
+    return failures
+
+
+def _is_permanent(error):
+    """ValueError raporun e-postaya dönüştürülemediğini gösterir; yeniden denemek sonucu değiştirmez"""
+    return isinstance(error, ValueError) or is_permanent(error)
+
+
+class WeeklyReportJob:
+    """Haftalık raporları süreç havuzunda oluşturan ve parça parça teslim eden iş"""
+
+    def __init__(self, db=None, workers=None, delivery_chunk_size=None, delivery_max_attempts=None):
+        self.db = db or DatabaseManager.get_instance()
+        self.workers = workers or REPORT_CONFIG['workers'] or os.cpu_count() or 1
+        self.delivery_chunk_size = delivery_chunk_size or REPORT_CONFIG['delivery_chunk_size']
+        self.delivery_lease_seconds = REPORT_CONFIG['delivery_lease_seconds']
+        self.delivery_max_age_days = REPORT_CONFIG['delivery_max_age_days']
+        self.delivery_max_attempts = delivery_max_attempts or REPORT_CONFIG['delivery_max_attempts']
+        self.delivery_backoff = (REPORT_CONFIG['delivery_backoff_base'], REPORT_CONFIG['delivery_backoff_max'])
+
+    def _load(self, doctor_id, week_start, week_end):
+        """Doktorun kohortunu iki toplu sorguyla oku"""
+        patients = self.db.get_doctor_report_counts(doctor_id, week_start, week_end)
+        arrays = self.db.get_doctor_measurement_arrays(
+            doctor_id,
+            start_date=datetime.combine(week_start, datetime.min.time()),
+            end_date=datetime.combine(week_end, datetime.max.time())
+        )
+        measurements = {
+            patient_id: (arrays.times[rows], arrays.levels[rows])
+            for patient_id, rows in patient_slices(arrays.patient_ids).items()
+        }
+        return patients, measurements
+
+    def generate(self, week_start):
+        """Haftanın eksik raporlarını oluştur; (doktor, atlanan, başarısız, rapor) sayılarını döndür"""
+        week_end = week_start + timedelta(days=6)
+        doctors = self.db.get_report_doctors()
+        completed = set(self.db.get_completed_weekly_report_doctors(week_start))
+        pending = [doctor for doctor in doctors if doctor[0] not in completed]
+        if completed:
+            logging.info("%s haftası: %d doktorun raporları zaten hazır, %d doktor kaldı",
+                         week_start, len(completed), len(pending))
+
+        counts = {'reports': 0, 'failed': 0}
+
+        def save(future, doctor):
+            try:
+                doctor_id, reports = future.result()
+                self.db.save_weekly_reports(week_start, doctor_id, reports)
+                counts['reports'] += len(reports)
+            except Exception as e:
+                # Bu doktor devam noktasına yazılmadığından sonraki çalıştırmada yeniden denenir
+                counts['failed'] += 1
+                logging.error("Doktor %s için haftalık rapor oluşturulamadı: %s", doctor[0], e)
+
+        if self.workers < 2 or len(pending) < 2:
+            for doctor in pending:
+                future = _CompletedCall(
+                    lambda: _render_doctor(doctor, week_start, *self._load(doctor[0], week_start, week_end)))
+                save(future, doctor)
+        else:
+            # Okuma ana süreçte, hesaplama havuzda yapılır; bellekte en fazla
+            # iki katı işçi sayısı kadar doktorun verisi bekler
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                inflight = {}
+                for doctor in pending:
+                    if len(inflight) >= self.workers * 2:
+                        finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            save(future, inflight.pop(future))
+                    try:
+                        data = self._load(doctor[0], week_start, week_end)
+                    except Exception as e:
+                        counts['failed'] += 1
+                        logging.error("Doktor %s için kohort verisi okunamadı: %s", doctor[0], e)
+                        continue
+                    inflight[pool.submit(_render_doctor, doctor, week_start, *data)] = doctor
+                for future in wait(inflight).done:
+                    save(future, inflight[future])
+
+        return len(doctors), len(completed), counts['failed'], counts['reports']
+
+    def deliver(self, send):
+        """Kuyruktaki raporları delivery_chunk_size'lık parçalarla send'e aktar.
+
+        Parçalar kısa süreli sahiplenmeyle alınır ve gönderim işlem dışında
+        yapılır. send bir WeeklyReport listesi alır ve gönderilemeyen
+        raporlar için (rapor, hata) listesi döndürür; yalnızca gönderilenler
+        gönderildi olarak işaretlenir. Gönderilemeyenler artan beklemeyle
+        yeniden denenir, delivery_max_attempts denemeden sonra ya da kalıcı
+        hatada 'başarısız' durumuna alınır; süresinde gönderilemeyenler
+        (SendTimeoutError) her zaman yeniden denenir. send hata fırlatırsa parça atlanır
+        ve sahiplenme süresi dolunca yeniden denenir. Önceki haftalardan kalan
+        raporlar da (delivery_max_age_days içinde) teslim edilir. Teslim
+        edilen rapor sayısını döndürür.
+        """
+        delivered = 0
+        while True:
+            rows = self.db.claim_weekly_reports(self.delivery_chunk_size, self.delivery_lease_seconds,
+                                                self.delivery_max_age_days)
+            if not rows:
+                break
+            reports = [
+                WeeklyReport(row[0], row[1], row[2], row[3], row[4], row[5],
+                             bytes(row[6]) if row[6] is not None else None, row[7])
+                for row in rows
+            ]
+            try:
+                results = send(reports) or []
+            except Exception as e:
+                logging.error("%d haftalık raporluk parça teslim edilemedi, sonra yeniden denenecek: %s",
+                              len(reports), e)
+                continue
+
+            failures = []
+            for report, error in results:
+                if not isinstance(error, SendTimeoutError) and (
+                        report.attempts >= self.delivery_max_attempts or _is_permanent(error)):
+                    failures.append((report.id, None, str(error)))
+                else:
+                    failures.append((report.id, backoff_delay(report.attempts, *self.delivery_backoff),
+                                     str(error)))
+            failed_ids = {report.id for report, _ in results}
+            sent = [report.id for report in reports if report.id not in failed_ids]
+
+            with self.db.transaction() as tx:
+                if sent:
+                    self.db.mark_weekly_reports_sent(sent, tx=tx)
+                self.db.fail_weekly_reports(failures, tx=tx)
+
+            failed = sum(delay is None for _, delay, _ in failures)
+            if failed:
+                logging.warning("%d haftalık rapor kalıcı olarak gönderilemedi", failed)
+            delivered += len(sent)
+        return delivered
+
+    def run(self, week_start=None, send=None):
+        """Haftanın raporlarını oluştur ve send verilmişse teslim et"""
+        week_start = week_start or report_week()[0]
+        doctors, skipped, failed, reports = self.generate(week_start)
+        delivered = self.deliver(send) if send is not None else 0
+        if send is None:
+            logging.info("%s haftası raporları teslim için kuyrukta bekliyor", week_start)
+        result = WeeklyRunResult(week_start, doctors, skipped, failed, reports, delivered)
+        logging.info("Haftalık raporlar: %s", result)
+        return result
+
+
+class _CompletedCall:
+    """Havuz kullanılmadığında fonksiyonu hemen çalıştırıp Future gibi sonuç veren sarmalayıcı"""
+
+    def __init__(self, func):
+        try:
+            self._result = func()
+            self._error = None
+        except Exception as e:
+            self._result = None
+            self._error = e
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result